@@ -0,0 +1,371 @@
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import psycopg2
+from psycopg2 import extensions
+
+from ClubService import ClubService, ServiceError, MEMBER
+from DatabasePool import ConnectionPool
+from DataGenerator import memberEmail, generatedPassword, memberName, SLOT_HOURS, FIRST_DATE, HISTORY_DAYS
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Repeatable benchmark suite. Runs the main operations of the app through ClubService against a database filled by DataGenerator.py
+# and reports latency percentiles and database round trips (statements + commits/rollbacks) per operation. Every operation that writes
+# undoes its change afterwards (outside the measurement), so the suite can be run over and over against the same data.
+#
+#   python Benchmark.py --iterations 500 --output results.json
+#   python Benchmark.py --iterations 500 --baseline results.json
+#   python Benchmark.py --operations --rush 500
+#-------------------------------------------------------------------------------------------------------------------------------------
+
+# Round trips counted on the current thread (each benchmark thread only ever sees its own operations)
+roundTrips = threading.local()
+
+def countRoundTrip():
+    roundTrips.count = getattr(roundTrips, 'count', 0) + 1
+
+
+class CountingCursor(extensions.cursor):
+    def execute(self, query, vars=None):
+        countRoundTrip()
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        countRoundTrip()
+        return super().executemany(query, vars_list)
+
+    def callproc(self, procname, parameters=None):
+        countRoundTrip()
+        return super().callproc(procname, parameters)
+
+
+class CountingConnection(extensions.connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursor_factory = CountingCursor
+
+    def commit(self):
+        countRoundTrip()
+        return super().commit()
+
+    def rollback(self):
+        countRoundTrip()
+        return super().rollback()
+
+
+#---------------------------------------------------------------------------------------------------------------------------------
+# Defining the Workload class which picks random (but seeded) inputs from the generated data and runs one operation at a time.
+# Each operation returns an optional cleanup function that undoes what it wrote.
+#---------------------------------------------------------------------------------------------------------------------------------
+class Workload:
+    def __init__(self, service, seed):
+        self.service = service
+        self.random = random.Random(seed)
+
+        with service.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT (SELECT MAX(userId) FROM Member), (SELECT MAX(classId) FROM Class), (SELECT MAX(staffId) FROM AdministrativeStaff),
+                       (SELECT array_agg(roomNumber ORDER BY roomNumber) FROM Room),
+                       (SELECT MIN(availabilityDate) FROM TrainerAvailability), (SELECT MAX(availabilityDate) FROM TrainerAvailability)
+            """)
+            self.maxUserId, self.maxClassId, self.maxStaffId, self.rooms, self.firstDay, self.lastDay = cursor.fetchone()
+            connection.commit()
+
+        if not (self.maxUserId and self.maxClassId and self.maxStaffId and self.rooms and self.firstDay):
+            raise SystemExit("The database is missing generated data. Run DataGenerator.py first.")
+
+    def member(self):
+        return self.random.randint(1, self.maxUserId)
+
+    # Midnight of the generated schedule's first day, used as "now" by the operations that only book or offer future times
+    def startOfSchedule(self):
+        return datetime.combine(self.firstDay, datetime.min.time())
+
+    # A random scheduled day and one of the HH:52-HH:58 gaps DataGenerator never books, as the strings the service expects
+    def gap(self):
+        day = self.firstDay + timedelta(days=self.random.randrange((self.lastDay - self.firstDay).days + 1))
+        hour = self.random.choice(SLOT_HOURS)
+        return day.isoformat(), f"{hour:02d}:52", f"{hour:02d}:58"
+
+    def login(self):
+        userId = self.member()
+        if self.service.login(memberEmail(userId), generatedPassword(userId), MEMBER) is None:
+            raise ServiceError(f"Could not log in as member #{userId}")
+
+    def dashboard(self):
+        self.service.getDashboard(self.member())
+
+    def healthHistory(self):
+        # A member's last 30 days and last 12 weeks from the rollups, ending on a random day of the generated readings
+        endDate = FIRST_DATE + timedelta(days=self.random.randrange(HISTORY_DAYS))
+        userId = self.member()
+        self.service.getHealthTrend(userId, 'day', 30, endDate)
+        self.service.getHealthTrend(userId, 'week', 12, endDate)
+
+    def ptBooking(self):
+        date, startTime, endTime = self.gap()
+        trainers = self.service.findAvailableTrainers(date, startTime, endTime)
+        if not trainers:
+            raise ServiceError("No trainers are available at the requested time.")
+
+        userId = self.member()
+        # The generated schedule is in the past, so booking as of its first day
+        sessionId = self.service.bookPtSession(userId, self.random.choice(trainers)[0], date, startTime, endTime, now=self.startOfSchedule())
+        return lambda: self.service.cancelPtSession(userId, sessionId)
+
+    def nextPtSlots(self):
+        # A 30 day search across all trainers starting on a random scheduled day
+        fromDay = self.firstDay + timedelta(days=self.random.randrange((self.lastDay - self.firstDay).days + 1))
+        self.service.findNextPtSlots(self.member(), self.random.choice([30, 45, 60]), fromDay.isoformat(), (fromDay + timedelta(days=29)).isoformat(), now=self.startOfSchedule())
+
+    def classRegistration(self):
+        userId, classId = self.member(), self.random.randint(1, self.maxClassId)
+        self.service.registerForClass(userId, classId)
+        return lambda: self.service.deregisterFromClass(userId, classId)
+
+    def roomBooking(self):
+        date, startTime, endTime = self.gap()
+        roomBookingId = self.service.createRoomBooking(self.random.randint(1, self.maxStaffId), self.random.choice(self.rooms), date, startTime, endTime)
+        return lambda: self.service.removeRoomBooking(roomBookingId)
+
+    def memberSearch(self):
+        fName, lName = memberName(self.member())
+        self.service.searchMembers(fName[:self.random.randint(2, len(fName))], lName[:self.random.randint(2, len(lName))])
+
+    def billingListings(self):
+        # The first two pages of a bill listing and of the member list, which is what managePayment shows a staff member
+        status = self.random.choice(['Awaiting Payment', 'Paid', 'Returned', 'Cancelled'])
+        page = self.service.listBills(status)
+        if page.nextAfter is not None:
+            self.service.listBills(status, page.nextAfter)
+        page = self.service.listMembers()
+        if page.nextAfter is not None:
+            self.service.listMembers(page.nextAfter)
+
+    def operations(self):
+        return {
+            'login': self.login,
+            'dashboard': self.dashboard,
+            'healthHistory': self.healthHistory,
+            'ptBooking': self.ptBooking,
+            'nextPtSlots': self.nextPtSlots,
+            'classRegistration': self.classRegistration,
+            'roomBooking': self.roomBooking,
+            'memberSearch': self.memberSearch,
+            'billingListings': self.billingListings,
+        }
+
+
+def percentile(sortedValues, fraction):
+    # Nearest-rank percentile
+    if not sortedValues:
+        return None
+    return sortedValues[max(0, math.ceil(fraction * len(sortedValues)) - 1)]
+
+
+#---------------------------------------------------------------------------------------------------------------------------------
+# Running one operation the given number of times after a warmup. Returns its latency percentiles (ms) and mean round trips.
+#---------------------------------------------------------------------------------------------------------------------------------
+def runOperation(operation, iterations, warmup):
+    latencies = []
+    trips = []
+    rejected = 0
+
+    for iteration in range(warmup + iterations):
+        roundTrips.count = 0
+        started = time.perf_counter()
+        try:
+            cleanup = operation()
+        except ServiceError:
+            # A rule the random input happened to break (e.g. already registered in that class); still a complete, measured request
+            cleanup = None
+            rejected += 1
+        elapsed = time.perf_counter() - started
+        count = roundTrips.count
+
+        if cleanup is not None:
+            cleanup()
+
+        if iteration >= warmup:
+            latencies.append(elapsed * 1000)
+            trips.append(count)
+
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'roundTrips': sum(trips) / len(trips) if trips else 0,
+        'rejected': rejected,
+    }
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Registration rush: `registrants` members all try to register for the same new class (with `capacity` seats) at the same moment, one
+# thread each. Reports registrations per second and latency, and checks the class ended up with exactly `capacity` members and everyone
+# else on the waitlist. The class is removed afterwards.
+#-------------------------------------------------------------------------------------------------------------------------------------
+def runRegistrationRush(workload, registrants, capacity):
+    service = workload.service
+    date, startTime, endTime = workload.gap()
+    trainers = service.findAvailableTrainers(date, startTime, endTime)
+    if not trainers:
+        raise ServiceError("No trainers are available for the registration rush class.")
+
+    classId = service.addClass("Registration Rush", trainers[0][0], date, startTime, endTime, capacity)
+    members = workload.random.sample(range(1, workload.maxUserId + 1), registrants)
+    barrier = threading.Barrier(registrants + 1)
+    outcomes = {'registered': 0, 'waitlisted': 0, 'rejected': 0, 'failed': 0}
+    latencies = []
+    lock = threading.Lock()
+
+    def register(userId):
+        barrier.wait()
+        started = time.perf_counter()
+        try:
+            _, waitlistPosition = service.registerForClass(userId, classId)
+            outcome = 'registered' if waitlistPosition is None else 'waitlisted'
+        except ServiceError:
+            outcome = 'rejected'
+        except psycopg2.Error:
+            outcome = 'failed'
+        elapsed = time.perf_counter() - started
+
+        with lock:
+            outcomes[outcome] += 1
+            latencies.append(elapsed * 1000)
+
+    threads = [threading.Thread(target=register, args=(userId,)) for userId in members]
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    try:
+        with service.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT registeredCount, (SELECT COUNT(*) FROM MemberTakesClass WHERE classId = %(classId)s), (SELECT COUNT(*) FROM ClassWaitlist WHERE classId = %(classId)s)
+                FROM Class WHERE classId = %(classId)s
+            """, {'classId': classId})
+            registeredCount, registrations, waitlisted = cursor.fetchone()
+            connection.commit()
+    finally:
+        service.removeClass(classId)
+
+    latencies.sort()
+    return {
+        'registrants': registrants,
+        'capacity': capacity,
+        'seconds': elapsed,
+        'registrationsPerSecond': registrants / elapsed if elapsed else 0,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'outcomes': outcomes,
+        # Never over capacity, nobody lost, and nobody left waiting while a seat is free
+        'consistent': registeredCount == registrations == outcomes['registered'] <= capacity and waitlisted == outcomes['waitlisted'] and (waitlisted == 0 or registrations == capacity),
+    }
+
+
+def printRush(rush):
+    print(f"\nRegistration rush: {rush['registrants']} registrants for {rush['capacity']} seats in {rush['seconds']:.2f}s ({rush['registrationsPerSecond']:.0f} registrations/s)")
+    print(f"p50 {rush['p50']:.2f} ms, p95 {rush['p95']:.2f} ms, p99 {rush['p99']:.2f} ms; " + ", ".join(f"{count} {outcome}" for outcome, count in rush['outcomes'].items()))
+    print("Seat counter, registrations and waitlist are consistent" if rush['consistent'] else "INCONSISTENT: the class was overbooked or lost registrations")
+
+
+def printResults(results, baseline=None):
+    print(f"{'operation':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'trips':>8}{'rejected':>10}")
+    for name, result in results.items():
+        line = f"{name:<20}{result['p50']:>10.2f}{result['p95']:>10.2f}{result['p99']:>10.2f}{result['roundTrips']:>8.1f}{result['rejected']:>10}"
+        if baseline and name in baseline:
+            line += f"   (baseline p95 {baseline[name]['p95']:.2f} ms, {baseline[name]['roundTrips']:.1f} trips)"
+        print(line)
+
+
+#---------------------------------------------------------------------------------------------------------------------------------
+# Comparing against an earlier run. A p95 more than `tolerance` slower, or any extra round trips, counts as a regression.
+#---------------------------------------------------------------------------------------------------------------------------------
+def findRegressions(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        if result['p95'] > baseline[name]['p95'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95']:.2f} ms vs {baseline[name]['p95']:.2f} ms")
+        if result['roundTrips'] > baseline[name]['roundTrips'] + 0.05:
+            regressions.append(f"{name}: {result['roundTrips']:.1f} round trips vs {baseline[name]['roundTrips']:.1f}")
+    return regressions
+
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Benchmark the HealthAndFitnessClub operations against a generated database.")
+    parser.add_argument('--dsn', help="PostgreSQL connection string (defaults to the one in HealthAndFitnessClub.py)")
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=3005)
+    parser.add_argument('--operations', nargs='*', help="only run these operations (none at all with just --operations)")
+    parser.add_argument('--rush', type=int, metavar='REGISTRANTS', help="also run a registration rush with this many concurrent registrants")
+    parser.add_argument('--rush-capacity', type=int, default=100, help="seats in the registration rush class")
+    parser.add_argument('--pool-size', type=int, default=20, help="most database connections the benchmark uses at once")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="compare against the results JSON of an earlier run and exit with 1 on a regression")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed p95 slowdown against the baseline (0.2 = 20%%)")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parseArguments()
+
+    if arguments.dsn is None:
+        from HealthAndFitnessClub import connection_string
+        arguments.dsn = connection_string
+
+    # The checkout timeout is generous since a registration rush has far more threads than connections
+    connectionPool = ConnectionPool(arguments.dsn, minSize=1, maxSize=arguments.pool_size, checkoutTimeout=120, connectionFactory=CountingConnection)
+    try:
+        workload = Workload(ClubService(connectionPool), arguments.seed)
+        operations = workload.operations()
+        selected = list(operations) if arguments.operations is None else arguments.operations
+
+        results = {}
+        for name in selected:
+            results[name] = runOperation(operations[name], arguments.iterations, arguments.warmup)
+
+        rush = runRegistrationRush(workload, arguments.rush, arguments.rush_capacity) if arguments.rush else None
+    except psycopg2.Error as err:
+        raise SystemExit(f"Database error: {err}")
+    finally:
+        connectionPool.closeAll()
+
+    baseline = None
+    if arguments.baseline:
+        with open(arguments.baseline) as baselineFile:
+            baseline = json.load(baselineFile)
+
+    if results:
+        printResults(results, baseline)
+    if rush:
+        printRush(rush)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as outputFile:
+            json.dump(dict(results, **({'registrationRush': rush} if rush else {})), outputFile, indent=2)
+
+    if baseline:
+        regressions = findRegressions(results, baseline, arguments.tolerance)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if regressions:
+            sys.exit(1)
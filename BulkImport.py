@@ -0,0 +1,366 @@
+import argparse
+import collections
+import csv
+import itertools
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+import psycopg2
+
+from ClubService import (ServiceError, DEFAULT_CLASS_CAPACITY, MAX_CLASS_NAME_LENGTH, MAX_EMAIL_LENGTH, isValidEmail, requireValidAccount, requireValidMember,
+                         requireScheduleSlot)
+from CopyStreams import CopyStream
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Bulk importer for another club's members, trainers, trainer availability and classes, e.g. after acquiring it. Reads a CSV file with
+# a header row, checks every row with the same rules as registering through the app (see requireValidMember/requireValidAccount and
+# requireScheduleSlot in ClubService), streams the valid rows through COPY into a temporary staging table, checks what can only be
+# checked against the database (duplicate emails, unknown trainers, schedule overlaps) for all rows at once, and inserts the rest with
+# one INSERT ... SELECT. Everything is imported in one transaction, so a failed import leaves nothing behind.
+#
+# Rows are read and checked a batch at a time (in --workers processes if asked) and only a few batches are ever in flight, so memory
+# stays the same however big the file is. Rows that can't be imported are written to a rejects CSV (by default next to the file) with
+# their line number and the reason, in the order they were found: first the rows that failed the checks, then the ones the database
+# turned down.
+#
+#   python BulkImport.py members acquired_members.csv --workers 4
+#   python BulkImport.py trainers acquired_trainers.csv
+#   python BulkImport.py availability acquired_availability.csv --rejects availability_rejects.csv
+#   python BulkImport.py classes acquired_classes.csv
+#
+# Import trainers before their availability, and availability before the classes they teach.
+#-------------------------------------------------------------------------------------------------------------------------------------
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Why a row that passed the checks wasn't imported, decided in the staging table
+DUPLICATE_EMAIL = "email appears on an earlier line"
+EMAIL_REGISTERED = "email already registered"
+UNKNOWN_TRAINER = "no trainer with this email"
+OVERLAPS_EARLIER_LINE = "overlaps an earlier line"
+OVERLAPS_AVAILABILITY = "overlaps availability the trainer already has"
+TRAINER_UNAVAILABLE = "trainer isn't available at this time"
+OVERLAPS_CLASS = "overlaps one of the trainer's classes"
+OVERLAPS_SESSION = "overlaps one of the trainer's PT sessions"
+MISSING_COLUMNS = "missing columns"
+
+# The check statements below take the reasons as parameters
+REASONS = {
+    'DUPLICATE_EMAIL': DUPLICATE_EMAIL, 'EMAIL_REGISTERED': EMAIL_REGISTERED, 'UNKNOWN_TRAINER': UNKNOWN_TRAINER, 'OVERLAPS_EARLIER_LINE': OVERLAPS_EARLIER_LINE,
+    'OVERLAPS_AVAILABILITY': OVERLAPS_AVAILABILITY, 'TRAINER_UNAVAILABLE': TRAINER_UNAVAILABLE, 'OVERLAPS_CLASS': OVERLAPS_CLASS, 'OVERLAPS_SESSION': OVERLAPS_SESSION,
+}
+
+
+#---------------------------------------------------------------------------------------------------------------------------------
+# Reading a row's fields. Everything but passwords is stripped, since spreadsheets tend to leave stray spaces around values.
+#---------------------------------------------------------------------------------------------------------------------------------
+def field(row, name):
+    return (row.get(name) or '').strip()
+
+def optionalNumber(row, name, decimals, message):
+    text = field(row, name)
+    if not text:
+        return None
+    try:
+        value = float(text)
+    except ValueError:
+        raise ServiceError(message)
+    if not math.isfinite(value):
+        raise ServiceError(message)
+    return round(value, decimals)
+
+def requireTrainerEmail(row):
+    trainerEmail = field(row, 'trainerEmail')
+    if not isValidEmail(trainerEmail) or len(trainerEmail) > MAX_EMAIL_LENGTH:
+        raise ServiceError("You have entered an invalid trainer email.")
+    return trainerEmail
+
+
+#---------------------------------------------------------------------------------------------------------------------------------
+# Checking one row of each kind of file. Each returns the row's values in the order of its staging columns, or raises ServiceError.
+#---------------------------------------------------------------------------------------------------------------------------------
+def validateMember(row):
+    weightLbs = optionalNumber(row, 'weightLbs', 2, "You have entered an invalid weight. It must be positive and under 1000 lbs.")
+    bodyFatPercentage = optionalNumber(row, 'bodyFatPercentage', 1, "You have entered an invalid body fat percentage. It must be between 3 and 85.")
+    values = (field(row, 'fName'), field(row, 'lName'), field(row, 'email'), row.get('password') or '', field(row, 'dateOfBirth'), field(row, 'phoneNumber'))
+    requireValidMember(*values, weightLbs, bodyFatPercentage)
+    return values + (weightLbs, bodyFatPercentage)
+
+def validateTrainer(row):
+    values = (field(row, 'fName'), field(row, 'lName'), field(row, 'email'), row.get('password') or '', field(row, 'phoneNumber'))
+    requireValidAccount(*values)
+    return values
+
+def validateAvailability(row):
+    trainerEmail = requireTrainerEmail(row)
+    values = (field(row, 'availabilityDate'), field(row, 'startTime'), field(row, 'endTime'))
+    requireScheduleSlot(*values)
+    return (trainerEmail,) + values
+
+def validateClass(row):
+    className = field(row, 'className')
+    if not className or len(className) > MAX_CLASS_NAME_LENGTH:
+        raise ServiceError(f"Please enter a class name of at most {MAX_CLASS_NAME_LENGTH} characters.")
+    trainerEmail = requireTrainerEmail(row)
+    values = (field(row, 'classDate'), field(row, 'startTime'), field(row, 'endTime'))
+    requireScheduleSlot(*values)
+
+    capacity = field(row, 'capacity')
+    if not capacity:
+        capacity = DEFAULT_CLASS_CAPACITY
+    elif capacity.isascii() and capacity.isdigit() and 1 <= int(capacity) <= 2 ** 31 - 1:
+        capacity = int(capacity)
+    else:
+        raise ServiceError("A class needs room for at least one member.")
+    return (className, trainerEmail) + values + (capacity,)
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# What each kind of file holds:
+#   fields   the CSV columns, which are also the staging columns COPY fills (the optional ones may be left out of the file)
+#   staging  the staging table's column definitions
+#   checks   statements setting the reason of staged rows that can't be imported
+#   insert   the INSERT ... SELECT of the rows without a reason
+# The reason of a staged row is only set if it doesn't have one yet, so each row is rejected for the first problem found.
+#-------------------------------------------------------------------------------------------------------------------------------------
+ImportKind = collections.namedtuple('ImportKind', ['fields', 'optional', 'validate', 'staging', 'checks', 'insert'])
+
+# Rows whose email was already used by an earlier line or is already registered in the given table
+def emailChecks(table):
+    return [f"""
+        UPDATE ImportStaging s SET reason = checked.reason
+        FROM (
+            SELECT lineNumber, CASE
+                WHEN lineNumber > MIN(lineNumber) OVER (PARTITION BY LOWER(email)) THEN %(DUPLICATE_EMAIL)s
+                WHEN EXISTS (SELECT 1 FROM {table} a WHERE LOWER(a.email) = LOWER(i.email)) THEN %(EMAIL_REGISTERED)s
+            END AS reason
+            FROM ImportStaging i
+        ) checked
+        WHERE s.lineNumber = checked.lineNumber AND checked.reason IS NOT NULL
+    """]
+
+# Finding each row's trainer by email, then rejecting the rows without one and the ones that overlap an earlier line for the same
+# trainer (the same rule as the exclusion constraints from migration 001)
+def scheduleChecks(dateColumn):
+    return [
+        "UPDATE ImportStaging s SET trainerId = t.trainerId FROM PersonalTrainer t WHERE LOWER(t.email) = LOWER(s.trainerEmail)",
+        "UPDATE ImportStaging SET reason = %(UNKNOWN_TRAINER)s WHERE trainerId IS NULL",
+        f"CREATE INDEX ON ImportStaging (trainerId, {dateColumn})",
+        "ANALYZE ImportStaging",
+        f"""
+        UPDATE ImportStaging s SET reason = %(OVERLAPS_EARLIER_LINE)s
+        WHERE s.reason IS NULL AND EXISTS (
+            SELECT 1 FROM ImportStaging e
+            WHERE e.trainerId = s.trainerId AND e.{dateColumn} = s.{dateColumn} AND e.lineNumber < s.lineNumber AND e.reason IS NULL AND e.slot && s.slot
+        )
+        """,
+    ]
+
+IMPORT_KINDS = {
+    'members': ImportKind(
+        fields=('fName', 'lName', 'email', 'password', 'dateOfBirth', 'phoneNumber', 'weightLbs', 'bodyFatPercentage'),
+        optional=('weightLbs', 'bodyFatPercentage'),
+        validate=validateMember,
+        staging="fName VARCHAR(20), lName VARCHAR(20), email VARCHAR(50), password VARCHAR(100), dateOfBirth DATE, phoneNumber CHAR(14), weightLbs NUMERIC(5, 2), bodyFatPercentage NUMERIC(3, 1)",
+        checks=emailChecks('Member'),
+        insert="""
+            INSERT INTO Member (fName, lName, email, password, dateOfBirth, phoneNumber, weightLbs, bodyFatPercentage)
+            SELECT fName, lName, email, password, dateOfBirth, phoneNumber, weightLbs, bodyFatPercentage
+            FROM ImportStaging WHERE reason IS NULL ORDER BY lineNumber
+        """,
+    ),
+    'trainers': ImportKind(
+        fields=('fName', 'lName', 'email', 'password', 'phoneNumber'),
+        optional=(),
+        validate=validateTrainer,
+        staging="fName VARCHAR(20), lName VARCHAR(20), email VARCHAR(50), password VARCHAR(100), phoneNumber CHAR(14)",
+        checks=emailChecks('PersonalTrainer'),
+        insert="""
+            INSERT INTO PersonalTrainer (fName, lName, email, password, phoneNumber)
+            SELECT fName, lName, email, password, phoneNumber
+            FROM ImportStaging WHERE reason IS NULL ORDER BY lineNumber
+        """,
+    ),
+    'availability': ImportKind(
+        fields=('trainerEmail', 'availabilityDate', 'startTime', 'endTime'),
+        optional=(),
+        validate=validateAvailability,
+        staging="""trainerEmail VARCHAR(50), availabilityDate DATE, startTime TIME, endTime TIME, trainerId INT,
+            slot tsrange GENERATED ALWAYS AS (tsrange(availabilityDate + startTime, availabilityDate + endTime, '[]')) STORED""",
+        checks=scheduleChecks('availabilityDate') + ["""
+            UPDATE ImportStaging s SET reason = %(OVERLAPS_AVAILABILITY)s
+            WHERE s.reason IS NULL AND EXISTS (
+                SELECT 1 FROM TrainerAvailability a
+                WHERE a.trainerId = s.trainerId AND a.availabilityDate = s.availabilityDate AND a.availabilitySlot && s.slot
+            )
+        """],
+        insert="""
+            INSERT INTO TrainerAvailability (trainerId, availabilityDate, startTime, endTime)
+            SELECT trainerId, availabilityDate, startTime, endTime
+            FROM ImportStaging WHERE reason IS NULL ORDER BY lineNumber
+        """,
+    ),
+    # Like addClass: the trainer has to be available for the whole class and not teaching or training anyone else at the time
+    'classes': ImportKind(
+        fields=('className', 'trainerEmail', 'classDate', 'startTime', 'endTime', 'capacity'),
+        optional=('capacity',),
+        validate=validateClass,
+        staging="""className VARCHAR(50), trainerEmail VARCHAR(50), classDate DATE, startTime TIME, endTime TIME, capacity INT, trainerId INT,
+            slot tsrange GENERATED ALWAYS AS (tsrange(classDate + startTime, classDate + endTime, '[]')) STORED""",
+        checks=scheduleChecks('classDate') + ["""
+            UPDATE ImportStaging s SET reason = checked.reason
+            FROM (
+                SELECT i.lineNumber, CASE
+                    WHEN NOT EXISTS (
+                        SELECT 1 FROM TrainerAvailability a
+                        WHERE a.trainerId = i.trainerId AND a.availabilityDate = i.classDate AND a.startTime <= i.startTime AND a.endTime >= i.endTime
+                    ) THEN %(TRAINER_UNAVAILABLE)s
+                    WHEN EXISTS (SELECT 1 FROM Class c WHERE c.trainerId = i.trainerId AND c.classDate = i.classDate AND c.classSlot && i.slot) THEN %(OVERLAPS_CLASS)s
+                    WHEN EXISTS (
+                        SELECT 1 FROM PersonalTrainingSession p WHERE p.trainerId = i.trainerId AND p.sessionDate = i.classDate AND p.sessionSlot && i.slot
+                    ) THEN %(OVERLAPS_SESSION)s
+                END AS reason
+                FROM ImportStaging i
+                WHERE i.reason IS NULL
+            ) checked
+            WHERE s.lineNumber = checked.lineNumber AND checked.reason IS NOT NULL
+        """],
+        insert="""
+            INSERT INTO Class (className, trainerId, classDate, startTime, endTime, capacity)
+            SELECT className, trainerId, classDate, startTime, endTime, capacity
+            FROM ImportStaging WHERE reason IS NULL ORDER BY lineNumber
+        """,
+    ),
+}
+
+
+#---------------------------------------------------------------------------------------------------------------------------------
+# Checking a batch of (lineNumber, row) pairs. Runs in the worker processes, so it only takes and returns plain picklable values:
+# ([(lineNumber, value, ...), ...] for the valid rows, [(lineNumber, reason, row), ...] for the others).
+#---------------------------------------------------------------------------------------------------------------------------------
+def validateBatch(kindName, batch):
+    validate = IMPORT_KINDS[kindName].validate
+    goodRows, rejects = [], []
+    for lineNumber, row in batch:
+        try:
+            goodRows.append((lineNumber,) + validate(row))
+        except ServiceError as error:
+            rejects.append((lineNumber, str(error), row))
+    return goodRows, rejects
+
+def readBatches(reader, batchSize):
+    while True:
+        batch = [(reader.line_num, row) for row in itertools.islice(reader, batchSize)]
+        if not batch:
+            return
+        yield batch
+
+# Checking the batches in order, in `workers` processes if there's more than one. At most two batches per worker are handed out
+# ahead of the one being loaded, so a slow COPY holds back the reading instead of letting checked rows pile up in memory.
+def validatedBatches(kindName, batches, workers):
+    if workers <= 1:
+        for batch in batches:
+            yield validateBatch(kindName, batch)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        pending = collections.deque()
+        for batch in batches:
+            pending.append(pool.apply_async(validateBatch, (kindName, batch)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Importing one CSV file of the given kind. Rejected rows are written to rejectFile (lineNumber, reason and the row's fields).
+# Returns (imported, {reason: count of rejected rows}).
+#-------------------------------------------------------------------------------------------------------------------------------------
+def importFile(connectionString, kindName, file, rejectFile, workers=1, batchSize=DEFAULT_BATCH_SIZE):
+    kind = IMPORT_KINDS[kindName]
+    reader = csv.DictReader(file)
+    missing = [name for name in kind.fields if name not in kind.optional and name not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"{MISSING_COLUMNS}: {', '.join(missing)}")
+
+    rejectWriter = csv.writer(rejectFile)
+    rejectWriter.writerow(('lineNumber', 'reason') + kind.fields)
+    rejected = collections.Counter()
+
+    def reject(lineNumber, reason, values):
+        rejectWriter.writerow((lineNumber, reason) + tuple('' if value is None else value for value in values))
+        rejected[reason] += 1
+
+    def checkedRows():
+        for goodRows, rejects in validatedBatches(kindName, readBatches(reader, batchSize), workers):
+            for lineNumber, reason, row in rejects:
+                reject(lineNumber, reason, [row.get(name) for name in kind.fields])
+            yield from goodRows
+
+    connection = psycopg2.connect(connectionString)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE TEMP TABLE ImportStaging (lineNumber INT PRIMARY KEY, {kind.staging}, reason VARCHAR(100)) ON COMMIT DROP")
+            cursor.copy_expert(f"COPY ImportStaging (lineNumber, {', '.join(kind.fields)}) FROM STDIN", CopyStream(checkedRows()), size=1 << 20)
+            cursor.execute("ANALYZE ImportStaging")
+            for statement in kind.checks:
+                cursor.execute(statement, REASONS)
+            cursor.execute(kind.insert)
+            imported = cursor.rowcount
+
+        # Listing the rows the database turned down before committing drops the staging table
+        with connection.cursor(name='import_rejects') as cursor:
+            cursor.itersize = batchSize
+            cursor.execute(f"SELECT lineNumber, reason, {', '.join(kind.fields)} FROM ImportStaging WHERE reason IS NOT NULL ORDER BY lineNumber")
+            for lineNumber, reason, *values in cursor:
+                reject(lineNumber, reason, values)
+
+        connection.commit()
+    finally:
+        connection.close()
+
+    return imported, rejected
+
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Import members, trainers, trainer availability or classes from a CSV file through COPY.")
+    parser.add_argument('kind', choices=IMPORT_KINDS)
+    parser.add_argument('file', help="CSV file with a header row naming the columns")
+    parser.add_argument('--rejects', help="where to write the rows that weren't imported (defaults to <file>.rejects.csv)")
+    parser.add_argument('--workers', type=int, default=1, help="processes checking rows in parallel")
+    parser.add_argument('--batch-size', dest='batchSize', type=int, default=DEFAULT_BATCH_SIZE, help="rows checked at a time")
+    parser.add_argument('--dsn', help="PostgreSQL connection string (defaults to the one in HealthAndFitnessClub.py)")
+    arguments = parser.parse_args()
+    if arguments.workers < 1 or arguments.batchSize < 1:
+        parser.error("--workers and --batch-size have to be at least 1")
+    return arguments
+
+
+if __name__ == '__main__':
+    arguments = parseArguments()
+    if arguments.dsn is None:
+        from HealthAndFitnessClub import connection_string
+        arguments.dsn = connection_string
+    if arguments.rejects is None:
+        arguments.rejects = os.path.splitext(arguments.file)[0] + ".rejects.csv"
+
+    started = time.monotonic()
+    try:
+        with open(arguments.file, newline='', encoding='utf-8-sig') as file, open(arguments.rejects, 'w', newline='', encoding='utf-8') as rejectFile:
+            imported, rejected = importFile(arguments.dsn, arguments.kind, file, rejectFile, arguments.workers, arguments.batchSize)
+    except (ValueError, psycopg2.Error) as error:
+        # e.g. a member registered or a booking made with the same email/time while the import ran; nothing was imported
+        sys.exit(f"Import failed, nothing was imported: {error}")
+
+    elapsed = time.monotonic() - started
+    total = imported + sum(rejected.values())
+    print(f"{arguments.kind}: {imported} of {total} rows imported in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)")
+    for reason, count in rejected.most_common():
+        print(f"  {count} rejected: {reason}")
+    if rejected:
+        print(f"Rejected rows were written to {arguments.rejects}")
@@ -0,0 +1,1657 @@
+import collections
+import csv
+import itertools
+import re
+from datetime import datetime, timedelta
+
+import psycopg2
+import psycopg2.extras
+
+from CopyStreams import CopyStream
+from ExerciseCatalog import ExerciseCatalog
+from GymAnalytics import GymAnalytics, analyticsAvailable
+from MemberContext import MemberContext
+from PaymentReconciliation import (PAYMENT_TRANSITIONS, SETTLEMENT_FORMATS, DUPLICATE_BILL, UNKNOWN_BILL, AMOUNT_MISMATCH, INVALID_TRANSITION, CHANGED_CONCURRENTLY,
+                                   readSettlementFile)
+from Pagination import KeysetListing, DEFAULT_PAGE_SIZE, equals, dateRange
+from PreparedStatements import PreparedStatement
+from ReferenceData import ReferenceDataCache, ROOM, TRAINER as TRAINER_TABLE, EQUIPMENT
+from ScheduleIndex import ScheduleIndex, TRAINER_BUSY, TRAINER_AVAILABLE, MEMBER_BUSY, ROOM_BOOKED
+from SlotFinder import freeSlots, freeGaps, fitsGap, toMinutes, fromMinutes
+from Transactions import runTransaction
+
+
+# Account types used by login (these match the numbers in the main menu)
+MEMBER = 1
+TRAINER = 2
+STAFF = 3
+
+# The earliest year allowed for a date of birth, and for anything that is scheduled (assuming the gym opened on Jan 1, 2022)
+EARLIEST_BIRTH_YEAR = 1901
+EARLIEST_SCHEDULE_YEAR = 2022
+
+# Seats in a class when the staff member adding it doesn't say otherwise
+DEFAULT_CLASS_CAPACITY = 20
+
+# The longest date range a weekly recurrence (see setRecurringAvailability/addRecurringClass) can cover in one go
+MAX_RECURRENCE_DAYS = 366
+
+# The longest date range the next-available PT slot search looks through
+MAX_SLOT_SEARCH_DAYS = 90
+
+# Opening hours used for the room free/busy grid, and the longest date range it covers at once
+GYM_OPENING_TIME = "06:00"
+GYM_CLOSING_TIME = "22:00"
+MAX_ROOM_GRID_DAYS = 62
+
+# Monthly membership dues a billing run charges when the staff member doesn't choose another amount
+DEFAULT_MONTHLY_DUES = 59.99
+
+# Weeks of health trend shown on the dashboard, and the most scale readings recordHealthMetricReadings sends in one statement
+HEALTH_TREND_WEEKS = 8
+HEALTH_METRIC_BATCH_SIZE = 5000
+
+# Column sizes from the DDL, checked up front so that a value that is too long is reported like any other invalid input
+MAX_NAME_LENGTH = 20
+MAX_EMAIL_LENGTH = 50
+MAX_PASSWORD_LENGTH = 100
+MAX_CLASS_NAME_LENGTH = 50
+
+# Day names accepted in a recurrence, mapped to PostgreSQL's ISODOW numbers (Monday = 1 ... Sunday = 7)
+WEEKDAYS = {'mon': 1, 'tue': 2, 'wed': 3, 'thu': 4, 'fri': 5, 'sat': 6, 'sun': 7}
+
+
+#------------------------------------------------------------------------------------------------------------------------------
+# Raised when a request breaks one of the club's rules (invalid input, a booking conflict, something that doesn't exist, etc.).
+# The message is meant to be shown to the user as is. Database problems are still raised as psycopg2.Error.
+#------------------------------------------------------------------------------------------------------------------------------
+class ServiceError(Exception):
+    pass
+
+
+#------------------------------------------------------------------------------------------------------------------------------
+# Validation helpers shared by the service and the interactive menus (which use them to re-prompt until the input is valid).
+#------------------------------------------------------------------------------------------------------------------------------
+def isValidEmail(email):
+    return re.match(r'^[\w\.-]+@([\w-]+\.)+[\w-]{2,4}$', email) is not None
+
+def isValidPassword(password):
+    # min 8 characters, including 1 letter and 1 number
+    return len(password) >= 8 and any(c.isalpha() for c in password) and any(c.isdigit() for c in password)
+
+def isValidPhoneNumber(phoneNumber):
+    return re.match(r'^\(\d{3}\) \d{3}-\d{4}$', phoneNumber) is not None
+
+def isValidDateFormat(date):
+    return re.match(r'^\d{4}-\d{2}-\d{2}$', str(date)) is not None
+
+def isValidDate(date, earliestYear):
+    try:
+        year, month, day = str(date).split('-')
+        year = int(year)
+        month = int(month)
+        day = int(day)
+
+        # earliestYear is the minimum year the user can enter for a specific date (for example, for birth days I don't want anyone born after 1901 as that is not realistic, so I will use that for earliestYear. For maintenance, assuming my gym opened on Jan 1, 2022 so that is the earliestYear)
+        if month < 1 or month > 12 or day < 1 or day > 31 or year < earliestYear:
+            return False
+        if (month == 4 or month == 6 or month == 9 or month == 11) and day > 30: # if its a month with 30 days and day > 30
+            return False
+        if month == 2: # if its feb, determining if it is a leap year to determine the valid day
+            if year % 4 == 0:
+                if day > 29:
+                    return False
+            elif day > 28:
+                return False
+        return True
+    except ValueError: # if the user enters something that's not an int for MM, DD, or YYYY
+        return False
+
+def isValidTime(time):
+    # 24 hr HH:MM (ex. 9:30 or 17:30)
+    return re.match(r"^(?:[0-1]?[0-9]|2[0-3]):[0-5][0-9]$", str(time)) is not None
+
+def isValidTimeRange(startTime, endTime):
+    return isValidTime(startTime) and isValidTime(endTime) and datetime.strptime(endTime, "%H:%M") > datetime.strptime(startTime, "%H:%M")
+
+def isValidWeight(weight):
+    return weight is None or 0 <= weight < 1000
+
+def isValidBodyFatPercentage(bodyFatPercentage):
+    return bodyFatPercentage is None or 3 <= bodyFatPercentage <= 85
+
+def isNonEmpty(value):
+    return bool(value)
+
+# Turns "Mon/Wed/Fri" (or "mon, wed, fri", "Monday Wednesday") into sorted ISODOW numbers. Returns None if a day isn't recognised.
+def parseWeekdays(text):
+    weekdays = set()
+    for name in re.split(r"[\s,/]+", text.strip().lower()):
+        if name[:3] not in WEEKDAYS:
+            return None
+        weekdays.add(WEEKDAYS[name[:3]])
+    return sorted(weekdays)
+
+def requireScheduleSlot(date, startTime, endTime):
+    if not (isValidDateFormat(date) and isValidDate(date, EARLIEST_SCHEDULE_YEAR)):
+        raise ServiceError("You have entered an invalid date. Please enter a valid date after January 1, 2022 (when the gym was opened) in the format YYYY-MM-DD.")
+    if not isValidTimeRange(startTime, endTime):
+        raise ServiceError("You have entered an invalid time range. Please use the HH:MM format and make sure the end time is after the start time.")
+
+def requireRecurrence(weekdays, fromDate, toDate, startTime, endTime):
+    requireScheduleSlot(fromDate, startTime, endTime)
+    requireScheduleSlot(toDate, startTime, endTime)
+    if not weekdays or any(weekday not in WEEKDAYS.values() for weekday in weekdays):
+        raise ServiceError("Please choose at least one day of the week (e.g. Mon/Wed/Fri).")
+
+    days = (datetime.strptime(toDate, "%Y-%m-%d") - datetime.strptime(fromDate, "%Y-%m-%d")).days
+    if days < 0:
+        raise ServiceError("The end date has to be on or after the start date.")
+    if days >= MAX_RECURRENCE_DAYS:
+        raise ServiceError(f"A recurring schedule can cover at most {MAX_RECURRENCE_DAYS} days at a time.")
+
+# Checking a new member's or trainer's details (registerMember and BulkImport.py), raising a ServiceError for the first invalid one
+def requireValidAccount(fName, lName, email, password, phoneNumber):
+    if not fName or not lName:
+        raise ServiceError("Please enter a first and last name.")
+    if len(fName) > MAX_NAME_LENGTH or len(lName) > MAX_NAME_LENGTH:
+        raise ServiceError(f"First and last names can be at most {MAX_NAME_LENGTH} characters long.")
+    if not isValidEmail(email) or len(email) > MAX_EMAIL_LENGTH:
+        raise ServiceError("You have entered an invalid email.")
+    if not isValidPassword(password) or len(password) > MAX_PASSWORD_LENGTH:
+        raise ServiceError("You have entered an invalid password (min 8 characters, including 1 letter and 1 number).")
+    if not isValidPhoneNumber(phoneNumber):
+        raise ServiceError("You have entered an invalid phone number. Please use the format (###) ###-#### where # is a digit.")
+
+def requireValidMember(fName, lName, email, password, dateOfBirth, phoneNumber, weightLbs=None, bodyFatPercentage=None):
+    requireValidAccount(fName, lName, email, password, phoneNumber)
+    if not (isValidDateFormat(dateOfBirth) and isValidDate(dateOfBirth, EARLIEST_BIRTH_YEAR)):
+        raise ServiceError("You have entered an invalid date of birth. Please enter a valid date after January 1, 1901 in the format YYYY-MM-DD.")
+    if not isValidWeight(weightLbs):
+        raise ServiceError("You have entered an invalid weight. It must be positive and under 1000 lbs.")
+    if not isValidBodyFatPercentage(bodyFatPercentage):
+        raise ServiceError("You have entered an invalid body fat percentage. It must be between 3 and 85.")
+
+
+# The Member columns updateMember can change, along with the check each new value has to pass
+MEMBER_UPDATABLE_FIELDS = {
+    'fName': isNonEmpty,
+    'lName': isNonEmpty,
+    'email': isValidEmail,
+    'password': isValidPassword,
+    'phoneNumber': isValidPhoneNumber,
+    'weightLbs': isValidWeight,
+    'bodyFatPercentage': isValidBodyFatPercentage,
+}
+
+
+# The rollup table and period column behind each getHealthTrend granularity
+HEALTH_TREND_TABLES = {'day': ('HealthMetricDaily', 'metricDate'), 'week': ('HealthMetricWeekly', 'weekStart')}
+
+# Appending health metric readings (filled in by execute_values) and making each member's latest one their current weight/body fat,
+# unless the daily rollup already has readings of theirs from a later day. Readings for members that don't exist are dropped by the
+# join. The rollup check sees the rollups as they were before this statement, since the trigger updating them runs after it.
+# Returns how many readings were recorded.
+RECORD_READINGS_QUERY = """
+    WITH reading AS (
+        INSERT INTO HealthMetric (userId, measuredAt, weightLbs, bodyFatPercentage, source)
+        SELECT v.userId, v.measuredAt, v.weightLbs, v.bodyFatPercentage, v.source
+        FROM (VALUES %s) v (userId, measuredAt, weightLbs, bodyFatPercentage, source)
+        JOIN Member m ON m.userId = v.userId
+        RETURNING userId, measuredAt, weightLbs, bodyFatPercentage
+    ),
+    latest AS (
+        UPDATE Member m
+        SET weightLbs = COALESCE(r.weightLbs, m.weightLbs), bodyFatPercentage = COALESCE(r.bodyFatPercentage, m.bodyFatPercentage)
+        FROM (SELECT DISTINCT ON (userId) * FROM reading ORDER BY userId, measuredAt DESC) r
+        WHERE m.userId = r.userId
+          AND NOT EXISTS (SELECT 1 FROM HealthMetricDaily d WHERE d.userId = r.userId AND d.metricDate > r.measuredAt::date)
+    )
+    SELECT COUNT(*) FROM reading
+"""
+
+
+#--------------------------------------------------------------------------------------------------------------------------------------
+# The hot lookups that run with the same SQL text thousands of times an hour. Each is prepared once per pooled connection and then
+# executed by name (see PreparedStatements.py), so PostgreSQL doesn't parse and plan them from scratch every time.
+#--------------------------------------------------------------------------------------------------------------------------------------
+LOGIN_STATEMENTS = {
+    MEMBER: PreparedStatement('login_member', "SELECT * FROM Member WHERE LOWER(email) = LOWER($1) AND password = $2"),
+    TRAINER: PreparedStatement('login_trainer', "SELECT * FROM PersonalTrainer WHERE LOWER(email) = LOWER($1) AND password = $2"),
+    STAFF: PreparedStatement('login_staff', "SELECT * FROM AdministrativeStaff WHERE LOWER(email) = LOWER($1) AND password = $2"),
+}
+
+# Trainer IDs only; their names come from the reference data cache
+findAvailableTrainersStatement = PreparedStatement('find_available_trainers', """
+    SELECT DISTINCT ta.trainerId
+    FROM TrainerAvailability ta
+    WHERE ta.availabilityDate = $1::date AND ta.startTime <= $2::time AND ta.endTime >= $3::time
+    AND NOT EXISTS (
+        SELECT 1
+        FROM Class c
+        WHERE c.trainerId = ta.trainerId AND c.classDate = $1::date
+        AND c.classSlot && tsrange($1::date + $2::time, $1::date + $3::time, '[]')
+    )
+    AND NOT EXISTS (
+        SELECT 1
+        FROM PersonalTrainingSession pts
+        WHERE pts.trainerId = ta.trainerId AND pts.sessionDate = $1::date
+        AND pts.sessionSlot && tsrange($1::date + $2::time, $1::date + $3::time, '[]')
+    )
+    ORDER BY ta.trainerId
+""")
+
+listRegisteredClassesStatement = PreparedStatement('list_registered_classes', """
+    SELECT Class.classId, Class.className, Class.classDate, Class.startTime, Class.endTime
+    FROM MemberTakesClass JOIN Class ON MemberTakesClass.classId = Class.classId
+    WHERE MemberTakesClass.userId = $1::int
+    ORDER BY Class.classDate ASC
+""")
+
+listPtSessionsStatement = PreparedStatement('list_pt_sessions', """
+    SELECT PersonalTrainingSession.sessionId, PersonalTrainer.fName, PersonalTrainer.lName, PersonalTrainingSession.sessionDate, PersonalTrainingSession.startTime, PersonalTrainingSession.endTime
+    FROM PersonalTrainingSession JOIN PersonalTrainer ON PersonalTrainingSession.trainerId = PersonalTrainer.trainerId
+    WHERE PersonalTrainingSession.userId = $1::int
+    ORDER BY PersonalTrainingSession.sessionDate ASC
+""")
+
+getAvailabilityStatement = PreparedStatement('get_availability', """
+    SELECT availibilityId, startTime, endTime
+    FROM TrainerAvailability
+    WHERE trainerId = $1::int AND availabilityDate = $2::date
+    ORDER BY startTime
+""")
+
+getRoomBookingsStatement = PreparedStatement('get_room_bookings', """
+    SELECT roomBookingId, startTime, endTime
+    FROM RoomBookings
+    WHERE roomNumber = $1::int AND bookingDate = $2::date
+    ORDER BY startTime
+""")
+
+
+# Turning an ID typed into a menu into the key the reference data cache is keyed by, or None if it isn't a number
+def referenceKey(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Defining the ClubService class which holds every operation of the app as a plain method: arguments in, rows/ids/dicts out, and a
+# ServiceError when a rule is broken. Nothing here calls input() or print(), so it can be imported, called from scripts and benchmarks,
+# and used from many threads at once (each call borrows a pooled connection only for its own statements). Creating the service does
+# not touch the database; the connection pool passed in decides when connections are opened.
+#--------------------------------------------------------------------------------------------------------------------------------------
+class ClubService:
+    def __init__(self, connectionPool, scheduleIndexMaxAge=30, memberSearchLimit=20, referenceCacheTtl=300, referenceCacheMaxEntries=1024):
+        self.connectionPool = connectionPool
+        self.memberSearchLimit = memberSearchLimit
+
+        # In-memory index of trainer/member/room schedules used for conflict checks (the database constraints stay authoritative)
+        self.scheduleIndex = ScheduleIndex(connectionPool, scheduleIndexMaxAge)
+
+        # Process-wide cache of rooms, exercises, trainers and equipment, kept coherent across processes by LISTEN/NOTIFY (migration 007)
+        self.referenceData = ReferenceDataCache(connectionPool, referenceCacheTtl, referenceCacheMaxEntries)
+
+        # The Exercise table (through the reference data cache) used by createRoutine
+        self.exerciseCatalog = ExerciseCatalog(self.referenceData)
+
+        # Gym-wide health statistics for staff (needs NumPy)
+        self.gymAnalytics = GymAnalytics(connectionPool)
+
+        # Paginated listings (see Pagination.py). Each is ordered by its key columns and fetched one page at a time.
+        self.classListing = KeysetListing("classId, className, trainerId, classDate, startTime, endTime, capacity, registeredCount", "Class", ["classDate", "startTime", "classId"])
+        self.memberListing = KeysetListing("userId, fName, lName", "Member", ["userId"])
+        self.billListing = KeysetListing("billNumber, memberId, paymentAmount, statusUpdateDate", "Payment", ["billNumber"])
+
+        # Months (as datetimes on the 1st) known to have a HealthMetric partition, so createHealthMetricPartitions runs once per month
+        self._healthMetricMonths = set()
+
+    #==================================================================================================================================
+    # Accounts
+    #==================================================================================================================================
+
+    #-----------------------------------------------------------------------------------------------------------------
+    # Registering a new member after checking every field. Returns the new member's userId.
+    #-----------------------------------------------------------------------------------------------------------------
+    def registerMember(self, fName, lName, email, password, dateOfBirth, phoneNumber, weightLbs=None, bodyFatPercentage=None):
+        requireValidMember(fName, lName, email, password, dateOfBirth, phoneNumber, weightLbs, bodyFatPercentage)
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO Member (fName, lName, email, password, dateOfBirth, phoneNumber, weightLbs, bodyFatPercentage)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING userId
+            """, (fName, lName, email, password, dateOfBirth, phoneNumber, weightLbs, bodyFatPercentage))
+            userId = cursor.fetchone()[0]
+            connection.commit()
+        return userId
+
+    #-------------------------------------------------------------------------------------------------------------------------
+    # Logging in a member, trainer or staff member. Returns their full row from Member/PersonalTrainer/AdministrativeStaff, or
+    # None if the email and password don't match.
+    #-------------------------------------------------------------------------------------------------------------------------
+    def login(self, email, password, accountType):
+        if accountType not in LOGIN_STATEMENTS:
+            raise ServiceError("You have entered an invalid account type.")
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            LOGIN_STATEMENTS[accountType].execute(cursor, (email, password))
+            return cursor.fetchone()
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Returning a MemberContext (see MemberContext.py) for a logged-in member's session, given their Member row from login. Passing it
+    # to the schedule methods below as context= lets them check conflicts against the member's cached schedule and keeps that schedule
+    # current, so a session lists and checks the member's schedule without re-querying it for every action.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def openMemberContext(self, member):
+        return MemberContext(self.connectionPool, member, self.scheduleIndex.maxAge)
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Changing one of the member's personal details or health metrics (see MEMBER_UPDATABLE_FIELDS). Returns True if the member exists.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def updateMember(self, userId, field, value):
+        if field not in MEMBER_UPDATABLE_FIELDS:
+            raise ServiceError(f"{field} can't be updated.")
+        if not MEMBER_UPDATABLE_FIELDS[field](value):
+            raise ServiceError(f"You have entered an invalid value for {field}.")
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            # field is one of the known column names above, never user input
+            cursor.execute(f"UPDATE Member SET {field} = %s WHERE userId = %s", (value, userId))
+            connection.commit()
+            return cursor.rowcount == 1
+
+    def getMember(self, userId):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT * FROM Member WHERE userId = %s", (userId,))
+            return cursor.fetchone()
+
+    #==================================================================================================================================
+    # Fitness goals, dashboard and routines
+    #==================================================================================================================================
+
+    # Returns (achievementId, achievementName, achievementDescription, dateAchieved) rows
+    def getFitnessGoals(self, userId):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT achievementId, achievementName, achievementDescription, dateAchieved
+                FROM Achievement
+                WHERE userId = %s
+                ORDER BY achievementId
+            """, (userId,))
+            return cursor.fetchall()
+
+    # Returns the new goal's achievementId
+    def addFitnessGoal(self, userId, achievementName, achievementDescription=None):
+        if not achievementName:
+            raise ServiceError("Please enter an achievement name.")
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO Achievement (userId, achievementName, achievementDescription)
+                VALUES (%s, %s, %s)
+                RETURNING achievementId
+            """, (userId, achievementName, achievementDescription or None))
+            achievementId = cursor.fetchone()[0]
+            connection.commit()
+        return achievementId
+
+    #--------------------------------------------------------------------------------------------------------------------------------
+    # Marking one of the member's goals as achieved today. The UPDATE only touches goals that aren't achieved yet, and we only look the
+    # goal up again to explain why when nothing was updated.
+    #--------------------------------------------------------------------------------------------------------------------------------
+    def markGoalAchieved(self, userId, achievementId):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("UPDATE Achievement SET dateAchieved = %s WHERE userId = %s AND achievementId = %s AND dateAchieved IS NULL", (datetime.now(), userId, achievementId))
+            if cursor.rowcount == 1:
+                connection.commit()
+                return
+
+            cursor.execute("SELECT 1 FROM Achievement WHERE userId = %s AND achievementId = %s", (userId, achievementId))
+            if cursor.fetchone():
+                raise ServiceError("You've already achieved this goal!")
+            raise ServiceError("No matching goal found.")
+
+    #-------------------------------------------------------------------------------------------------------------------------------------
+    # Getting everything the member's dashboard shows (health statistics, achievements, and routines along with their exercises) in one
+    # round trip. The achievements and routines are aggregated into JSON on the server, which psycopg2 hands back as lists of dicts,
+    # instead of running one extra query per routine. Returns None if the member doesn't exist, otherwise a dict with the keys
+    # weightLbs, bodyFatPercentage, achievements and routines.
+    #-------------------------------------------------------------------------------------------------------------------------------------
+    def getDashboard(self, userId, trendWeeks=HEALTH_TREND_WEEKS):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT m.weightLbs, m.bodyFatPercentage,
+                    COALESCE((
+                        SELECT json_agg(json_build_object('achievementName', a.achievementName, 'achievementDescription', a.achievementDescription, 'dateAchieved', a.dateAchieved) ORDER BY a.dateAchieved, a.achievementId)
+                        FROM Achievement a
+                        WHERE a.userId = m.userId AND a.dateAchieved IS NOT NULL
+                    ), '[]'::json),
+                    COALESCE((
+                        SELECT json_agg(json_build_object(
+                            'routineId', r.routineId,
+                            'routineName', r.routineName,
+                            'routineDescription', r.routineDescription,
+                            'exercises', COALESCE((
+                                SELECT json_agg(json_build_object('exerciseName', e.exerciseName, 'numSets', rea.numSets) ORDER BY rea.routineExerciseId)
+                                FROM RoutineExerciseAssignment rea
+                                JOIN Exercise e ON rea.exerciseId = e.exerciseId
+                                WHERE rea.routineId = r.routineId
+                            ), '[]'::json)
+                        ) ORDER BY r.routineId)
+                        FROM Routine r
+                        WHERE r.userId = m.userId
+                    ), '[]'::json),
+                    COALESCE((
+                        SELECT json_agg(json_build_object(
+                            'weekStart', w.weekStart,
+                            'averageWeight', ROUND(w.weightSum / NULLIF(w.weightCount, 0), 2),
+                            'averageBodyFat', ROUND(w.bodyFatSum / NULLIF(w.bodyFatCount, 0), 1)
+                        ) ORDER BY w.weekStart)
+                        FROM HealthMetricWeekly w
+                        WHERE w.userId = m.userId AND w.weekStart >= (date_trunc('week', CURRENT_DATE) - %s * INTERVAL '1 week')::date
+                    ), '[]'::json)
+                FROM Member m
+                WHERE m.userId = %s
+            """, (trendWeeks - 1, userId))
+            dashboard = cursor.fetchone()
+
+        if not dashboard:
+            return None
+
+        weight, bodyFatPercentage, achievements, routines, healthTrend = dashboard
+        return {'weightLbs': weight, 'bodyFatPercentage': bodyFatPercentage, 'achievements': achievements, 'routines': routines, 'healthTrend': healthTrend}
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Recording a weigh-in for the member at measuredAt (a datetime, now by default). Either metric may be None, but not both. The
+    # reading is appended to HealthMetric, whose trigger (migration 005) adds it to the daily and weekly rollups, and it becomes the
+    # member's current weight/body fat unless they already have readings from a later day. Returns True if the member exists.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def recordHealthMetrics(self, userId, weightLbs=None, bodyFatPercentage=None, measuredAt=None):
+        if weightLbs is None and bodyFatPercentage is None:
+            raise ServiceError("Please enter a weight or a body fat percentage.")
+        if not isValidWeight(weightLbs):
+            raise ServiceError("You have entered an invalid weight. It must be positive and under 1000 lbs.")
+        if not isValidBodyFatPercentage(bodyFatPercentage):
+            raise ServiceError("You have entered an invalid body fat percentage. It must be between 3 and 85.")
+
+        measuredAt = measuredAt or datetime.now()
+        if measuredAt.year < EARLIEST_SCHEDULE_YEAR:
+            raise ServiceError("Health metrics can only be recorded from January 1, 2022 (when the gym was opened) onwards.")
+        return self._recordReadings([(userId, measuredAt, weightLbs, bodyFatPercentage, 'manual')]) == 1
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Recording readings sent by connected scales, given as (userId, measuredAt, weightLbs, bodyFatPercentage) tuples in any number.
+    # They are sent HEALTH_METRIC_BATCH_SIZE at a time as one INSERT each, so the rollup trigger runs once per batch instead of once
+    # per reading, and only one batch is held in memory at a time. Each member's latest reading in a batch updates their current
+    # values as in recordHealthMetrics. Invalid readings and readings for members that don't exist are skipped.
+    # Returns (recorded, skipped).
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def recordHealthMetricReadings(self, readings):
+        recorded = skipped = 0
+        readings = iter(readings)
+        while True:
+            batch = list(itertools.islice(readings, HEALTH_METRIC_BATCH_SIZE))
+            if not batch:
+                return recorded, skipped
+
+            valid = [(userId, measuredAt, weightLbs, bodyFatPercentage, 'scale') for userId, measuredAt, weightLbs, bodyFatPercentage in batch
+                     if (weightLbs is not None or bodyFatPercentage is not None) and isValidWeight(weightLbs) and isValidBodyFatPercentage(bodyFatPercentage)
+                     and measuredAt.year >= EARLIEST_SCHEDULE_YEAR]
+            skipped += len(batch) - len(valid)
+            if not valid:
+                continue
+
+            count = self._recordReadings(valid)
+            recorded += count
+            skipped += len(valid) - count
+
+    # Appending (userId, measuredAt, weightLbs, bodyFatPercentage, source) readings in one statement. Returns how many were recorded.
+    # READ COMMITTED is enough here; runTransaction is used so that a deadlock with another batch updating the same members is retried.
+    def _recordReadings(self, readings):
+        self._ensureHealthMetricPartitions([reading[1] for reading in readings])
+
+        def record(cursor):
+            psycopg2.extras.execute_values(cursor, RECORD_READINGS_QUERY, readings, template="(%s::int, %s::timestamp, %s::numeric, %s::numeric, %s)", page_size=len(readings))
+            return cursor.fetchone()[0]
+
+        return runTransaction(self.connectionPool, record, psycopg2.extensions.ISOLATION_LEVEL_READ_COMMITTED)
+
+    # Making sure HealthMetric has a partition for the month of every timestamp given. The partitions are created and committed on
+    # their own first, so a reading that then fails doesn't roll them back behind _healthMetricMonths' back.
+    def _ensureHealthMetricPartitions(self, timestamps):
+        months = {datetime(timestamp.year, timestamp.month, 1) for timestamp in timestamps} - self._healthMetricMonths
+        if not months:
+            return
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT createHealthMetricPartitions(%s::date, %s::date)", (min(months), max(months)))
+            connection.commit()
+        self._healthMetricMonths.update(months)
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Returning the member's health trend from the rollups, oldest first: one (periodStart, readings, averageWeight, minWeight,
+    # maxWeight, averageBodyFat, minBodyFat, maxBodyFat) tuple for each of the last `periods` days or weeks (granularity 'day' or
+    # 'week', up to and including the one containing endDate, today by default) that has readings.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def getHealthTrend(self, userId, granularity='day', periods=30, endDate=None):
+        if granularity not in HEALTH_TREND_TABLES:
+            raise ServiceError(f"{granularity} isn't a valid trend period.")
+        # the table and column names come from HEALTH_TREND_TABLES, never user input
+        table, periodColumn = HEALTH_TREND_TABLES[granularity]
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {periodColumn}, GREATEST(weightCount, bodyFatCount),
+                    ROUND(weightSum / NULLIF(weightCount, 0), 2), weightMin, weightMax,
+                    ROUND(bodyFatSum / NULLIF(bodyFatCount, 0), 1), bodyFatMin, bodyFatMax
+                FROM {table}
+                WHERE userId = %(userId)s
+                  AND {periodColumn} BETWEEN (date_trunc(%(granularity)s, %(endDate)s::date) - %(periods)s * INTERVAL '1 {granularity}')::date AND %(endDate)s::date
+                ORDER BY {periodColumn}
+            """, {'userId': userId, 'granularity': granularity, 'periods': periods - 1, 'endDate': endDate or datetime.now().date()})
+            return cursor.fetchall()
+
+    # Returns {exerciseId: (exerciseName, exerciseDescription)} in exerciseId order
+    def listExercises(self):
+        return self.exerciseCatalog.exercises()
+
+    #-------------------------------------------------------------------------------------------------------------------------------------
+    # Creating a routine from a list of (exerciseId, numSets) pairs. The exercises are inserted with one multi-row INSERT (page_size keeps
+    # it to a single statement) in the order given, so routineExerciseId keeps that order. Returns the new routineId.
+    #-------------------------------------------------------------------------------------------------------------------------------------
+    def createRoutine(self, userId, routineName, routineDescription, routineExercises):
+        if not routineName:
+            raise ServiceError("Please enter a routine name.")
+        for exerciseId, numSets in routineExercises:
+            if exerciseId not in self.exerciseCatalog:
+                raise ServiceError(f"Exercise #{exerciseId} does not exist.")
+            if numSets < 1:
+                raise ServiceError("The number of sets must be at least 1.")
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("INSERT INTO Routine (routineName, userId, routineDescription) VALUES (%s, %s, %s) RETURNING routineId;", (routineName, userId, routineDescription))
+            routineId = cursor.fetchone()[0]
+
+            if routineExercises:
+                psycopg2.extras.execute_values(cursor, "INSERT INTO RoutineExerciseAssignment (routineId, exerciseId, numSets) VALUES %s;", [(routineId, exerciseId, numSets) for exerciseId, numSets in routineExercises], page_size=len(routineExercises))
+
+            connection.commit()
+        return routineId
+
+    #==================================================================================================================================
+    # Member schedules (classes and PT sessions)
+    #==================================================================================================================================
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Checking if the trainer has availability covering the whole time and isn't busy with a PT session or a class then. Returns
+    # (True, None) if they are free, otherwise (False, reason).
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def checkTrainerAvailability(self, trainerId, date, startTime, endTime):
+        if not self.scheduleIndex.trainerHasAvailability(trainerId, date, startTime, endTime):
+            return False, f"Trainer #{trainerId} does not have availibility at this time"
+
+        conflicts = self.scheduleIndex.trainerConflicts(trainerId, date, startTime, endTime)
+
+        overlappingClassesCount = sum(1 for conflict in conflicts if conflict[2][0] == 'class')
+        if overlappingClassesCount > 0:
+            return False, f"This is overlapping with {overlappingClassesCount} of trainer #{trainerId}'s classes"
+
+        overlappingPtSessionsCount = sum(1 for conflict in conflicts if conflict[2][0] == 'session')
+        if overlappingPtSessionsCount > 0:
+            return False, f"This is overlapping with {overlappingPtSessionsCount} of trainer #{trainerId}'s PT sessions"
+
+        return True, None
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Checking if the member isn't already taking a class or PT session at the given time. Returns (True, None) or (False, reason).
+    # With the member's context the check is made against their cached schedule.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def checkUserAvailability(self, userId, date, startTime, endTime, context=None):
+        if context is not None and context.covers(date):
+            conflicts = context.conflicts(date, startTime, endTime)
+        else:
+            conflicts = self.scheduleIndex.memberConflicts(userId, date, startTime, endTime)
+
+        overlappingClassesCount = sum(1 for conflict in conflicts if conflict[2][0] == 'class')
+        if overlappingClassesCount > 0:
+            return False, f"This is overlapping with {overlappingClassesCount} of classes that the user is taking."
+
+        overlappingPtSessionsCount = sum(1 for conflict in conflicts if conflict[2][0] == 'session')
+        if overlappingPtSessionsCount > 0:
+            return False, f"This is overlapping with {overlappingPtSessionsCount} of personal training sessions that the user is taking."
+
+        return True, None
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Returning every trainer (trainerId, fName, lName) that is available and free of classes/PT sessions at the given date/time.
+    # This does the same checks as checkTrainerAvailability but for all trainers in one query.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def findAvailableTrainers(self, date, startTime, endTime):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            findAvailableTrainersStatement.execute(cursor, (date, startTime, endTime))
+            trainerIds = [row[0] for row in cursor.fetchall()]
+
+        names = self.getTrainerNames(trainerIds)
+        return [(trainerId,) + names[trainerId] for trainerId in trainerIds if trainerId in names]
+
+    # Returns {trainerId: (fName, lName)} for the given trainers that exist, from the reference data cache
+    def getTrainerNames(self, trainerIds):
+        def loadNames(missing):
+            with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+                cursor.execute("SELECT trainerId, fName, lName FROM PersonalTrainer WHERE trainerId = ANY(%s)", (list(missing),))
+                return {trainerId: (fName, lName) for trainerId, fName, lName in cursor.fetchall()}
+
+        return self.referenceData.getMany(TRAINER_TABLE, trainerIds, loadNames)
+
+    # Returns a Page of (classId, className, trainerId, classDate, startTime, endTime) rows in date/time order, optionally limited to a date range
+    def listClasses(self, fromDate=None, toDate=None, after=None, pageSize=DEFAULT_PAGE_SIZE):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            return self.classListing.fetchPage(cursor, dateRange("classDate", fromDate, toDate), after, pageSize)
+
+    # Returns (classId, className, trainerId, classDate, startTime, endTime) or None
+    def getClass(self, classId):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT classId, className, trainerId, classDate, startTime, endTime FROM Class WHERE classId = %s", (classId,))
+            return cursor.fetchone()
+
+    # Returns (classId, className, classDate, startTime, endTime) rows for the classes the member is registered in (see also
+    # MemberContext.registeredClasses for a logged-in member's upcoming ones)
+    def listRegisteredClasses(self, userId):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            listRegisteredClassesStatement.execute(cursor, (userId,))
+            return cursor.fetchall()
+
+    # Returns (sessionId, trainer fName, trainer lName, sessionDate, startTime, endTime) rows for the member's PT sessions
+    def listPtSessions(self, userId):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            listPtSessionsStatement.execute(cursor, (userId,))
+            return cursor.fetchall()
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Registering the member for a class if it exists and doesn't clash with their schedule. A seat is taken with one conditional
+    # UPDATE of the class's seat counter, which row-locks only that class until commit, so concurrent registrations queue on the lock
+    # for a few milliseconds instead of overbooking. If the class is full the member joins its waitlist instead. The schedule index (or
+    # the member's context) turns away obvious clashes up front, and the member's classes and PT sessions are checked again in the
+    # database inside the registration transaction, since no constraint covers those overlaps and the in-memory copies can be stale.
+    # Returns (class row, waitlist position), where the position is None if the member got a seat. The member's context, if given, is
+    # used for the first conflict check and updated with the new registration or waitlist entry.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def registerForClass(self, userId, classId, context=None):
+        classFromDb = self.getClass(classId)
+        if not classFromDb:
+            raise ServiceError("Invalid class ID. Class not found.")
+
+        available, reason = self.checkUserAvailability(userId, classFromDb[3], classFromDb[4], classFromDb[5], context)
+        if not available:
+            raise ServiceError(reason)
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            try:
+                reason = self._memberConflict(cursor, userId, classFromDb[3], classFromDb[4], classFromDb[5])
+                if reason:
+                    raise ServiceError(reason)
+
+                cursor.execute("UPDATE Class SET registeredCount = registeredCount + 1 WHERE classId = %s AND registeredCount < capacity RETURNING classId", (classId,))
+                gotSeat = cursor.fetchone() is not None
+
+                if not gotSeat:
+                    # Locking the class and checking again, since a seat may have been freed since the UPDATE above. Deregistrations take
+                    # the same lock while promoting from the waitlist, so nobody who could take a free seat is left waiting.
+                    cursor.execute("SELECT registeredCount < capacity FROM Class WHERE classId = %s FOR UPDATE", (classId,))
+                    gotSeat = cursor.fetchone()[0]
+                    if gotSeat:
+                        cursor.execute("UPDATE Class SET registeredCount = registeredCount + 1 WHERE classId = %s", (classId,))
+
+                if gotSeat:
+                    # Registering and dropping any waitlist entry the member still has for the class in one statement
+                    cursor.execute("""
+                        WITH registered AS (
+                            INSERT INTO MemberTakesClass (userId, classId) VALUES (%s, %s) RETURNING userId, classId
+                        )
+                        DELETE FROM ClassWaitlist USING registered
+                        WHERE ClassWaitlist.userId = registered.userId AND ClassWaitlist.classId = registered.classId
+                    """, (userId, classId))
+                    connection.commit()
+                    waitlistPosition = None
+                else:
+                    waitlistPosition = self._joinWaitlist(cursor, userId, classId)
+                    connection.commit()
+            except psycopg2.errors.UniqueViolation:
+                connection.rollback()
+                if context is not None:
+                    context.invalidate()
+                raise ServiceError("You are already registered in this class.")
+            except ServiceError:
+                connection.rollback()
+                if context is not None:
+                    context.invalidate()
+                raise
+
+        if waitlistPosition is None:
+            self.scheduleIndex.addInterval(MEMBER_BUSY, userId, classFromDb[3], classFromDb[4], classFromDb[5], ('class', classFromDb[0]))
+            if context is not None:
+                context.addClass(classFromDb[0], classFromDb[1], classFromDb[3], classFromDb[4], classFromDb[5])
+        elif context is not None:
+            context.addWaitlisted(classFromDb[0], classFromDb[1], classFromDb[3], classFromDb[4], classFromDb[5], waitlistPosition)
+        return classFromDb, waitlistPosition
+
+    # Adding the member to the end of the (locked) class's waitlist. Returns their 1-based position.
+    def _joinWaitlist(self, cursor, userId, classId):
+        cursor.execute("""
+            INSERT INTO ClassWaitlist (classId, userId)
+            SELECT %(classId)s, %(userId)s
+            WHERE NOT EXISTS (SELECT 1 FROM MemberTakesClass WHERE classId = %(classId)s AND userId = %(userId)s)
+            ON CONFLICT (classId, userId) DO NOTHING
+            RETURNING (SELECT COUNT(*) + 1 FROM ClassWaitlist WHERE classId = %(classId)s)
+        """, {'classId': classId, 'userId': userId})
+        joined = cursor.fetchone()
+        if joined:
+            return joined[0]
+
+        cursor.execute("SELECT 1 FROM MemberTakesClass WHERE classId = %s AND userId = %s", (classId, userId))
+        if cursor.fetchone():
+            raise ServiceError("You are already registered in this class.")
+        raise ServiceError("This class is full and you are already on its waitlist.")
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Deregistering the member from a class (or taking them off its waitlist). Freeing a seat moves the longest waiting member who is
+    # free at the class's time into it, in the same transaction while the class row is still locked. Members who have a clash keep their
+    # place on the waitlist. Returns the promoted member's userId, or None. The member's context, if given, is updated.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def deregisterFromClass(self, userId, classId, context=None):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                WITH removed AS (
+                    DELETE FROM MemberTakesClass WHERE userId = %s AND classId = %s RETURNING classId
+                )
+                UPDATE Class SET registeredCount = registeredCount - 1
+                FROM removed
+                WHERE Class.classId = removed.classId
+                RETURNING Class.classId, Class.classDate, Class.startTime, Class.endTime
+            """, (userId, classId))
+            classFromDb = cursor.fetchone()
+
+            if not classFromDb:
+                cursor.execute("DELETE FROM ClassWaitlist WHERE userId = %s AND classId = %s RETURNING classId", (userId, classId))
+                removed = cursor.fetchone()
+                if not removed:
+                    connection.rollback()
+                    raise ServiceError("Invalid class ID. Class not found.")
+                connection.commit()
+                if context is not None:
+                    context.removeClass(removed[0])
+                return None
+
+            promoted = self._promoteFromWaitlist(cursor, classFromDb[0])
+            connection.commit()
+
+        self.scheduleIndex.removeInterval(MEMBER_BUSY, userId, classFromDb[1], ('class', classFromDb[0]))
+        if context is not None:
+            context.removeClass(classFromDb[0])
+        if promoted is not None:
+            self.scheduleIndex.addInterval(MEMBER_BUSY, promoted, classFromDb[1], classFromDb[2], classFromDb[3], ('class', classFromDb[0]))
+        return promoted
+
+    # Registering the first member on the (locked) class's waitlist who isn't already in the class or in another class or PT session at
+    # its time, and only then taking them off the waitlist, all in one statement. Returns their userId, or None if nobody waiting can.
+    def _promoteFromWaitlist(self, cursor, classId):
+        cursor.execute("""
+            WITH nextInLine AS (
+                SELECT ClassWaitlist.waitlistId, ClassWaitlist.userId
+                FROM ClassWaitlist JOIN Class ON ClassWaitlist.classId = Class.classId
+                WHERE ClassWaitlist.classId = %(classId)s
+                  AND NOT EXISTS (
+                      SELECT 1 FROM MemberTakesClass JOIN Class taken ON MemberTakesClass.classId = taken.classId
+                      WHERE MemberTakesClass.userId = ClassWaitlist.userId AND taken.classDate = Class.classDate AND taken.classSlot && Class.classSlot
+                  )
+                  AND NOT EXISTS (
+                      SELECT 1 FROM PersonalTrainingSession
+                      WHERE PersonalTrainingSession.userId = ClassWaitlist.userId AND sessionDate = Class.classDate AND sessionSlot && Class.classSlot
+                  )
+                ORDER BY ClassWaitlist.waitlistId
+                LIMIT 1
+            ),
+            promoted AS (
+                INSERT INTO MemberTakesClass (userId, classId)
+                SELECT userId, %(classId)s FROM nextInLine
+                RETURNING userId
+            ),
+            leftWaitlist AS (
+                DELETE FROM ClassWaitlist USING nextInLine, promoted
+                WHERE ClassWaitlist.waitlistId = nextInLine.waitlistId
+            )
+            UPDATE Class SET registeredCount = registeredCount + 1
+            FROM promoted
+            WHERE Class.classId = %(classId)s
+            RETURNING promoted.userId
+        """, {'classId': classId})
+        promoted = cursor.fetchone()
+        return promoted[0] if promoted else None
+
+    # Returns (classId, className, classDate, startTime, endTime, waitlist position) rows for the classes the member is waiting on (see
+    # also MemberContext.waitlistedClasses)
+    def listWaitlistedClasses(self, userId):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT Class.classId, Class.className, Class.classDate, Class.startTime, Class.endTime,
+                       (SELECT COUNT(*) FROM ClassWaitlist ahead WHERE ahead.classId = ClassWaitlist.classId AND ahead.waitlistId <= ClassWaitlist.waitlistId)
+                FROM ClassWaitlist JOIN Class ON ClassWaitlist.classId = Class.classId
+                WHERE ClassWaitlist.userId = %s
+                ORDER BY Class.classDate ASC
+            """, (userId,))
+            return cursor.fetchall()
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Booking a PT session with the given trainer. The in-memory schedule index turns away obvious conflicts without a transaction;
+    # the booking itself re-checks the trainer and member inside a serializable transaction (see Transactions.py), so a class or PT
+    # session booked concurrently by someone else either shows up in the check or forces a retry. Sessions have to start after `now`
+    # (the current time by default). Returns the new sessionId. The member's context, if given, is used for the first member check and
+    # updated with the session.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def bookPtSession(self, userId, trainerId, sessionDate, startTime, endTime, context=None, now=None):
+        requireScheduleSlot(sessionDate, startTime, endTime)
+        if datetime.strptime(f"{sessionDate} {startTime}", "%Y-%m-%d %H:%M") <= (now or datetime.now()):
+            raise ServiceError("This time has already passed. Please choose a later time.")
+
+        available, reason = self.checkUserAvailability(userId, sessionDate, startTime, endTime, context)
+        if not available:
+            raise ServiceError("You already have a booking in this timeframe. Please choose another time.")
+
+        available, reason = self.checkTrainerAvailability(trainerId, sessionDate, startTime, endTime)
+        if not available:
+            raise ServiceError(reason)
+
+        def book(cursor):
+            if self._memberConflict(cursor, userId, sessionDate, startTime, endTime):
+                raise ServiceError("You already have a booking in this timeframe. Please choose another time.")
+            reason = self._trainerConflict(cursor, trainerId, sessionDate, startTime, endTime)
+            if reason:
+                raise ServiceError(reason)
+
+            # Returning the trainer's name along with the new session for the member's context
+            try:
+                cursor.execute("""
+                    WITH booked AS (
+                        INSERT INTO PersonalTrainingSession (userId, trainerId, sessionDate, startTime, endTime) VALUES (%s, %s, %s, %s, %s) RETURNING sessionId, trainerId
+                    )
+                    SELECT booked.sessionId, PersonalTrainer.fName, PersonalTrainer.lName FROM booked JOIN PersonalTrainer ON booked.trainerId = PersonalTrainer.trainerId
+                """, (userId, trainerId, sessionDate, startTime, endTime))
+            except psycopg2.errors.ExclusionViolation as err:
+                if err.diag.constraint_name == 'personaltrainingsession_member_no_overlap':
+                    raise ServiceError("You already have a booking in this timeframe. Please choose another time.")
+                raise ServiceError("No trainers are available at the requested time.")
+            return cursor.fetchone()
+
+        try:
+            sessionId, trainerFName, trainerLName = runTransaction(self.connectionPool, book)
+        except ServiceError:
+            # The member may have booked something in another session since their context was loaded
+            if context is not None:
+                context.invalidate()
+            raise
+
+        self.scheduleIndex.addInterval(TRAINER_BUSY, trainerId, sessionDate, startTime, endTime, ('session', sessionId))
+        self.scheduleIndex.addInterval(MEMBER_BUSY, userId, sessionDate, startTime, endTime, ('session', sessionId))
+        if context is not None:
+            context.addSession(sessionId, trainerFName, trainerLName, sessionDate, startTime, endTime)
+        return sessionId
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Finding the earliest `limit` free PT session slots of `durationMinutes` between fromDate and toDate, optionally only with one
+    # trainer. A slot is free when it lies inside one of the trainer's availability windows and touches none of the trainer's or the
+    # member's classes and PT sessions. Everything for the date range is fetched in one query and the free time of each trainer and
+    # day is found with a sweep over the sorted intervals (see SlotFinder.py), so a 30 day search across all trainers is one round trip.
+    # Slots start on the quarter hour and each free gap offers its earliest start. Only slots starting after `now` (the current time by
+    # default) are offered, so today's windows are cut off at the current minute and earlier days are skipped. Returns (date, startTime,
+    # endTime, trainerId, trainer fName, trainer lName) tuples in time order; the times are 'HH:MM' strings ready to pass to bookPtSession.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def findNextPtSlots(self, userId, durationMinutes, fromDate, toDate, trainerId=None, limit=5, now=None):
+        requireScheduleSlot(fromDate, "00:00", "00:01")
+        requireScheduleSlot(toDate, "00:00", "00:01")
+        days = (datetime.strptime(toDate, "%Y-%m-%d") - datetime.strptime(fromDate, "%Y-%m-%d")).days
+        if days < 0 or days >= MAX_SLOT_SEARCH_DAYS:
+            raise ServiceError(f"Please search a range of 1 to {MAX_SLOT_SEARCH_DAYS} days.")
+        if not 1 <= durationMinutes <= 24 * 60:
+            raise ServiceError("Please enter a session length in minutes.")
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT 'available', trainerId, availabilityDate, startTime, endTime
+                FROM TrainerAvailability
+                WHERE availabilityDate BETWEEN %(fromDate)s AND %(toDate)s AND (%(trainerId)s::int IS NULL OR trainerId = %(trainerId)s::int)
+                UNION ALL
+                SELECT 'trainer', trainerId, classDate, startTime, endTime
+                FROM Class
+                WHERE classDate BETWEEN %(fromDate)s AND %(toDate)s AND (%(trainerId)s::int IS NULL OR trainerId = %(trainerId)s::int)
+                UNION ALL
+                SELECT 'trainer', trainerId, sessionDate, startTime, endTime
+                FROM PersonalTrainingSession
+                WHERE sessionDate BETWEEN %(fromDate)s AND %(toDate)s AND (%(trainerId)s::int IS NULL OR trainerId = %(trainerId)s::int)
+                UNION ALL
+                SELECT 'member', NULL, Class.classDate, Class.startTime, Class.endTime
+                FROM MemberTakesClass JOIN Class ON MemberTakesClass.classId = Class.classId
+                WHERE MemberTakesClass.userId = %(userId)s AND Class.classDate BETWEEN %(fromDate)s AND %(toDate)s
+                UNION ALL
+                SELECT 'member', NULL, sessionDate, startTime, endTime
+                FROM PersonalTrainingSession
+                WHERE userId = %(userId)s AND sessionDate BETWEEN %(fromDate)s AND %(toDate)s
+            """, {'userId': userId, 'trainerId': trainerId, 'fromDate': fromDate, 'toDate': toDate})
+            rows = cursor.fetchall()
+
+        # Grouping the intervals by day: availability windows (from the minute after now, today) and busy times per trainer, and the
+        # member's busy times
+        now = now or datetime.now()
+        windows, trainerBusy, memberBusy = {}, {}, {}
+        for kind, rowTrainerId, day, startTime, endTime in rows:
+            interval = (toMinutes(startTime), toMinutes(endTime))
+            if kind == 'available':
+                if day < now.date() or (day == now.date() and interval[1] <= toMinutes(now)):
+                    continue
+                if day == now.date():
+                    interval = (max(interval[0], toMinutes(now) + 1), interval[1])
+                windows.setdefault(day, {}).setdefault(rowTrainerId, []).append(interval)
+            elif kind == 'trainer':
+                trainerBusy.setdefault((day, rowTrainerId), []).append(interval)
+            else:
+                memberBusy.setdefault(day, []).append(interval)
+
+        slots = []
+        for day in sorted(windows):
+            daySlots = []
+            for dayTrainerId, trainerWindows in windows[day].items():
+                busy = trainerBusy.get((day, dayTrainerId), []) + memberBusy.get(day, [])
+                for start, end in freeSlots(trainerWindows, busy, durationMinutes):
+                    daySlots.append((start, dayTrainerId, end))
+
+            # Days are visited in order, so the first `limit` slots found are the earliest ones
+            for start, dayTrainerId, end in sorted(daySlots)[:limit - len(slots)]:
+                slots.append((day, fromMinutes(start).strftime("%H:%M"), fromMinutes(end).strftime("%H:%M"), dayTrainerId))
+            if len(slots) >= limit:
+                break
+
+        trainerNames = self.getTrainerNames({slot[3] for slot in slots})
+        return [slot + trainerNames.get(slot[3], (None, None)) for slot in slots]
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Conflict checks run inside a booking transaction. Each returns a reason the slot can't be booked, or None if it's free.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def _trainerConflict(self, cursor, trainerId, date, startTime, endTime):
+        cursor.execute("""
+            SELECT
+                EXISTS (
+                    SELECT 1 FROM TrainerAvailability
+                    WHERE trainerId = %(trainerId)s AND availabilityDate = %(date)s AND startTime <= %(startTime)s AND endTime >= %(endTime)s
+                ),
+                (SELECT COUNT(*) FROM Class WHERE trainerId = %(trainerId)s AND classDate = %(date)s AND classSlot && tsrange(%(date)s::date + %(startTime)s::time, %(date)s::date + %(endTime)s::time, '[]')),
+                (SELECT COUNT(*) FROM PersonalTrainingSession WHERE trainerId = %(trainerId)s AND sessionDate = %(date)s AND sessionSlot && tsrange(%(date)s::date + %(startTime)s::time, %(date)s::date + %(endTime)s::time, '[]'))
+        """, {'trainerId': trainerId, 'date': date, 'startTime': startTime, 'endTime': endTime})
+        hasAvailability, overlappingClassesCount, overlappingPtSessionsCount = cursor.fetchone()
+
+        if not hasAvailability:
+            return f"Trainer #{trainerId} does not have availibility at this time"
+        if overlappingClassesCount > 0:
+            return f"This is overlapping with {overlappingClassesCount} of trainer #{trainerId}'s classes"
+        if overlappingPtSessionsCount > 0:
+            return f"This is overlapping with {overlappingPtSessionsCount} of trainer #{trainerId}'s PT sessions"
+        return None
+
+    def _memberConflict(self, cursor, userId, date, startTime, endTime):
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM MemberTakesClass JOIN Class ON MemberTakesClass.classId = Class.classId
+                 WHERE MemberTakesClass.userId = %(userId)s AND Class.classDate = %(date)s AND Class.classSlot && tsrange(%(date)s::date + %(startTime)s::time, %(date)s::date + %(endTime)s::time, '[]')),
+                (SELECT COUNT(*) FROM PersonalTrainingSession WHERE userId = %(userId)s AND sessionDate = %(date)s AND sessionSlot && tsrange(%(date)s::date + %(startTime)s::time, %(date)s::date + %(endTime)s::time, '[]'))
+        """, {'userId': userId, 'date': date, 'startTime': startTime, 'endTime': endTime})
+        overlappingClassesCount, overlappingPtSessionsCount = cursor.fetchone()
+
+        if overlappingClassesCount > 0:
+            return f"This is overlapping with {overlappingClassesCount} of classes that the user is taking."
+        if overlappingPtSessionsCount > 0:
+            return f"This is overlapping with {overlappingPtSessionsCount} of personal training sessions that the user is taking."
+        return None
+
+    # Cancelling one of the member's PT sessions, updating their context if given
+    def cancelPtSession(self, userId, sessionId, context=None):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("DELETE FROM PersonalTrainingSession WHERE userId = %s AND sessionId = %s RETURNING sessionId, trainerId, sessionDate", (userId, sessionId))
+            session = cursor.fetchone()
+
+            if not session:
+                raise ServiceError("Invalid Personal Training Session ID. Session not found.")
+            connection.commit()
+
+        self.scheduleIndex.removeInterval(TRAINER_BUSY, session[1], session[2], ('session', session[0]))
+        self.scheduleIndex.removeInterval(MEMBER_BUSY, userId, session[2], ('session', session[0]))
+        if context is not None:
+            context.removeSession(session[0])
+
+    #==================================================================================================================================
+    # Trainers
+    #==================================================================================================================================
+
+    # Returns (availibilityId, startTime, endTime) rows for the trainer on that date
+    def getAvailability(self, trainerId, date):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            getAvailabilityStatement.execute(cursor, (trainerId, date))
+            return cursor.fetchall()
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Adding an availability window for the trainer. The traineravailability_no_overlap exclusion constraint rejects it if it overlaps
+    # with one they've already set. Returns the new availibilityId.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def setAvailability(self, trainerId, availabilityDate, startTime, endTime):
+        requireScheduleSlot(availabilityDate, startTime, endTime)
+
+        def insertAvailability(cursor):
+            try:
+                cursor.execute("INSERT INTO TrainerAvailability (trainerId, availabilityDate, startTime, endTime) VALUES (%s, %s, %s, %s) RETURNING availibilityId;", (trainerId, availabilityDate, startTime, endTime))
+            except psycopg2.errors.ExclusionViolation:
+                raise ServiceError("Your availability overlaps with an existing availability that you've already set. Please choose a different time range.")
+            return cursor.fetchone()[0]
+
+        availabilityId = runTransaction(self.connectionPool, insertAvailability)
+
+        self.scheduleIndex.addInterval(TRAINER_AVAILABLE, trainerId, availabilityDate, startTime, endTime, ('availability', availabilityId))
+        return availabilityId
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Setting the same availability window on the given weekdays (ISODOW numbers) of every week from fromDate to toDate. The series is
+    # expanded with generate_series and checked against the trainer's existing availability and inserted in a single statement.
+    # By default nothing is inserted if any date conflicts; with skipConflicts the free dates are still set.
+    # Returns (created, conflicts): lists of (date, availibilityId) and (date, reason).
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def setRecurringAvailability(self, trainerId, weekdays, fromDate, toDate, startTime, endTime, skipConflicts=False):
+        requireRecurrence(weekdays, fromDate, toDate, startTime, endTime)
+
+        def insertSeries(cursor):
+            try:
+                cursor.execute("""
+                    WITH series AS (
+                        SELECT day::date AS day
+                        FROM generate_series(%(fromDate)s::date, %(toDate)s::date, interval '1 day') AS day
+                        WHERE EXTRACT(ISODOW FROM day)::int = ANY(%(weekdays)s)
+                    ),
+                    checked AS (
+                        SELECT day, CASE WHEN EXISTS (
+                            SELECT 1 FROM TrainerAvailability
+                            WHERE trainerId = %(trainerId)s AND availabilityDate = day AND availabilitySlot && tsrange(day + %(startTime)s::time, day + %(endTime)s::time, '[]')
+                        ) THEN 'overlaps availability you have already set' END AS conflict
+                        FROM series
+                    ),
+                    inserted AS (
+                        INSERT INTO TrainerAvailability (trainerId, availabilityDate, startTime, endTime)
+                        SELECT %(trainerId)s, day, %(startTime)s::time, %(endTime)s::time
+                        FROM checked
+                        WHERE conflict IS NULL AND (%(skipConflicts)s OR NOT EXISTS (SELECT 1 FROM checked WHERE conflict IS NOT NULL))
+                        RETURNING availibilityId, availabilityDate
+                    )
+                    SELECT checked.day, inserted.availibilityId, checked.conflict
+                    FROM checked LEFT JOIN inserted ON inserted.availabilityDate = checked.day
+                    ORDER BY checked.day
+                """, {'trainerId': trainerId, 'weekdays': list(weekdays), 'fromDate': fromDate, 'toDate': toDate, 'startTime': startTime, 'endTime': endTime, 'skipConflicts': skipConflicts})
+            except psycopg2.errors.ExclusionViolation:
+                raise ServiceError("Some of these dates were just booked by someone else. Please try again.")
+            return cursor.fetchall()
+
+        created, conflicts = self._seriesReport(runTransaction(self.connectionPool, insertSeries))
+        for day, availabilityId in created:
+            self.scheduleIndex.addInterval(TRAINER_AVAILABLE, trainerId, day, startTime, endTime, ('availability', availabilityId))
+        return created, conflicts
+
+    # Splitting (day, new id or None, conflict or None) rows into the created and conflicting dates
+    def _seriesReport(self, rows):
+        created = [(day, newId) for day, newId, conflict in rows if newId is not None]
+        conflicts = [(day, conflict) for day, newId, conflict in rows if conflict is not None]
+        return created, conflicts
+
+    #-------------------------------------------------------------------------------------------------------------------------------------
+    # Searching members by name. Partial names are allowed: members whose names start with what was typed are matched, as are close
+    # misspellings (pg_trgm similarity, see migration 003). Exact matches come first, then prefix matches, then the rest by similarity,
+    # capped at memberSearchLimit results. The matched members' achievements are fetched together in a second query.
+    # Returns a list of (member, achievements) pairs where member is (userId, fName, lName, email, dateOfBirth, phoneNumber, weightLbs,
+    # bodyFatPercentage) and achievements is a list of (achievementName, achievementDescription, dateAchieved).
+    #-------------------------------------------------------------------------------------------------------------------------------------
+    def searchMembers(self, fName, lName):
+        fName, lName = fName.strip(), lName.strip()
+        fullName = f"{fName} {lName}".strip()
+
+        # Escaping LIKE wildcards so a name containing % or _ is matched literally
+        def escapeLike(text):
+            return text.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT userId, fName, lName, email, dateOfBirth, phoneNumber, weightLbs, bodyFatPercentage
+                FROM Member
+                WHERE (LOWER(fName) LIKE %(fNamePrefix)s AND LOWER(lName) LIKE %(lNamePrefix)s)
+                   OR LOWER(fName || ' ' || lName) %% LOWER(%(fullName)s)
+                ORDER BY (LOWER(fName) = LOWER(%(fName)s) AND LOWER(lName) = LOWER(%(lName)s)) DESC,
+                         (LOWER(fName) LIKE %(fNamePrefix)s AND LOWER(lName) LIKE %(lNamePrefix)s) DESC,
+                         similarity(LOWER(fName || ' ' || lName), LOWER(%(fullName)s)) DESC,
+                         userId
+                LIMIT %(limit)s
+            """, {'fName': fName, 'lName': lName, 'fullName': fullName, 'fNamePrefix': escapeLike(fName) + '%', 'lNamePrefix': escapeLike(lName) + '%', 'limit': self.memberSearchLimit})
+            members = cursor.fetchall()
+
+            if not members:
+                return []
+
+            cursor.execute("""
+                SELECT userId, achievementName, achievementDescription, dateAchieved
+                FROM Achievement
+                WHERE userId = ANY(%s)
+                ORDER BY userId, achievementId;
+            """, ([member[0] for member in members],))
+            achievementsByMember = {}
+            for achievement in cursor.fetchall():
+                achievementsByMember.setdefault(achievement[0], []).append(achievement[1:])
+
+        return [(member, achievementsByMember.get(member[0], [])) for member in members]
+
+    #==================================================================================================================================
+    # Staff: rooms, equipment, payments and classes
+    #==================================================================================================================================
+
+    # Returns (roomNumber, roomName) rows
+    def listRooms(self):
+        def loadRooms():
+            with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+                cursor.execute("SELECT roomNumber, roomName FROM Room ORDER BY roomNumber")
+                return tuple(cursor.fetchall())
+
+        return self.referenceData.get(ROOM, 'all', loadRooms)
+
+    # Returns (roomNumber, roomName) or None
+    def getRoom(self, roomNumber):
+        roomNumber = referenceKey(roomNumber)
+        if roomNumber is None:
+            return None
+
+        def loadRoom():
+            with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+                cursor.execute("SELECT roomNumber, roomName FROM Room WHERE roomNumber = %s", (roomNumber,))
+                return cursor.fetchone()
+
+        return self.referenceData.get(ROOM, roomNumber, loadRoom)
+
+    # Returns (roomBookingId, startTime, endTime) rows for the room on that date
+    def getRoomBookings(self, roomNumber, date):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            getRoomBookingsStatement.execute(cursor, (roomNumber, date))
+            return cursor.fetchall()
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Building the free/busy grid of every room for every date from fromDate to toDate (within opening hours) from one query that
+    # walks RoomBookings in room, date and start order. A second pass finds each room and day's free gaps with freeGaps, merging
+    # overlapping bookings as it goes. Returns {roomNumber: {'roomName': ..., 'days': {date: {'busy': [(roomBookingId, startTime, endTime)],
+    # 'free': [(startTime, endTime)]}}}} in room order. A gap is bounded by the end of the booking before it and the start of the one
+    # after it (or opening/closing time); bookings are inclusive (see migration 001), so fitsGap decides whether a booking may touch them.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def getRoomGrid(self, fromDate, toDate):
+        requireScheduleSlot(fromDate, GYM_OPENING_TIME, GYM_CLOSING_TIME)
+        requireScheduleSlot(toDate, GYM_OPENING_TIME, GYM_CLOSING_TIME)
+        firstDay, lastDay = datetime.strptime(fromDate, "%Y-%m-%d").date(), datetime.strptime(toDate, "%Y-%m-%d").date()
+        if not 0 <= (lastDay - firstDay).days < MAX_ROOM_GRID_DAYS:
+            raise ServiceError(f"Please choose a range of 1 to {MAX_ROOM_GRID_DAYS} days.")
+        days = [firstDay + timedelta(days=offset) for offset in range((lastDay - firstDay).days + 1)]
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT Room.roomNumber, Room.roomName, RoomBookings.bookingDate, RoomBookings.roomBookingId, RoomBookings.startTime, RoomBookings.endTime
+                FROM Room LEFT JOIN RoomBookings ON RoomBookings.roomNumber = Room.roomNumber AND RoomBookings.bookingDate BETWEEN %s AND %s
+                ORDER BY Room.roomNumber, RoomBookings.bookingDate, RoomBookings.startTime
+            """, (fromDate, toDate))
+            rows = cursor.fetchall()
+
+        dayStart, dayEnd = toMinutes(datetime.strptime(GYM_OPENING_TIME, "%H:%M")), toMinutes(datetime.strptime(GYM_CLOSING_TIME, "%H:%M"))
+        grid = {}
+        for roomNumber, roomName, bookingDate, roomBookingId, startTime, endTime in rows:
+            room = grid.get(roomNumber)
+            if room is None:
+                room = grid[roomNumber] = {'roomName': roomName, 'days': {day: {'busy': [], 'free': None} for day in days}}
+            if roomBookingId is not None:
+                room['days'][bookingDate]['busy'].append((roomBookingId, startTime, endTime))
+
+        for room in grid.values():
+            for day in room['days'].values():
+                busy = [(toMinutes(startTime), toMinutes(endTime)) for _, startTime, endTime in day['busy']]
+                day['free'] = [(fromMinutes(start), fromMinutes(end)) for start, end in freeGaps(busy, dayStart, dayEnd)]
+        return grid
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Finding the first room that is free from startTime to endTime on any of the given weekdays (ISODOW numbers, all days if None)
+    # between fromDate and toDate, e.g. the first room free 17:00-18:00 on a weekday next week. Returns (date, roomNumber, roomName)
+    # or None.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def findFreeRoom(self, fromDate, toDate, startTime, endTime, weekdays=None):
+        requireScheduleSlot(fromDate, startTime, endTime)
+        grid = self.getRoomGrid(fromDate, toDate)
+
+        dayStart, dayEnd = toMinutes(datetime.strptime(GYM_OPENING_TIME, "%H:%M")), toMinutes(datetime.strptime(GYM_CLOSING_TIME, "%H:%M"))
+        start, end = toMinutes(datetime.strptime(startTime, "%H:%M")), toMinutes(datetime.strptime(endTime, "%H:%M"))
+        if not dayStart <= start < end <= dayEnd:
+            raise ServiceError(f"Rooms can only be booked between {GYM_OPENING_TIME} and {GYM_CLOSING_TIME}.")
+
+        days = sorted({day for room in grid.values() for day in room['days']})
+        for day in days:
+            if weekdays and day.isoweekday() not in weekdays:
+                continue
+            for roomNumber, room in grid.items():
+                busy = [(toMinutes(busyStart), toMinutes(busyEnd)) for _, busyStart, busyEnd in room['days'][day]['busy']]
+                if any(fitsGap((toMinutes(gapStart), toMinutes(gapEnd)), start, end, busy) for gapStart, gapEnd in room['days'][day]['free']):
+                    return day, roomNumber, room['roomName']
+        return None
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Booking a room. The roombookings_no_overlap exclusion constraint rejects it if it overlaps with an existing booking for the room.
+    # Returns the new roomBookingId.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def createRoomBooking(self, staffId, roomNumber, bookingDate, startTime, endTime):
+        requireScheduleSlot(bookingDate, startTime, endTime)
+        if not self.getRoom(roomNumber):
+            raise ServiceError("Room not found.")
+
+        def insertBooking(cursor):
+            try:
+                cursor.execute("INSERT INTO RoomBookings (roomNumber, bookingDate, startTime, endTime, bookingStaffId) VALUES (%s, %s, %s, %s, %s) RETURNING roomBookingId;", (roomNumber, bookingDate, startTime, endTime, staffId))
+            except psycopg2.errors.ExclusionViolation:
+                raise ServiceError("Your availability overlaps with an existing booking that for this room/date. Please choose a different date.")
+            return cursor.fetchone()[0]
+
+        roomBookingId = runTransaction(self.connectionPool, insertBooking)
+
+        self.scheduleIndex.addInterval(ROOM_BOOKED, roomNumber, bookingDate, startTime, endTime, ('booking', roomBookingId))
+        return roomBookingId
+
+    # Returns the removed booking as (roomBookingId, roomNumber, bookingDate)
+    def removeRoomBooking(self, roomBookingId):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("DELETE FROM RoomBookings WHERE roomBookingId = %s RETURNING roomBookingId, roomNumber, bookingDate", (roomBookingId,))
+            existingBooking = cursor.fetchone()
+
+            if not existingBooking:
+                raise ServiceError("Room booking does not exist.")
+            connection.commit()
+
+        self.scheduleIndex.removeInterval(ROOM_BOOKED, existingBooking[1], existingBooking[2], ('booking', existingBooking[0]))
+        return existingBooking
+
+    # Returns (equipmentId, equipmentName, underMaintenance) rows
+    def listEquipment(self):
+        def loadEquipment():
+            with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+                cursor.execute("SELECT equipmentId, equipmentName, underMaintenance FROM Equipment ORDER BY equipmentId")
+                return tuple(cursor.fetchall())
+
+        return self.referenceData.get(EQUIPMENT, 'all', loadEquipment)
+
+    # Returns (equipmentId, equipmentName, underMaintenance) or None
+    def getEquipment(self, equipmentId):
+        equipmentId = referenceKey(equipmentId)
+        if equipmentId is None:
+            return None
+
+        def loadOne():
+            with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+                cursor.execute("SELECT equipmentId, equipmentName, underMaintenance FROM Equipment WHERE equipmentId = %s", (equipmentId,))
+                return cursor.fetchone()
+
+        return self.referenceData.get(EQUIPMENT, equipmentId, loadOne)
+
+    # Returns (maintenanceId, maintenanceCompletionDate) rows, the open maintenance first
+    def getMaintenanceHistory(self, equipmentId):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT maintenanceId, maintenanceCompletionDate FROM EquipmentMaintenance WHERE equipmentId = %s ORDER BY maintenanceCompletionDate DESC NULLS FIRST", (equipmentId,))
+            return cursor.fetchall()
+
+    #--------------------------------------------------------------------------------------------------------------------------------
+    # Marking equipment as under maintenance and opening a maintenance record for it, in one transaction. The UPDATE only matches
+    # equipment that isn't already under maintenance, so two staff members can't open two records for the same equipment.
+    #--------------------------------------------------------------------------------------------------------------------------------
+    def startMaintenance(self, equipmentId):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("UPDATE Equipment SET underMaintenance = TRUE WHERE equipmentId = %s AND underMaintenance IS NOT TRUE", (equipmentId,))
+            if cursor.rowcount == 0:
+                connection.rollback()
+                if not self.getEquipment(equipmentId):
+                    raise ServiceError(f"No equipment found with ID #{equipmentId}.")
+                raise ServiceError("Equipment is already under maintenance.")
+
+            cursor.execute("INSERT INTO EquipmentMaintenance (equipmentId) VALUES (%s)", (equipmentId,))
+            connection.commit()
+        self.referenceData.invalidate(EQUIPMENT)
+
+    def completeMaintenance(self, equipmentId):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("UPDATE Equipment SET underMaintenance = FALSE WHERE equipmentId = %s AND underMaintenance", (equipmentId,))
+            if cursor.rowcount == 0:
+                connection.rollback()
+                if not self.getEquipment(equipmentId):
+                    raise ServiceError(f"No equipment found with ID #{equipmentId}.")
+                raise ServiceError("Equipment is not currently under maintenance.")
+
+            cursor.execute("UPDATE EquipmentMaintenance SET maintenanceCompletionDate = CURRENT_TIMESTAMP WHERE equipmentId = %s AND maintenanceCompletionDate IS NULL", (equipmentId,))
+            connection.commit()
+        self.referenceData.invalidate(EQUIPMENT)
+
+    # Returns a Page of (userId, fName, lName) rows in userId order
+    def listMembers(self, after=None, pageSize=DEFAULT_PAGE_SIZE):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            return self.memberListing.fetchPage(cursor, after=after, pageSize=pageSize)
+
+    # Returns a Page of (billNumber, memberId, paymentAmount, statusUpdateDate) rows with the given status in billNumber order
+    def listBills(self, paymentStatus, after=None, pageSize=DEFAULT_PAGE_SIZE):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            return self.billListing.fetchPage(cursor, [equals("paymentStatus", paymentStatus)], after, pageSize)
+
+    # Creating a bill awaiting payment for the member. Returns the new billNumber.
+    def createBill(self, memberId, paymentAmount):
+        if paymentAmount <= 0:
+            raise ServiceError("The payment amount must be positive.")
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            try:
+                cursor.execute("INSERT INTO Payment (memberId, paymentAmount, paymentStatus, statusUpdateDate) VALUES (%s, %s, %s, %s) RETURNING billNumber", (memberId, paymentAmount, 'Awaiting Payment', datetime.now()))
+                billNumber = cursor.fetchone()[0]
+                connection.commit()
+            except psycopg2.errors.ForeignKeyViolation:
+                connection.rollback()
+                raise ServiceError("Invalid member ID. Does not exist.")
+        return billNumber
+
+    #---------------------------------------------------------------------------------------------------------------------------------
+    # Moving a bill from one status to another. The status check is part of the UPDATE so a bill that changed since it was listed (or
+    # that was never listed) is left alone. Returns True if the bill was updated.
+    #---------------------------------------------------------------------------------------------------------------------------------
+    def updateBillStatus(self, billNumber, fromStatus, toStatus):
+        if (fromStatus, toStatus) not in PAYMENT_TRANSITIONS:
+            raise ServiceError(f"A bill can't go from {fromStatus} to {toStatus}.")
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("UPDATE Payment SET paymentStatus = %s, statusUpdateDate = CURRENT_TIMESTAMP WHERE billNumber = %s AND paymentStatus = %s", (toStatus, billNumber, fromStatus))
+            connection.commit()
+            return cursor.rowcount == 1
+
+    def cancelBill(self, billNumber):
+        return self.updateBillStatus(billNumber, 'Awaiting Payment', 'Cancelled')
+
+    def payBill(self, billNumber):
+        return self.updateBillStatus(billNumber, 'Awaiting Payment', 'Paid')
+
+    def refundBill(self, billNumber):
+        return self.updateBillStatus(billNumber, 'Paid', 'Returned')
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Billing a month's membership dues (billingPeriod is 'YYYY-MM') to every member, or to the cohort picked by the optional filters:
+    # members with a class or PT session in the activeDays days before the month starts, and/or members with a userId between
+    # fromUserId and toUserId. All the bills are created by a single INSERT ... SELECT and the run is logged in BillingRun. Members
+    # who already have a dues bill for the month (from any earlier run, whatever its status) are skipped, so re-running a month is
+    # safe; the unique index from migration 006 also covers two runs for the same month at once.
+    # Returns {'runId', 'billsCreated', 'amountBilled', 'periodTotals'}, where periodTotals is {paymentStatus: (bills, amount)} over
+    # every dues bill of the month, this run's included.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def runBilling(self, billingPeriod, duesAmount=DEFAULT_MONTHLY_DUES, activeDays=None, fromUserId=None, toUserId=None):
+        if not (re.fullmatch(r"\d{4}-\d{2}", billingPeriod) and isValidDate(billingPeriod + "-01", EARLIEST_SCHEDULE_YEAR)):
+            raise ServiceError("You have entered an invalid billing period. Please use the YYYY-MM format, from 2022-01 (when the gym was opened) onwards.")
+        if not 0 < duesAmount < 100000:
+            raise ServiceError("The dues amount must be positive and under $100,000.")
+        if activeDays is not None and activeDays < 1:
+            raise ServiceError("The activity window must be at least one day.")
+
+        periodStart = datetime.strptime(billingPeriod + "-01", "%Y-%m-%d").date()
+        parameters = {'period': periodStart, 'amount': duesAmount, 'fromUserId': fromUserId, 'toUserId': toUserId}
+
+        # Checking the unique index first lets a re-run skip already billed members without attempting (and conflicting on) an insert
+        conditions = ["NOT EXISTS (SELECT 1 FROM Payment p WHERE p.billingPeriod = %(period)s AND p.memberId = m.userId)"]
+        cohort = []
+        if activeDays is not None:
+            parameters['activeSince'] = periodStart - timedelta(days=activeDays)
+            conditions.append("""(
+                EXISTS (SELECT 1 FROM MemberTakesClass mtc JOIN Class c ON c.classId = mtc.classId WHERE mtc.userId = m.userId AND c.classDate >= %(activeSince)s AND c.classDate < %(period)s)
+                OR EXISTS (SELECT 1 FROM PersonalTrainingSession s WHERE s.userId = m.userId AND s.sessionDate >= %(activeSince)s AND s.sessionDate < %(period)s)
+            )""")
+            cohort.append(f"active in the {activeDays} days before {periodStart}")
+        if fromUserId is not None:
+            conditions.append("m.userId >= %(fromUserId)s")
+        if toUserId is not None:
+            conditions.append("m.userId <= %(toUserId)s")
+        if fromUserId is not None or toUserId is not None:
+            cohort.append(f"userId {'' if fromUserId is None else fromUserId}-{'' if toUserId is None else toUserId}")
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("INSERT INTO BillingRun (billingPeriod, duesAmount, cohort) VALUES (%s, %s, %s) RETURNING runId", (periodStart, duesAmount, ", ".join(cohort) or "all members"))
+            parameters['runId'] = cursor.fetchone()[0]
+
+            # conditions only hold the fixed SQL above; every value is a parameter
+            cursor.execute(f"""
+                WITH billed AS (
+                    INSERT INTO Payment (memberId, paymentAmount, paymentStatus, statusUpdateDate, billingPeriod, billingRunId)
+                    SELECT m.userId, %(amount)s, 'Awaiting Payment', CURRENT_TIMESTAMP, %(period)s, %(runId)s
+                    FROM Member m
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY m.userId
+                    ON CONFLICT (billingPeriod, memberId) WHERE billingPeriod IS NOT NULL DO NOTHING
+                    RETURNING paymentAmount
+                ),
+                run AS (
+                    UPDATE BillingRun
+                    SET billsCreated = (SELECT COUNT(*) FROM billed), amountBilled = (SELECT COALESCE(SUM(paymentAmount), 0) FROM billed)
+                    WHERE runId = %(runId)s
+                )
+                SELECT COUNT(*), COALESCE(SUM(paymentAmount), 0) FROM billed
+            """, parameters)
+            billsCreated, amountBilled = cursor.fetchone()
+
+            cursor.execute("SELECT paymentStatus, COUNT(*), SUM(paymentAmount) FROM Payment WHERE billingPeriod = %s GROUP BY paymentStatus ORDER BY paymentStatus", (periodStart,))
+            periodTotals = {paymentStatus: (bills, amount) for paymentStatus, bills, amount in cursor.fetchall()}
+            connection.commit()
+
+        return {'runId': parameters['runId'], 'billsCreated': billsCreated, 'amountBilled': amountBilled, 'periodTotals': periodTotals}
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Applying a payment processor's settlement file (fileFormat 'csv' or 'jsonl', see PaymentReconciliation.py) to the bills in one
+    # transaction. The file is streamed into a temporary staging table with COPY, every line is checked against its bill in one
+    # statement (a bill may only appear once, must exist, must match the amount if one is given, and may only make one of the
+    # PAYMENT_TRANSITIONS), and then every valid change is applied by a single UPDATE ... FROM ... RETURNING. That update re-checks each
+    # bill's status, so a bill paid or cancelled at the front desk in the meantime is rejected rather than overwritten.
+    # Lines asking for the status a bill already has count as unchanged, so the same file can safely be applied twice.
+    # Every rejected line is written to rejectFile (if given) as CSV: lineNumber, billNumber, paymentStatus, reason.
+    # Returns {'applied': lines, 'unchanged': lines, 'rejected': {reason: lines}}.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def reconcilePayments(self, file, fileFormat, rejectFile=None):
+        if fileFormat not in SETTLEMENT_FORMATS:
+            raise ServiceError(f"Settlement files have to be one of: {', '.join(SETTLEMENT_FORMATS)}.")
+
+        rejected = collections.Counter()
+        rejectWriter = None
+        if rejectFile is not None:
+            rejectWriter = csv.writer(rejectFile)
+            rejectWriter.writerow(['lineNumber', 'billNumber', 'paymentStatus', 'reason'])
+
+        def reject(lineNumber, billNumber, paymentStatus, reason):
+            rejected[reason] += 1
+            if rejectWriter is not None:
+                rejectWriter.writerow([lineNumber, billNumber, paymentStatus, reason])
+
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                CREATE TEMP TABLE Settlement (
+                    lineNumber INT PRIMARY KEY,
+                    billNumber INT NOT NULL,
+                    paymentStatus VARCHAR(16) NOT NULL,
+                    amount NUMERIC(7, 2),
+                    settledAt TIMESTAMP,
+                    currentStatus VARCHAR(16),
+                    outcome VARCHAR(50)
+                ) ON COMMIT DROP
+            """)
+            cursor.copy_expert("COPY Settlement (lineNumber, billNumber, paymentStatus, amount, settledAt) FROM STDIN", CopyStream(readSettlementFile(file, fileFormat, reject)), size=1 << 20)
+            # Temporary tables are never analyzed automatically, and the planner needs the row count to join it well
+            cursor.execute("ANALYZE Settlement")
+
+            # Deciding every line's outcome up front. NULL means the change is valid and still has to be applied.
+            cursor.execute("""
+                UPDATE Settlement s
+                SET currentStatus = checked.currentStatus, outcome = checked.outcome
+                FROM (
+                    SELECT f.lineNumber, p.paymentStatus AS currentStatus,
+                        CASE
+                            WHEN f.lineNumber > f.firstLine THEN %(duplicate)s
+                            WHEN p.billNumber IS NULL THEN %(unknown)s
+                            WHEN f.amount IS NOT NULL AND f.amount <> p.paymentAmount THEN %(mismatch)s
+                            WHEN p.paymentStatus = f.paymentStatus THEN 'unchanged'
+                            WHEN t.toStatus IS NULL THEN %(invalidTransition)s
+                        END AS outcome
+                    FROM (SELECT lineNumber, billNumber, paymentStatus, amount, MIN(lineNumber) OVER (PARTITION BY billNumber) AS firstLine FROM Settlement) f
+                    LEFT JOIN Payment p ON p.billNumber = f.billNumber
+                    LEFT JOIN unnest(%(fromStatuses)s::text[], %(toStatuses)s::text[]) AS t (fromStatus, toStatus)
+                        ON t.fromStatus = p.paymentStatus AND t.toStatus = f.paymentStatus
+                ) checked
+                WHERE s.lineNumber = checked.lineNumber
+            """, {'duplicate': DUPLICATE_BILL, 'unknown': UNKNOWN_BILL, 'mismatch': AMOUNT_MISMATCH, 'invalidTransition': INVALID_TRANSITION,
+                  'fromStatuses': [fromStatus for fromStatus, _ in PAYMENT_TRANSITIONS], 'toStatuses': [toStatus for _, toStatus in PAYMENT_TRANSITIONS]})
+
+            cursor.execute("""
+                WITH applied AS (
+                    UPDATE Payment p
+                    SET paymentStatus = s.paymentStatus, statusUpdateDate = COALESCE(s.settledAt, CURRENT_TIMESTAMP)
+                    FROM Settlement s
+                    WHERE s.outcome IS NULL AND p.billNumber = s.billNumber AND p.paymentStatus = s.currentStatus
+                    RETURNING s.lineNumber
+                )
+                UPDATE Settlement s SET outcome = 'applied'
+                FROM applied
+                WHERE s.lineNumber = applied.lineNumber
+            """)
+
+            # Lines still without an outcome were valid, but their bill's status changed before the update got to it
+            cursor.execute("""
+                SELECT lineNumber, billNumber, paymentStatus, COALESCE(outcome, %s)
+                FROM Settlement
+                WHERE outcome IS NULL OR outcome NOT IN ('applied', 'unchanged')
+                ORDER BY lineNumber
+            """, (CHANGED_CONCURRENTLY,))
+            for row in cursor:
+                reject(*row)
+
+            cursor.execute("SELECT COUNT(*) FILTER (WHERE outcome = 'applied'), COUNT(*) FILTER (WHERE outcome = 'unchanged') FROM Settlement")
+            applied, unchanged = cursor.fetchone()
+            connection.commit()
+
+        return {'applied': applied, 'unchanged': unchanged, 'rejected': dict(rejected)}
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Adding a class taught by the given trainer, after re-checking that they are (still) available. The class_trainer_no_overlap
+    # exclusion constraint guards against an overlapping class being added concurrently. Returns the new classId.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def addClass(self, className, trainerId, classDate, startTime, endTime, capacity=DEFAULT_CLASS_CAPACITY):
+        if not className:
+            raise ServiceError("Please enter a class name.")
+        if capacity < 1:
+            raise ServiceError("A class needs room for at least one member.")
+        requireScheduleSlot(classDate, startTime, endTime)
+
+        available, reason = self.checkTrainerAvailability(trainerId, classDate, startTime, endTime)
+        if not available:
+            raise ServiceError(reason)
+
+        # Re-checking the trainer in the same serializable transaction as the insert, since class_trainer_no_overlap only covers classes
+        def insertClass(cursor):
+            reason = self._trainerConflict(cursor, trainerId, classDate, startTime, endTime)
+            if reason:
+                raise ServiceError(reason)
+            try:
+                cursor.execute("INSERT INTO Class (className, trainerId, classDate, startTime, endTime, capacity) VALUES (%s, %s, %s, %s, %s, %s) RETURNING classId", (className, trainerId, classDate, startTime, endTime, capacity))
+            except psycopg2.errors.ExclusionViolation:
+                raise ServiceError("Trainer is unavailable to teach this class. Please choose another trainer.")
+            return cursor.fetchone()[0]
+
+        classId = runTransaction(self.connectionPool, insertClass)
+
+        self.scheduleIndex.addInterval(TRAINER_BUSY, trainerId, classDate, startTime, endTime, ('class', classId))
+        return classId
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Adding the same class on the given weekdays (ISODOW numbers) of every week from fromDate to toDate, e.g. Spin every Tuesday at
+    # 18:00 for a quarter. Like setRecurringAvailability the whole series is expanded, checked against the trainer's availability,
+    # classes and PT sessions, and inserted in one statement, all or nothing unless skipConflicts is set.
+    # Returns (created, conflicts): lists of (date, classId) and (date, reason).
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def addRecurringClass(self, className, trainerId, weekdays, fromDate, toDate, startTime, endTime, capacity=DEFAULT_CLASS_CAPACITY, skipConflicts=False):
+        if not className:
+            raise ServiceError("Please enter a class name.")
+        if capacity < 1:
+            raise ServiceError("A class needs room for at least one member.")
+        requireRecurrence(weekdays, fromDate, toDate, startTime, endTime)
+
+        def insertSeries(cursor):
+            try:
+                cursor.execute("""
+                    WITH series AS (
+                        SELECT day::date AS day, tsrange(day::date + %(startTime)s::time, day::date + %(endTime)s::time, '[]') AS slot
+                        FROM generate_series(%(fromDate)s::date, %(toDate)s::date, interval '1 day') AS day
+                        WHERE EXTRACT(ISODOW FROM day)::int = ANY(%(weekdays)s)
+                    ),
+                    checked AS (
+                        SELECT day, CASE
+                            WHEN NOT EXISTS (
+                                SELECT 1 FROM TrainerAvailability
+                                WHERE trainerId = %(trainerId)s AND availabilityDate = day AND startTime <= %(startTime)s::time AND endTime >= %(endTime)s::time
+                            ) THEN 'trainer is not available'
+                            WHEN EXISTS (SELECT 1 FROM Class WHERE trainerId = %(trainerId)s AND classDate = day AND classSlot && slot) THEN 'trainer is teaching another class'
+                            WHEN EXISTS (SELECT 1 FROM PersonalTrainingSession WHERE trainerId = %(trainerId)s AND sessionDate = day AND sessionSlot && slot) THEN 'trainer has a PT session'
+                        END AS conflict
+                        FROM series
+                    ),
+                    inserted AS (
+                        INSERT INTO Class (className, trainerId, classDate, startTime, endTime, capacity)
+                        SELECT %(className)s, %(trainerId)s, day, %(startTime)s::time, %(endTime)s::time, %(capacity)s
+                        FROM checked
+                        WHERE conflict IS NULL AND (%(skipConflicts)s OR NOT EXISTS (SELECT 1 FROM checked WHERE conflict IS NOT NULL))
+                        RETURNING classId, classDate
+                    )
+                    SELECT checked.day, inserted.classId, checked.conflict
+                    FROM checked LEFT JOIN inserted ON inserted.classDate = checked.day
+                    ORDER BY checked.day
+                """, {'className': className, 'trainerId': trainerId, 'weekdays': list(weekdays), 'fromDate': fromDate, 'toDate': toDate, 'startTime': startTime, 'endTime': endTime, 'capacity': capacity, 'skipConflicts': skipConflicts})
+            except psycopg2.errors.ExclusionViolation:
+                raise ServiceError("Some of these dates were just booked by someone else. Please try again.")
+            return cursor.fetchall()
+
+        created, conflicts = self._seriesReport(runTransaction(self.connectionPool, insertSeries))
+        for day, classId in created:
+            self.scheduleIndex.addInterval(TRAINER_BUSY, trainerId, day, startTime, endTime, ('class', classId))
+        return created, conflicts
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Removing a class along with every member's registration and waitlist entry for it. Returns the removed class row.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def removeClass(self, classId):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("DELETE FROM ClassWaitlist WHERE classId = %s", (classId,))
+            cursor.execute("DELETE FROM MemberTakesClass WHERE classId = %s", (classId,))
+            cursor.execute("DELETE FROM Class WHERE classId = %s RETURNING classId, className, trainerId, classDate, startTime, endTime", (classId,))
+            classInfo = cursor.fetchone()
+
+            if not classInfo:
+                connection.rollback()
+                raise ServiceError("Invalid class. No class with that class ID in the database.")
+            connection.commit()
+
+        # The class disappears from its trainer's schedule and from the schedule of every member that was registered in it
+        self.scheduleIndex.removeInterval(TRAINER_BUSY, classInfo[2], classInfo[3], ('class', classInfo[0]))
+        self.scheduleIndex.invalidate(MEMBER_BUSY, classInfo[3])
+        return classInfo
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Returning gym-wide health statistics: {'memberMetrics': ..., 'goalCompletion': ...} as described in GymAnalytics.py. Each part
+    # reads the whole Member/Achievement table, so this is meant for staff reports rather than anything on a member's path.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def getGymAnalytics(self):
+        if not analyticsAvailable():
+            raise ServiceError("Gym analytics need NumPy. Install it with 'pip install numpy'.")
+        return {'memberMetrics': self.gymAnalytics.memberMetrics(), 'goalCompletion': self.gymAnalytics.goalCompletion()}
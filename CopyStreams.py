@@ -0,0 +1,38 @@
+import io
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Defining the CopyStream class which turns an iterator of row tuples into the file-like object cursor.copy_expert reads from, encoding
+# rows into COPY's text format only as COPY asks for more data. None becomes \N and tabs/newlines/backslashes are escaped.
+# Shared by DataGenerator.py, BulkImport.py and the settlement file reconciliation in ClubService.
+#-------------------------------------------------------------------------------------------------------------------------------------
+class CopyStream(io.RawIOBase):
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = bytearray()
+        self.rowCount = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._buffer += (b'\t'.join(self._encode(value) for value in row) + b'\n')
+            self.rowCount += 1
+
+        if size < 0:
+            size = len(self._buffer)
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return chunk
+
+    def _encode(self, value):
+        if value is None:
+            return b'\\N'
+        text = str(value)
+        if '\\' in text or '\t' in text or '\n' in text or '\r' in text:
+            text = text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+        return text.encode('utf-8')
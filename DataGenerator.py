@@ -0,0 +1,312 @@
+import argparse
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import psycopg2
+
+from CopyStreams import CopyStream
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Synthetic data generator. Fills every table of a freshly created database (DDL + migrations, no DML) with a seeded, repeatable dataset
+# at whatever scale is asked for, streaming each table through COPY so memory stays flat even for tens of millions of rows.
+#
+# Rows are laid out so they satisfy the exclusion constraints from migration 001: every bookable day is split into 50 minute slots that
+# start on the hour (06:00-06:50 ... 20:00-20:50). Classes use the even slots and PT sessions the odd ones, each trainer gets a single
+# all-day availability window per day, and room bookings cycle through rooms and slots. The HH:52-HH:58 gaps are never booked, which
+# is what the benchmark suite uses for its booking operations.
+#
+#   python DataGenerator.py --scale production --truncate
+#   python DataGenerator.py --members 50000 --classes 10000 --member-classes 200000 --payments 500000
+#-------------------------------------------------------------------------------------------------------------------------------------
+
+# Named scales. Any count can still be overridden on the command line.
+SCALES = {
+    'small': {'members': 10000, 'trainers': 50, 'staff': 10, 'rooms': 20, 'exercises': 200, 'equipment': 200, 'classes': 5000, 'memberClasses': 50000, 'ptSessions': 20000, 'roomBookings': 20000, 'payments': 50000, 'achievementsPerMember': 3, 'routinesPerMember': 2, 'exercisesPerRoutine': 6, 'maintenancePerEquipment': 3, 'healthMetricsPerMember': 10},
+    'medium': {'members': 100000, 'trainers': 200, 'staff': 25, 'rooms': 20, 'exercises': 500, 'equipment': 500, 'classes': 50000, 'memberClasses': 500000, 'ptSessions': 200000, 'roomBookings': 100000, 'payments': 1000000, 'achievementsPerMember': 3, 'routinesPerMember': 2, 'exercisesPerRoutine': 6, 'maintenancePerEquipment': 3, 'healthMetricsPerMember': 10},
+    'production': {'members': 1000000, 'trainers': 500, 'staff': 50, 'rooms': 20, 'exercises': 1000, 'equipment': 2000, 'classes': 200000, 'memberClasses': 5000000, 'ptSessions': 1000000, 'roomBookings': 500000, 'payments': 10000000, 'achievementsPerMember': 3, 'routinesPerMember': 2, 'exercisesPerRoutine': 6, 'maintenancePerEquipment': 3, 'healthMetricsPerMember': 12},
+}
+
+FIRST_DATE = date(2022, 1, 3)
+HISTORY_DAYS = 700 # achievements, maintenance, payments and health metric readings are spread over this many days from FIRST_DATE
+SLOT_HOURS = list(range(6, 21)) # slots start at 06:00 through 20:00 and last 50 minutes
+CLASS_SLOT_HOURS = SLOT_HOURS[0::2]
+SESSION_SLOT_HOURS = SLOT_HOURS[1::2]
+
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen', 'Priya', 'Wei', 'Aarav', 'Fatima', 'Mohammed', 'Sofia', 'Mateo', 'Yuki', 'Olga', 'Kwame']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin', 'Patel', 'Chen', 'Singh', 'Nguyen', 'Kim', 'Ali', 'Sato', 'Ivanova', 'Mensah', 'Rossi']
+CLASS_NAMES = ['Spin', 'Yoga', 'Pilates', 'HIIT', 'Boxing', 'Zumba', 'CrossFit', 'Barre', 'Bootcamp', 'Aqua Fit', 'Kettlebells', 'Mobility']
+EQUIPMENT_NAMES = ['Barbell Bench Press Machine', 'Squat Rack', 'Cable Machine', 'Adjustable Bench', 'Leg Press Machine', 'Treadmill', 'Stationary Bike', 'Rowing Machine', 'Smith Machine', 'Lat Pulldown Machine']
+PAYMENT_STATUSES = ['Awaiting Payment', 'Paid', 'Paid', 'Paid', 'Returned', 'Cancelled']
+
+
+#---------------------------------------------------------------------------------------------------------------------------------
+# Deterministic login details, so the benchmark suite can log in as any generated member/trainer/staff member without a lookup.
+#---------------------------------------------------------------------------------------------------------------------------------
+def memberEmail(userId):
+    return f"member{userId}@example.com"
+
+def trainerEmail(trainerId):
+    return f"trainer{trainerId}@pallavgym.com"
+
+def staffEmail(staffId):
+    return f"staff{staffId}@pallavgym.com"
+
+def generatedPassword(accountId):
+    return f"Passw0rd{accountId}"
+
+def memberName(userId):
+    return FIRST_NAMES[userId % len(FIRST_NAMES)], LAST_NAMES[(userId // len(FIRST_NAMES)) % len(LAST_NAMES)]
+
+def slotTimes(hour):
+    return f"{hour:02d}:00", f"{hour:02d}:50"
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Defining the DataGenerator class which produces every table's rows from one seed. Each table gets its own Random derived from the
+# seed and the table name, so changing the size of one table doesn't reshuffle the others.
+#-------------------------------------------------------------------------------------------------------------------------------------
+class DataGenerator:
+    def __init__(self, counts, seed=3005):
+        self.counts = counts
+        self.seed = seed
+
+        trainers = counts['trainers']
+        classDays = math.ceil(counts['classes'] / (trainers * len(CLASS_SLOT_HOURS))) if counts['classes'] else 0
+        sessionDays = math.ceil(counts['ptSessions'] / (trainers * len(SESSION_SLOT_HOURS))) if counts['ptSessions'] else 0
+        roomDays = math.ceil(counts['roomBookings'] / (counts['rooms'] * len(SLOT_HOURS))) if counts['roomBookings'] else 0
+
+        # Every day that has a class, PT session or room booking (trainers are available all day on each of these)
+        self.scheduleDays = max(classDays, sessionDays, roomDays, 1)
+
+    def random(self, table):
+        return random.Random(f"{self.seed}:{table}")
+
+    def day(self, index):
+        return FIRST_DATE + timedelta(days=index)
+
+    # Returns (table, columns, rows) for every table in foreign key order
+    def tables(self):
+        return [
+            ('Member', ['userId', 'fName', 'lName', 'email', 'password', 'dateOfBirth', 'phoneNumber', 'weightLbs', 'bodyFatPercentage'], self.members()),
+            ('PersonalTrainer', ['trainerId', 'fName', 'lName', 'email', 'password', 'phoneNumber'], self.trainers()),
+            ('AdministrativeStaff', ['staffId', 'fName', 'lName', 'email', 'password', 'phoneNumber'], self.staff()),
+            ('Room', ['roomNumber', 'roomName'], self.rooms()),
+            ('Exercise', ['exerciseId', 'exerciseName', 'exerciseDescription'], self.exercises()),
+            ('Equipment', ['equipmentId', 'equipmentName', 'underMaintenance'], self.equipment()),
+            ('Achievement', ['achievementId', 'userId', 'achievementName', 'achievementDescription', 'dateAchieved'], self.achievements()),
+            ('TrainerAvailability', ['availibilityId', 'trainerId', 'availabilityDate', 'startTime', 'endTime'], self.availability()),
+            ('EquipmentMaintenance', ['maintenanceId', 'equipmentId', 'maintenanceCompletionDate'], self.maintenance()),
+            ('RoomBookings', ['roomBookingId', 'roomNumber', 'bookingDate', 'startTime', 'endTime', 'bookingStaffId'], self.roomBookings()),
+            ('Class', ['classId', 'className', 'trainerId', 'classDate', 'startTime', 'endTime', 'capacity', 'registeredCount'], self.classes()),
+            ('MemberTakesClass', ['userId', 'classId'], self.memberClasses()),
+            ('PersonalTrainingSession', ['sessionId', 'userId', 'trainerId', 'sessionDate', 'startTime', 'endTime'], self.ptSessions()),
+            ('Routine', ['routineId', 'routineName', 'userId', 'routineDescription'], self.routines()),
+            ('RoutineExerciseAssignment', ['routineExerciseId', 'routineId', 'exerciseId', 'numSets'], self.routineExercises()),
+            ('Payment', ['billNumber', 'memberId', 'paymentAmount', 'paymentStatus', 'statusUpdateDate'], self.payments()),
+            ('HealthMetric', ['userId', 'measuredAt', 'weightLbs', 'bodyFatPercentage', 'source'], self.healthMetrics()),
+        ]
+
+    def members(self):
+        rng = self.random('Member')
+        for userId in range(1, self.counts['members'] + 1):
+            fName, lName = memberName(userId)
+            dateOfBirth = date(1950, 1, 1) + timedelta(days=rng.randrange(365 * 55))
+            weight = round(rng.uniform(100, 300), 2) if rng.random() < 0.8 else None
+            bodyFat = round(rng.uniform(8, 40), 1) if rng.random() < 0.7 else None
+            yield (userId, fName, lName, memberEmail(userId), generatedPassword(userId), dateOfBirth, f"(613) {userId // 10000 % 1000:03d}-{userId % 10000:04d}", weight, bodyFat)
+
+    def trainers(self):
+        for trainerId in range(1, self.counts['trainers'] + 1):
+            yield (trainerId, FIRST_NAMES[trainerId % len(FIRST_NAMES)], f"Trainer{trainerId}", trainerEmail(trainerId), generatedPassword(trainerId), f"(416) 555-{trainerId % 10000:04d}")
+
+    def staff(self):
+        for staffId in range(1, self.counts['staff'] + 1):
+            yield (staffId, FIRST_NAMES[staffId % len(FIRST_NAMES)], f"Staff{staffId}", staffEmail(staffId), generatedPassword(staffId), f"(647) 555-{staffId % 10000:04d}")
+
+    def rooms(self):
+        for roomNumber in range(1, self.counts['rooms'] + 1):
+            yield (roomNumber, f"Studio {roomNumber}")
+
+    def exercises(self):
+        for exerciseId in range(1, self.counts['exercises'] + 1):
+            yield (exerciseId, f"Exercise {exerciseId}", f"Generated exercise #{exerciseId}")
+
+    def equipment(self):
+        rng = self.random('Equipment')
+        for equipmentId in range(1, self.counts['equipment'] + 1):
+            yield (equipmentId, EQUIPMENT_NAMES[equipmentId % len(EQUIPMENT_NAMES)], rng.random() < 0.05)
+
+    def achievements(self):
+        rng = self.random('Achievement')
+        achievementId = 0
+        for userId in range(1, self.counts['members'] + 1):
+            for goal in range(self.counts['achievementsPerMember']):
+                achievementId += 1
+                dateAchieved = FIRST_DATE + timedelta(days=rng.randrange(HISTORY_DAYS)) if rng.random() < 0.5 else None
+                yield (achievementId, userId, f"Goal {goal + 1}", None if goal % 2 else "Generated goal", dateAchieved)
+
+    def availability(self):
+        # One all-day window per trainer per scheduled day, so every generated class and PT session lies inside the trainer's availability
+        availabilityId = 0
+        for dayIndex in range(self.scheduleDays):
+            for trainerId in range(1, self.counts['trainers'] + 1):
+                availabilityId += 1
+                yield (availabilityId, trainerId, self.day(dayIndex), "06:00", "21:00")
+
+    def maintenance(self):
+        rng = self.random('EquipmentMaintenance')
+        maintenanceId = 0
+        for equipmentId in range(1, self.counts['equipment'] + 1):
+            for _ in range(self.counts['maintenancePerEquipment']):
+                maintenanceId += 1
+                yield (maintenanceId, equipmentId, datetime.combine(FIRST_DATE, datetime.min.time()) + timedelta(minutes=rng.randrange(HISTORY_DAYS * 24 * 60)))
+
+    def roomBookings(self):
+        rng = self.random('RoomBookings')
+        rooms = self.counts['rooms']
+        for index in range(self.counts['roomBookings']):
+            slot = index // rooms
+            startTime, endTime = slotTimes(SLOT_HOURS[slot % len(SLOT_HOURS)])
+            yield (index + 1, index % rooms + 1, self.day(slot // len(SLOT_HOURS)), startTime, endTime, rng.randrange(self.counts['staff']) + 1)
+
+    def classes(self):
+        # Seat counters match the registrations memberClasses() generates, with a few spots left in every class
+        trainers, classes = self.counts['trainers'], self.counts['classes']
+        registrations = self.memberClassCount()
+        for index in range(classes):
+            slot = index // trainers
+            startTime, endTime = slotTimes(CLASS_SLOT_HOURS[slot % len(CLASS_SLOT_HOURS)])
+            registeredCount = registrations // classes + (1 if index < registrations % classes else 0)
+            yield (index + 1, CLASS_NAMES[index % len(CLASS_NAMES)], index % trainers + 1, self.day(slot // len(CLASS_SLOT_HOURS)), startTime, endTime, max(20, registeredCount + 5), registeredCount)
+
+    def memberClassCount(self):
+        return min(self.counts['memberClasses'], self.counts['classes'] * self.counts['members'])
+
+    def memberClasses(self):
+        # Registration k goes to class k % classes; the k // classes'th registrant of a class is a different member each time, so (userId, classId) never repeats
+        classes, members = self.counts['classes'], self.counts['members']
+        if not classes:
+            return
+        for index in range(self.memberClassCount()):
+            classIndex, registrant = index % classes, index // classes
+            yield ((classIndex * 7919 + registrant) % members + 1, classIndex + 1)
+
+    def ptSessions(self):
+        # The sessions sharing a slot are consecutive indexes, so giving session i member i % members keeps a member out of two sessions at once
+        trainers, members = self.counts['trainers'], self.counts['members']
+        for index in range(self.counts['ptSessions']):
+            slot = index // trainers
+            startTime, endTime = slotTimes(SESSION_SLOT_HOURS[slot % len(SESSION_SLOT_HOURS)])
+            yield (index + 1, index % members + 1, index % trainers + 1, self.day(slot // len(SESSION_SLOT_HOURS)), startTime, endTime)
+
+    def routines(self):
+        routineId = 0
+        for userId in range(1, self.counts['members'] + 1):
+            for routine in range(self.counts['routinesPerMember']):
+                routineId += 1
+                yield (routineId, f"Routine {routine + 1}", userId, "Generated routine")
+
+    def routineExercises(self):
+        rng = self.random('RoutineExerciseAssignment')
+        routineExerciseId = 0
+        for routineId in range(1, self.counts['members'] * self.counts['routinesPerMember'] + 1):
+            for _ in range(self.counts['exercisesPerRoutine']):
+                routineExerciseId += 1
+                yield (routineExerciseId, routineId, rng.randrange(self.counts['exercises']) + 1, rng.randint(1, 5))
+
+    def payments(self):
+        rng = self.random('Payment')
+        for billNumber in range(1, self.counts['payments'] + 1):
+            statusUpdateDate = datetime.combine(FIRST_DATE, datetime.min.time()) + timedelta(minutes=rng.randrange(HISTORY_DAYS * 24 * 60))
+            yield (billNumber, rng.randrange(self.counts['members']) + 1, round(rng.choice([49.99, 59.99, 79.99, rng.uniform(10, 500)]), 2), rng.choice(PAYMENT_STATUSES), statusUpdateDate)
+
+    def healthMetrics(self):
+        # Readings come out in measuredAt order, the way scales send them, which is what keeps the BRIN indexes from migration 005 small.
+        # Each member's readings wander a little around a baseline derived from their id, so the rollups show believable trends.
+        rng = self.random('HealthMetric')
+        members = self.counts['members']
+        total = members * self.counts['healthMetricsPerMember']
+        for dayIndex in range(HISTORY_DAYS):
+            midnight = datetime.combine(FIRST_DATE + timedelta(days=dayIndex), datetime.min.time())
+            readings = total * (dayIndex + 1) // HISTORY_DAYS - total * dayIndex // HISTORY_DAYS
+            for minute in sorted(rng.randrange(24 * 60) for _ in range(readings)):
+                userId = rng.randrange(members) + 1
+                baseWeight, baseBodyFat = 110 + userId * 7919 % 180, 10 + userId * 104729 % 28
+                drift = (dayIndex - HISTORY_DAYS / 2) / HISTORY_DAYS * (userId % 21 - 10)
+                bodyFat = round(baseBodyFat + drift / 4 + rng.uniform(-0.5, 0.5), 1) if rng.random() < 0.6 else None
+                yield (userId, midnight + timedelta(minutes=minute), round(baseWeight + drift + rng.uniform(-1.5, 1.5), 2), bodyFat, 'scale')
+
+    # The first and last day health metric readings can fall on, which HealthMetric needs partitions for
+    def healthMetricRange(self):
+        return FIRST_DATE, FIRST_DATE + timedelta(days=HISTORY_DAYS - 1)
+
+
+# Tables whose SERIAL id we fill in ourselves, so their sequences have to be moved past the generated ids afterwards
+SERIAL_COLUMNS = {
+    'Member': 'userId', 'PersonalTrainer': 'trainerId', 'AdministrativeStaff': 'staffId', 'Exercise': 'exerciseId', 'Equipment': 'equipmentId',
+    'Achievement': 'achievementId', 'TrainerAvailability': 'availibilityId', 'EquipmentMaintenance': 'maintenanceId', 'RoomBookings': 'roomBookingId',
+    'Class': 'classId', 'PersonalTrainingSession': 'sessionId', 'Routine': 'routineId', 'RoutineExerciseAssignment': 'routineExerciseId', 'Payment': 'billNumber',
+}
+
+
+#---------------------------------------------------------------------------------------------------------------------------------
+# Loading every table with COPY (one transaction per table), then fixing up the sequences and refreshing planner statistics.
+#---------------------------------------------------------------------------------------------------------------------------------
+def loadDatabase(connectionString, generator, truncate=False):
+    connection = psycopg2.connect(connectionString)
+    try:
+        tables = generator.tables()
+
+        if truncate:
+            with connection.cursor() as cursor:
+                cursor.execute("TRUNCATE " + ", ".join(table for table, _, _ in tables) + " RESTART IDENTITY CASCADE")
+            connection.commit()
+
+        # HealthMetric only accepts rows for months that have a partition (see migration 005)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT createHealthMetricPartitions(%s, %s)", generator.healthMetricRange())
+        connection.commit()
+
+        for table, columns, rows in tables:
+            started = time.monotonic()
+            stream = CopyStream(rows)
+            with connection.cursor() as cursor:
+                cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", stream, size=1 << 20)
+                if table in SERIAL_COLUMNS:
+                    cursor.execute(f"SELECT setval(pg_get_serial_sequence(%s, %s), GREATEST((SELECT MAX({SERIAL_COLUMNS[table]}) FROM {table}), 1))", (table.lower(), SERIAL_COLUMNS[table].lower()))
+            connection.commit()
+
+            elapsed = time.monotonic() - started
+            print(f"{table}: {stream.rowCount} rows in {elapsed:.1f}s ({stream.rowCount / elapsed if elapsed else 0:,.0f} rows/s)")
+
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    finally:
+        connection.close()
+
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Fill the HealthAndFitnessClub database with seeded synthetic data through COPY.")
+    parser.add_argument('--dsn', help="PostgreSQL connection string (defaults to the one in HealthAndFitnessClub.py)")
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--seed', type=int, default=3005)
+    parser.add_argument('--truncate', action='store_true', help="empty every table first (the generated ids start at 1)")
+    for name in SCALES['small']:
+        parser.add_argument('--' + ''.join('-' + c.lower() if c.isupper() else c for c in name), dest=name, type=int)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parseArguments()
+    counts = dict(SCALES[arguments.scale])
+    counts.update({name: getattr(arguments, name) for name in counts if getattr(arguments, name) is not None})
+
+    if arguments.dsn is None:
+        from HealthAndFitnessClub import connection_string
+        arguments.dsn = connection_string
+
+    loadDatabase(arguments.dsn, DataGenerator(counts, arguments.seed), arguments.truncate)
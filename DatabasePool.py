@@ -0,0 +1,179 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+
+#-------------------------------------------------------------------------------------------------------------
+# Raised when a session waits longer than the checkout timeout for a connection. Subclassing PoolError (which
+# is a psycopg2.Error) means every existing "except psycopg2.Error" handler reports it like any other DB error.
+#-------------------------------------------------------------------------------------------------------------
+class PoolTimeoutError(PoolError):
+    pass
+
+
+#-------------------------------------------------------------------------------------------------------------------------
+# Defining the ConnectionPool class which hands out a bounded number of PostgreSQL connections to many concurrent sessions.
+#-------------------------------------------------------------------------------------------------------------------------
+class ConnectionPool:
+    def __init__(self, connectionString, minSize=1, maxSize=10, checkoutTimeout=10.0, healthCheckInterval=30.0, maxIdleTime=300.0, connectionFactory=None):
+        if minSize < 0 or maxSize < 1 or minSize > maxSize:
+            raise ValueError("The pool needs 0 <= minSize <= maxSize and maxSize >= 1")
+
+        self.connectionString = connectionString
+        self.minSize = minSize
+        self.maxSize = maxSize
+        self.checkoutTimeout = checkoutTimeout
+        self.healthCheckInterval = healthCheckInterval
+        self.maxIdleTime = maxIdleTime
+
+        # Optional psycopg2 connection subclass (e.g. one that counts or times statements) used for every connection the pool opens
+        self.connectionFactory = connectionFactory
+
+        # idle holds (connection, lastReturned) pairs with the most recently returned connection at the end
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+        # Each thread (session) remembers the connection it has borrowed so nested helpers reuse it instead of taking a second one
+        self._local = threading.local()
+
+        # Opening the minimum number of connections up front so the first sessions don't pay the connect latency
+        for _ in range(minSize):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    #------------------------------------------------------------------------------------------------------------------------
+    # Borrowing a connection for the duration of a with-block. Nested borrows on the same thread share the outer connection.
+    #------------------------------------------------------------------------------------------------------------------------
+    @contextmanager
+    def connection(self):
+        borrowed = getattr(self._local, 'connection', None)
+        if borrowed is not None:
+            yield borrowed
+            return
+
+        connection = self._checkout()
+        self._local.connection = connection
+        try:
+            yield connection
+        finally:
+            self._local.connection = None
+            self._checkin(connection)
+
+    #---------------------------------------------------------------------------------------------
+    # Returning a snapshot of the pool's counters (useful for logging and tuning min/max sizes).
+    #---------------------------------------------------------------------------------------------
+    def stats(self):
+        with self._condition:
+            return {'size': self._size, 'idle': len(self._idle), 'inUse': self._size - len(self._idle), 'maxSize': self.maxSize}
+
+    #------------------------------------------------------------------------------------
+    # Closing every idle connection and refusing new checkouts. Borrowed ones close on return.
+    #------------------------------------------------------------------------------------
+    def closeAll(self):
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+
+        for connection, _ in idle:
+            self._closeQuietly(connection)
+
+    def _checkout(self):
+        deadline = time.monotonic() + self.checkoutTimeout
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolError("The connection pool is closed")
+
+                # Reusing the most recently returned connection first since it is the least likely to have gone stale
+                if self._idle:
+                    connection, lastReturned = self._idle.pop()
+                    break
+
+                # Reserving a slot for a brand new connection if we're still under maxSize
+                if self._size < self.maxSize:
+                    self._size += 1
+                    connection, lastReturned = None, None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(f"Timed out after {self.checkoutTimeout}s waiting for a free database connection ({self.maxSize} in use)")
+                self._condition.wait(remaining)
+
+        # Connecting (and health checking) outside of the lock so other sessions aren't blocked on network round trips
+        if connection is None:
+            return self._openReserved()
+
+        if time.monotonic() - lastReturned > self.healthCheckInterval and not self._isHealthy(connection):
+            self._closeQuietly(connection)
+            return self._openReserved()
+
+        return connection
+
+    def _checkin(self, connection):
+        # Throwing away connections that were closed or that we can't roll back to a clean state
+        healthy = not connection.closed
+        if healthy and connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                healthy = False
+
+        now = time.monotonic()
+        toClose = []
+
+        with self._condition:
+            if healthy and not self._closed:
+                self._idle.append((connection, now))
+            else:
+                self._size -= 1
+                toClose.append(connection)
+
+            # Trimming connections that have sat idle for too long, but never below minSize
+            while len(self._idle) > self.minSize and now - self._idle[0][1] > self.maxIdleTime:
+                toClose.append(self._idle.pop(0)[0])
+                self._size -= 1
+
+            self._condition.notify()
+
+        for staleConnection in toClose:
+            self._closeQuietly(staleConnection)
+
+    def _openReserved(self):
+        try:
+            return self._connect()
+        except psycopg2.Error:
+            # Giving the reserved slot back so a failed connect doesn't shrink the pool forever
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def _connect(self):
+        if self.connectionFactory is None:
+            return psycopg2.connect(self.connectionString)
+        return psycopg2.connect(self.connectionString, connection_factory=self.connectionFactory)
+
+    def _isHealthy(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _closeQuietly(self, connection):
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
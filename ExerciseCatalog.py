@@ -0,0 +1,30 @@
+from ReferenceData import EXERCISE
+
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# Defining the ExerciseCatalog class which keeps the Exercise table in memory for the whole process, in the reference data cache
+# (see ReferenceData.py). The table is small and only changes when the DML (or an admin) adds exercises, so createRoutine reads it
+# from here instead of re-selecting it on every call, and validates chosen exercise IDs with a dict lookup. Changes made by any
+# process reach every other one through the cache's notifications; invalidate() drops it right away after a change made here.
+#----------------------------------------------------------------------------------------------------------------------------------
+class ExerciseCatalog:
+    def __init__(self, referenceData):
+        self.referenceData = referenceData
+
+    # exerciseId -> (exerciseName, exerciseDescription), in exerciseId order
+    def exercises(self):
+        return self.referenceData.get(EXERCISE, 'all', self._load)
+
+    def get(self, exerciseId):
+        return self.exercises().get(exerciseId)
+
+    def __contains__(self, exerciseId):
+        return exerciseId in self.exercises()
+
+    def invalidate(self):
+        self.referenceData.invalidate(EXERCISE)
+
+    def _load(self):
+        with self.referenceData.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT exerciseId, exerciseName, exerciseDescription FROM Exercise ORDER BY exerciseId")
+            return {exerciseId: (exerciseName, exerciseDescription) for exerciseId, exerciseName, exerciseDescription in cursor.fetchall()}
@@ -0,0 +1,223 @@
+import io
+import math
+
+try:
+    import numpy
+except ImportError: # NumPy is optional; only the gym analytics need it
+    numpy = None
+
+
+# Age brackets: the lower bound of every bracket after the first, in years. A member aged exactly 30 is in "30-39".
+AGE_BRACKET_EDGES = (18, 30, 40, 50, 60, 70)
+AGE_BRACKET_LABELS = ("Under 18", "18-29", "30-39", "40-49", "50-59", "60-69", "70+")
+
+BODY_FAT_PERCENTILES = (10, 25, 50, 75, 90)
+WEIGHT_PERCENTILES = (25, 50, 75)
+
+# Metrics are sent as integers in units of their NUMERIC scale (hundredths of a pound, tenths of a percent), so a histogram with one
+# bin per value the column can hold (up to 999.99 lbs and 99.9%) is small and gives exact percentiles. NULLs are sent as -1 so that
+# every record has the same size.
+WEIGHT_SCALE = 100
+MAX_WEIGHT = 99999
+BODY_FAT_SCALE = 10
+MAX_BODY_FAT = 999
+
+# Rows decoded per chunk; memory use is a few of these chunks plus the histograms, however many members there are
+CHUNK_ROWS = 65536
+
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+COPY_TRAILER = b"\xff\xff"
+
+MEMBER_METRICS_QUERY = """
+    COPY (
+        SELECT EXTRACT(YEAR FROM age(CURRENT_DATE, dateOfBirth))::int2,
+            COALESCE((weightLbs * 100)::int4, -1),
+            COALESCE((bodyFatPercentage * 10)::int2, -1)
+        FROM Member
+    ) TO STDOUT WITH (FORMAT binary)
+"""
+
+# One row per member with goals: their age, how many goals they set and how many they achieved
+MEMBER_GOALS_QUERY = """
+    COPY (
+        SELECT EXTRACT(YEAR FROM age(CURRENT_DATE, m.dateOfBirth))::int2, COUNT(*)::int4, COUNT(a.dateAchieved)::int4
+        FROM Achievement a
+        JOIN Member m ON m.userId = a.userId
+        GROUP BY a.userId, m.dateOfBirth
+    ) TO STDOUT WITH (FORMAT binary)
+"""
+
+
+def analyticsAvailable():
+    return numpy is not None
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Defining the BinaryCopyReader class, the file copy_expert writes the output of a COPY ... TO STDOUT WITH (FORMAT binary) into. The
+# queries above only return fixed-width, never-NULL integer columns, so every row has the same layout (a field count, then a length and
+# a big-endian value per column) and a whole run of rows can be decoded at once with numpy.frombuffer into one array per column.
+# Those arrays are handed to onChunk about CHUNK_ROWS rows at a time and the bytes are dropped, so only one chunk is held at once.
+#
+# columns is a list of (name, kind) with kind 'i2' or 'i4', matching the int2/int4 columns of the query in order.
+#-------------------------------------------------------------------------------------------------------------------------------------
+class BinaryCopyReader(io.RawIOBase):
+    def __init__(self, columns, onChunk, chunkRows=CHUNK_ROWS):
+        fields = [('fieldCount', '>i2')]
+        for name, kind in columns:
+            fields += [(name + 'Length', '>i4'), (name, '>' + kind)]
+        self.record = numpy.dtype(fields)
+        self.columns = [name for name, _ in columns]
+        self.onChunk = onChunk
+        self.chunkBytes = chunkRows * self.record.itemsize
+
+        self.buffer = bytearray()
+        self.headerRead = False
+        self.rowCount = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        if not self.headerRead:
+            self._readHeader()
+        if self.headerRead and len(self.buffer) >= self.chunkBytes:
+            self._decode()
+        return len(data)
+
+    # Checking and dropping the 19 byte header (signature, flags, header extension length) and any header extension
+    def _readHeader(self):
+        if len(self.buffer) < 19:
+            return
+        if bytes(self.buffer[:11]) != COPY_SIGNATURE:
+            raise ValueError("Not a binary COPY stream")
+        extensionLength = int.from_bytes(self.buffer[15:19], 'big')
+        if len(self.buffer) < 19 + extensionLength:
+            return
+        del self.buffer[:19 + extensionLength]
+        self.headerRead = True
+
+    def _decode(self):
+        rows = len(self.buffer) // self.record.itemsize
+        if not rows:
+            return
+
+        records = numpy.frombuffer(self.buffer, self.record, count=rows)
+        if (records['fieldCount'] != len(self.columns)).any() or any((records[name + 'Length'] < 0).any() for name in self.columns):
+            raise ValueError("Unexpected row layout in binary COPY stream")
+        chunk = {name: records[name].astype(numpy.int32) for name in self.columns}
+        del records # releasing the buffer so it can be trimmed
+        del self.buffer[:rows * self.record.itemsize]
+
+        self.rowCount += rows
+        self.onChunk(chunk)
+
+    # Called once COPY has finished: decoding the last rows and checking that only the end-of-data marker is left over
+    def finish(self):
+        self._decode()
+        if bytes(self.buffer) != COPY_TRAILER:
+            raise ValueError("Binary COPY stream ended unexpectedly")
+
+
+def ageBrackets(ages):
+    return numpy.searchsorted(AGE_BRACKET_EDGES, ages, side='right')
+
+# Nearest-rank percentiles of the values behind a histogram (bin i counts value i / scale). Returns {percentile: value}, or None if the
+# histogram is empty.
+def histogramPercentiles(histogram, percentiles, scale):
+    total = int(histogram.sum())
+    if not total:
+        return None
+    cumulative = histogram.cumsum()
+    return {p: int(numpy.searchsorted(cumulative, max(1, math.ceil(p / 100 * total)))) / scale for p in percentiles}
+
+def histogramMean(histogram, scale):
+    total = int(histogram.sum())
+    return float(numpy.dot(histogram, numpy.arange(histogram.size, dtype=numpy.float64))) / total / scale if total else None
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Defining the GymAnalytics class which computes gym-wide health statistics for staff. Each report streams just the integer columns it
+# needs out of the database as binary COPY (see BinaryCopyReader) and folds every chunk into fixed-size NumPy histograms and counters
+# with vectorized operations, so it runs in the same small amount of memory for a thousand members or a few million. Percentiles are
+# read off exact per-value histograms rather than by sorting every member's values.
+#-------------------------------------------------------------------------------------------------------------------------------------
+class GymAnalytics:
+    def __init__(self, connectionPool):
+        self.connectionPool = connectionPool
+
+    def _stream(self, query, columns, onChunk):
+        reader = BinaryCopyReader(columns, onChunk)
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            cursor.copy_expert(query, reader)
+        reader.finish()
+        return reader.rowCount
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Returning body fat percentiles and weight distribution by age bracket from every member's current values:
+    #   {'members': n, 'bodyFatMembers': n, 'bodyFatPercentiles': {10: 14.2, 25: ...} or None,
+    #    'weightByAge': [(bracket, members, mean, {25: ..., 50: ..., 75: ...}), ...]}
+    # Brackets without anyone who gave their weight are left out.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def memberMetrics(self):
+        brackets = len(AGE_BRACKET_LABELS)
+        bodyFatHistogram = numpy.zeros(MAX_BODY_FAT + 1, numpy.int64)
+        weightHistogram = numpy.zeros(brackets * (MAX_WEIGHT + 1), numpy.int64)
+
+        def accumulate(chunk):
+            bodyFat = chunk['bodyFat']
+            bodyFatHistogram[:] += numpy.bincount(bodyFat[bodyFat >= 0], minlength=bodyFatHistogram.size)
+
+            hasWeight = chunk['weight'] >= 0
+            weightBins = ageBrackets(chunk['age'][hasWeight]) * (MAX_WEIGHT + 1) + chunk['weight'][hasWeight]
+            weightHistogram[:] += numpy.bincount(weightBins, minlength=weightHistogram.size)
+
+        members = self._stream(MEMBER_METRICS_QUERY, [('age', 'i2'), ('weight', 'i4'), ('bodyFat', 'i2')], accumulate)
+
+        weightByAge = []
+        for bracket, histogram in enumerate(weightHistogram.reshape(brackets, MAX_WEIGHT + 1)):
+            count = int(histogram.sum())
+            if count:
+                weightByAge.append((AGE_BRACKET_LABELS[bracket], count, histogramMean(histogram, WEIGHT_SCALE), histogramPercentiles(histogram, WEIGHT_PERCENTILES, WEIGHT_SCALE)))
+
+        return {
+            'members': members,
+            'bodyFatMembers': int(bodyFatHistogram.sum()),
+            'bodyFatPercentiles': histogramPercentiles(bodyFatHistogram, BODY_FAT_PERCENTILES, BODY_FAT_SCALE),
+            'weightByAge': weightByAge,
+        }
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Returning fitness goal completion (a goal is complete once it has a dateAchieved) for members who set at least one goal:
+    #   {'members': n, 'goals': n, 'achieved': n, 'rate': fraction or None, 'membersAnyAchieved': n, 'membersAllAchieved': n,
+    #    'byAge': [(bracket, members, goals, achieved, rate), ...]}
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def goalCompletion(self):
+        brackets = len(AGE_BRACKET_LABELS)
+        membersByAge = numpy.zeros(brackets, numpy.int64)
+        goalsByAge = numpy.zeros(brackets, numpy.int64)
+        achievedByAge = numpy.zeros(brackets, numpy.int64)
+        anyAchieved = allAchieved = 0
+
+        def accumulate(chunk):
+            nonlocal anyAchieved, allAchieved
+            bracket, goals, achieved = ageBrackets(chunk['age']), chunk['goals'], chunk['achieved']
+            membersByAge[:] += numpy.bincount(bracket, minlength=brackets)
+            goalsByAge[:] += numpy.bincount(bracket, weights=goals, minlength=brackets).astype(numpy.int64)
+            achievedByAge[:] += numpy.bincount(bracket, weights=achieved, minlength=brackets).astype(numpy.int64)
+            anyAchieved += int(numpy.count_nonzero(achieved))
+            allAchieved += int(numpy.count_nonzero(achieved == goals))
+
+        members = self._stream(MEMBER_GOALS_QUERY, [('age', 'i2'), ('goals', 'i4'), ('achieved', 'i4')], accumulate)
+        goals, achieved = int(goalsByAge.sum()), int(achievedByAge.sum())
+
+        return {
+            'members': members,
+            'goals': goals,
+            'achieved': achieved,
+            'rate': achieved / goals if goals else None,
+            'membersAnyAchieved': anyAchieved,
+            'membersAllAchieved': allAchieved,
+            'byAge': [(AGE_BRACKET_LABELS[bracket], int(membersByAge[bracket]), int(goalsByAge[bracket]), int(achievedByAge[bracket]), int(achievedByAge[bracket]) / int(goalsByAge[bracket]))
+                      for bracket in range(brackets) if goalsByAge[bracket]],
+        }
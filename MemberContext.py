@@ -0,0 +1,139 @@
+import time
+from datetime import date as dateType
+
+from PreparedStatements import PreparedStatement
+from ScheduleIndex import IntervalList, toDate, toTime
+
+
+# A member's classes, waitlist entries and PT sessions from fromDate on, in one round trip, as
+# (kind, id, name, trainer lName, date, startTime, endTime, waitlist position) rows. For sessions the name is the trainer's fName.
+loadMemberSchedule = PreparedStatement('member_schedule', """
+    SELECT 'class'::text, Class.classId, Class.className, NULL::varchar, Class.classDate, Class.startTime, Class.endTime, NULL::bigint
+    FROM MemberTakesClass JOIN Class ON MemberTakesClass.classId = Class.classId
+    WHERE MemberTakesClass.userId = $1::int AND Class.classDate >= $2::date
+    UNION ALL
+    SELECT 'waitlist'::text, Class.classId, Class.className, NULL::varchar, Class.classDate, Class.startTime, Class.endTime,
+           (SELECT COUNT(*) FROM ClassWaitlist ahead WHERE ahead.classId = ClassWaitlist.classId AND ahead.waitlistId <= ClassWaitlist.waitlistId)
+    FROM ClassWaitlist JOIN Class ON ClassWaitlist.classId = Class.classId
+    WHERE ClassWaitlist.userId = $1::int AND Class.classDate >= $2::date
+    UNION ALL
+    SELECT 'session'::text, PersonalTrainingSession.sessionId, PersonalTrainer.fName, PersonalTrainer.lName, PersonalTrainingSession.sessionDate,
+           PersonalTrainingSession.startTime, PersonalTrainingSession.endTime, NULL::bigint
+    FROM PersonalTrainingSession JOIN PersonalTrainer ON PersonalTrainingSession.trainerId = PersonalTrainer.trainerId
+    WHERE PersonalTrainingSession.userId = $1::int AND PersonalTrainingSession.sessionDate >= $2::date
+""")
+
+
+#----------------------------------------------------------------------------------------------------------------------------------------
+# Defining the MemberContext class which holds what one logged-in member's session keeps asking for: who they are (their Member row
+# from login) and their upcoming schedule, i.e. the classes they're registered in or waiting on and their PT sessions from the day the
+# schedule was loaded. The schedule is loaded with one query the first time it's needed and kept current by ClubService updating it in
+# place after each registration, deregistration, booking and cancellation made through the context, so the schedule screens list it
+# and check new bookings against it without going back to the database. It is reloaded after maxAge seconds to pick up changes made
+# elsewhere (e.g. being moved off a waitlist). Each session has its own context, so it isn't shared between threads.
+#
+# Dates before the schedule's first day aren't covered (see covers()); ClubService falls back to its schedule index for those.
+#----------------------------------------------------------------------------------------------------------------------------------------
+class MemberContext:
+    def __init__(self, connectionPool, member, maxAge=30.0):
+        self.connectionPool = connectionPool
+        self.member = member
+        self.userId = member[0]
+        self.maxAge = maxAge
+
+        self._loadedAt = None
+        self._fromDate = None
+        # classId -> (classId, className, classDate, startTime, endTime), plus the waitlist position for waitlisted classes
+        self._classes = {}
+        self._waitlisted = {}
+        # sessionId -> (sessionId, trainer fName, trainer lName, sessionDate, startTime, endTime)
+        self._sessions = {}
+        # date -> IntervalList of ('class', classId) and ('session', sessionId), like the member days of the schedule index
+        self._busy = {}
+
+    # The listings return rows in the same shape as ClubService.listRegisteredClasses/listWaitlistedClasses/listPtSessions, upcoming only
+    def registeredClasses(self):
+        self._ensureLoaded()
+        return sorted(self._classes.values(), key=lambda row: (row[2], row[3], row[0]))
+
+    def waitlistedClasses(self):
+        self._ensureLoaded()
+        return sorted(self._waitlisted.values(), key=lambda row: (row[2], row[3], row[0]))
+
+    def ptSessions(self):
+        self._ensureLoaded()
+        return sorted(self._sessions.values(), key=lambda row: (row[3], row[4], row[0]))
+
+    def covers(self, date):
+        self._ensureLoaded()
+        return toDate(date) >= self._fromDate
+
+    # Returns the (startTime, endTime, ref) of the member's classes and sessions overlapping [startTime, endTime] on a covered date
+    def conflicts(self, date, startTime, endTime):
+        self._ensureLoaded()
+        intervals = self._busy.get(toDate(date))
+        return intervals.overlapping(toTime(startTime), toTime(endTime)) if intervals is not None else []
+
+    #------------------------------------------------------------------------------------------------------------
+    # Keeping the schedule current after ClubService commits a change. Changes before the schedule's first day are
+    # ignored, and nothing is recorded before the first load (which will see the change anyway).
+    #------------------------------------------------------------------------------------------------------------
+    def addClass(self, classId, className, classDate, startTime, endTime):
+        if self._tracks(classDate):
+            self._waitlisted.pop(classId, None)
+            self._classes[classId] = (classId, className, toDate(classDate), toTime(startTime), toTime(endTime))
+            self._busy.setdefault(toDate(classDate), IntervalList()).add(toTime(startTime), toTime(endTime), ('class', classId))
+
+    def addWaitlisted(self, classId, className, classDate, startTime, endTime, position):
+        if self._tracks(classDate):
+            self._waitlisted[classId] = (classId, className, toDate(classDate), toTime(startTime), toTime(endTime), position)
+
+    def removeClass(self, classId):
+        if self._loadedAt is None:
+            return
+        self._waitlisted.pop(classId, None)
+        removed = self._classes.pop(classId, None)
+        if removed is not None:
+            self._busy[removed[2]].remove(('class', classId))
+
+    def addSession(self, sessionId, trainerFName, trainerLName, sessionDate, startTime, endTime):
+        if self._tracks(sessionDate):
+            self._sessions[sessionId] = (sessionId, trainerFName, trainerLName, toDate(sessionDate), toTime(startTime), toTime(endTime))
+            self._busy.setdefault(toDate(sessionDate), IntervalList()).add(toTime(startTime), toTime(endTime), ('session', sessionId))
+
+    def removeSession(self, sessionId):
+        if self._loadedAt is None:
+            return
+        removed = self._sessions.pop(sessionId, None)
+        if removed is not None:
+            self._busy[removed[3]].remove(('session', sessionId))
+
+    # Dropping the schedule so it's reloaded on next use (e.g. after a change failed because the context was out of date)
+    def invalidate(self):
+        self._loadedAt = None
+
+    def _tracks(self, date):
+        return self._loadedAt is not None and toDate(date) >= self._fromDate
+
+    def _ensureLoaded(self):
+        if self._loadedAt is not None and time.monotonic() - self._loadedAt <= self.maxAge:
+            return
+
+        fromDate = dateType.today()
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            loadMemberSchedule.execute(cursor, (self.userId, fromDate))
+            rows = cursor.fetchall()
+
+        self._classes, self._waitlisted, self._sessions, self._busy = {}, {}, {}, {}
+        for kind, refId, name, lName, day, startTime, endTime, position in rows:
+            if kind == 'class':
+                self._classes[refId] = (refId, name, day, startTime, endTime)
+            elif kind == 'waitlist':
+                self._waitlisted[refId] = (refId, name, day, startTime, endTime, position)
+            else:
+                self._sessions[refId] = (refId, name, lName, day, startTime, endTime)
+            if kind != 'waitlist':
+                self._busy.setdefault(day, IntervalList()).add(startTime, endTime, ('session' if kind == 'session' else 'class', refId))
+
+        self._fromDate = fromDate
+        self._loadedAt = time.monotonic()
@@ -0,0 +1,103 @@
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Shared keyset pagination for the app's listings. Instead of SELECTing a whole table, a listing fetches one page at a time ordered by
+# its key columns, and the next page starts strictly after the last key seen (WHERE (keys) > (lastKeys)), so every page costs the same
+# index range scan no matter how deep into the table it is, unlike OFFSET which re-reads every skipped row.
+#-------------------------------------------------------------------------------------------------------------------------------------
+
+DEFAULT_PAGE_SIZE = 20
+
+
+#---------------------------------------------------------------------------------------------------------------------
+# A filter is a (sqlFragment, params) pair that gets ANDed into a listing's WHERE clause. These build the common ones.
+#---------------------------------------------------------------------------------------------------------------------
+def equals(column, value):
+    return (f"{column} = %s", (value,))
+
+def dateRange(column, fromDate=None, toDate=None):
+    # Either end can be left open. Both ends are inclusive.
+    filters = []
+    if fromDate is not None:
+        filters.append((f"{column} >= %s", (fromDate,)))
+    if toDate is not None:
+        filters.append((f"{column} <= %s", (toDate,)))
+    return filters
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Defining the Page class which holds one page of rows and the cursor (the last row's key values) to pass in to get the next page.
+# nextAfter is None on the last page.
+#-------------------------------------------------------------------------------------------------------------------------------------
+class Page:
+    def __init__(self, rows, nextAfter):
+        self.rows = rows
+        self.nextAfter = nextAfter
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Defining the KeysetListing class which describes one listing: the columns it shows, where they come from, and the key columns that
+# give it a unique ascending order (always end the keys with a primary key so ties can't skip or repeat rows).
+#-------------------------------------------------------------------------------------------------------------------------------------
+class KeysetListing:
+    def __init__(self, columns, fromClause, keyColumns):
+        self.columns = columns
+        self.fromClause = fromClause
+        self.keyColumns = list(keyColumns)
+
+    def fetchPage(self, cursor, filters=(), after=None, pageSize=DEFAULT_PAGE_SIZE):
+        conditions = []
+        params = []
+        for fragment, fragmentParams in filters:
+            conditions.append(fragment)
+            params.extend(fragmentParams)
+
+        keys = ", ".join(self.keyColumns)
+        if after is not None:
+            conditions.append(f"({keys}) > ({', '.join(['%s'] * len(self.keyColumns))})")
+            params.extend(after)
+
+        # The key columns are selected after the listed columns so we can build the next cursor, and one extra row tells us if there's a next page
+        query = f"SELECT {self.columns}, {keys} FROM {self.fromClause}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {keys} LIMIT %s"
+        params.append(pageSize + 1)
+
+        cursor.execute(query, params)
+        fetched = cursor.fetchall()
+
+        keyCount = len(self.keyColumns)
+        rows = [row[:-keyCount] for row in fetched[:pageSize]]
+        nextAfter = tuple(fetched[pageSize - 1][-keyCount:]) if len(fetched) > pageSize else None
+        return Page(rows, nextAfter)
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Defining the browsePages helper function which prints a listing one page at a time for the interactive menus. fetchPage(after) must
+# return a Page. If a prompt is given, it is asked after each page (with an N option while there are more pages) and the answer is
+# returned, so the user can pick an ID from whichever page they're looking at. Returns None if the listing was empty.
+#-------------------------------------------------------------------------------------------------------------------------------------
+def browsePages(fetchPage, printRow, prompt=None, emptyMessage="Nothing to show."):
+    after = None
+    shownAny = False
+    while True:
+        page = fetchPage(after)
+
+        if not page.rows and not shownAny:
+            print(emptyMessage)
+            return None
+        shownAny = True
+
+        for row in page.rows:
+            printRow(row)
+
+        if page.nextAfter is None:
+            return input(prompt) if prompt is not None else None
+
+        if prompt is not None:
+            answer = input(f"{prompt.rstrip().rstrip(':')} (or N for the next page): ")
+        else:
+            answer = input("Enter N for the next page or anything else to continue: ")
+        if answer.strip().upper() != 'N':
+            return answer if prompt is not None else None
+
+        after = page.nextAfter
@@ -0,0 +1,95 @@
+import csv
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+
+# The paymentStatus values allowed by the validStatus constraint, and the changes allowed between them: a bill awaiting payment is
+# either paid or cancelled, and a paid bill can be refunded (Returned). Cancelled and Returned are final.
+PAYMENT_STATUSES = ('Awaiting Payment', 'Paid', 'Returned', 'Cancelled')
+PAYMENT_TRANSITIONS = (('Awaiting Payment', 'Paid'), ('Awaiting Payment', 'Cancelled'), ('Paid', 'Returned'))
+
+SETTLEMENT_FORMATS = ('csv', 'jsonl')
+
+# Columns (CSV header names / JSON keys) of a settlement file. amount and settledAt may be left out or empty; when amount is given it
+# has to match the bill, and settledAt (ISO 8601) becomes the bill's statusUpdateDate.
+SETTLEMENT_FIELDS = ('billNumber', 'paymentStatus', 'amount', 'settledAt')
+
+# Why a settlement line wasn't applied. The ones found in the file itself are decided here; the rest by ClubService.reconcilePayments.
+INVALID_LINE = "unreadable line"
+INVALID_BILL_NUMBER = "invalid bill number"
+INVALID_STATUS = "invalid payment status"
+INVALID_AMOUNT = "invalid amount"
+INVALID_SETTLED_AT = "invalid settlement time"
+DUPLICATE_BILL = "bill already settled earlier in the file"
+UNKNOWN_BILL = "no such bill"
+AMOUNT_MISMATCH = "amount doesn't match the bill"
+INVALID_TRANSITION = "status change not allowed"
+CHANGED_CONCURRENTLY = "bill changed while reconciling"
+
+_statusesByName = {status.lower(): status for status in PAYMENT_STATUSES}
+
+
+def _records(file, fileFormat):
+    if fileFormat == 'csv':
+        reader = csv.DictReader(file)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for lineNumber, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield lineNumber, record if isinstance(record, dict) else None
+
+def _text(record, field):
+    value = record.get(field)
+    return "" if value is None else str(value).strip()
+
+# Returns (lineNumber, billNumber, paymentStatus, amount, settledAt), or the reason the record is invalid
+def _parse(lineNumber, record):
+    if record is None:
+        return INVALID_LINE
+
+    billNumber = _text(record, 'billNumber')
+    if not (billNumber.isascii() and billNumber.isdigit()) or int(billNumber) > 2 ** 31 - 1:
+        return INVALID_BILL_NUMBER
+
+    paymentStatus = _statusesByName.get(_text(record, 'paymentStatus').lower())
+    if paymentStatus is None:
+        return INVALID_STATUS
+
+    amount = _text(record, 'amount') or None
+    if amount is not None:
+        try:
+            amount = Decimal(amount)
+        except InvalidOperation:
+            return INVALID_AMOUNT
+        if not (amount.is_finite() and 0 <= amount < 100000 and amount == amount.quantize(Decimal('0.01'))):
+            return INVALID_AMOUNT
+
+    settledAt = _text(record, 'settledAt') or None
+    if settledAt is not None:
+        try:
+            settledAt = datetime.fromisoformat(settledAt)
+        except ValueError:
+            return INVALID_SETTLED_AT
+
+    return lineNumber, int(billNumber), paymentStatus, amount, settledAt
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Streaming the settlement records of a CSV (with a header row) or JSONL file as (lineNumber, billNumber, paymentStatus, amount,
+# settledAt) tuples, ready for COPY. Records that can't be used are not yielded; onReject(lineNumber, billNumber, paymentStatus, reason)
+# is called for each of them instead, with whatever of the bill number and status could be read.
+#-------------------------------------------------------------------------------------------------------------------------------------
+def readSettlementFile(file, fileFormat, onReject):
+    for lineNumber, record in _records(file, fileFormat):
+        parsed = _parse(lineNumber, record)
+        if isinstance(parsed, tuple):
+            yield parsed
+        else:
+            onReject(lineNumber, _text(record, 'billNumber') if record else "", _text(record, 'paymentStatus') if record else "", parsed)
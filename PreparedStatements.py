@@ -0,0 +1,69 @@
+import re
+import threading
+import weakref
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Every PreparedStatement created, by name. Names are global to a PostgreSQL session, so they have to be unique across the app.
+#-------------------------------------------------------------------------------------------------------------------------------------
+registry = {}
+
+# connection -> set of statement names already prepared on it. Keyed weakly so closed connections (and their names) simply drop out.
+_preparedOn = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Defining the PreparedStatement class for the hot queries that run the same SQL over and over (schedule loads behind the conflict
+# checks, login lookups, booking listings). The first time a pooled connection runs one it issues PREPARE, and every later run on
+# that connection is an EXECUTE by name, so PostgreSQL skips parsing and can reuse its cached plan.
+# The query uses PostgreSQL's $1, $2, ... placeholders; execute() takes the parameters in that order.
+#-------------------------------------------------------------------------------------------------------------------------------------
+class PreparedStatement:
+    def __init__(self, name, query):
+        if name in registry:
+            raise ValueError(f"A prepared statement named {name} already exists")
+
+        self.name = name
+        self.query = query
+        self.parameterCount = max((int(number) for number in re.findall(r"\$(\d+)", query)), default=0)
+        self._execute = f"EXECUTE {name}" + (f" ({', '.join(['%s'] * self.parameterCount)})" if self.parameterCount else "")
+
+        # Executions that found the statement already prepared on their connection (hits) vs. ones that had to prepare it (misses)
+        self.hits = 0
+        self.misses = 0
+
+        registry[name] = self
+
+    def execute(self, cursor, parameters=()):
+        if len(parameters) != self.parameterCount:
+            raise ValueError(f"{self.name} takes {self.parameterCount} parameters, got {len(parameters)}")
+
+        connection = cursor.connection
+        with _lock:
+            prepared = _preparedOn.setdefault(connection, set())
+            alreadyPrepared = self.name in prepared
+
+        if not alreadyPrepared:
+            # Prepared statements belong to the session, not the transaction, so a later rollback doesn't undo this
+            cursor.execute(f"PREPARE {self.name} AS {self.query}")
+            with _lock:
+                prepared.add(self.name)
+
+        cursor.execute(self._execute, parameters)
+
+        with _lock:
+            if alreadyPrepared:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Returning (name, hits, misses, hit rate) for every statement that has run, most executed first. Shown in the query summary.
+#-------------------------------------------------------------------------------------------------------------------------------------
+def statementStats():
+    with _lock:
+        stats = [(statement.name, statement.hits, statement.misses) for statement in registry.values() if statement.hits or statement.misses]
+    stats.sort(key=lambda stat: stat[1] + stat[2], reverse=True)
+    return [(name, hits, misses, hits / (hits + misses)) for name, hits, misses in stats]
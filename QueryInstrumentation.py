@@ -0,0 +1,221 @@
+import atexit
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+
+from psycopg2 import extensions, sql
+
+import PreparedStatements
+from ReferenceData import referenceDataStats
+from Transactions import transactionStats
+
+
+# Upper bounds (ms) of the latency histogram buckets. Anything slower than the last one lands in a final overflow bucket.
+HISTOGRAM_BOUNDS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000]
+
+# Frames from these files are plumbing around a statement, not the code that asked for it, so they are skipped when finding the caller
+PLUMBING_FILES = {'QueryInstrumentation.py', 'PreparedStatements.py', 'DatabasePool.py', 'Pagination.py', 'contextlib.py'}
+
+# The file holding the interactive menus. The innermost function from it is the menu action a statement ran for.
+MENU_FILE = 'HealthAndFitnessClub.py'
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Turning a statement into its shape so every execution of it is counted together: parameters and literals become ?, whitespace is
+# collapsed, and the repeated VALUES groups execute_values builds are folded into one. Only normalized text is ever logged, so
+# passwords and other parameters never end up in the slow-query log.
+#-------------------------------------------------------------------------------------------------------------------------------------
+@lru_cache(maxsize=2048)
+def normalizeStatement(statement):
+    statement = re.sub(r"%\(\w+\)s|%s", "?", statement)
+    statement = re.sub(r"'(?:[^']|'')*'", "?", statement)
+    statement = re.sub(r"\b\d+(?:\.\d+)?\b", "?", statement)
+    statement = re.sub(r"\s+", " ", statement).strip().rstrip(';')
+    return re.sub(r"(\([?, ]*\))(?:\s*,\s*\([?, ]*\))+", r"\1, ...", statement)
+
+
+def statementText(query, cursor):
+    if isinstance(query, sql.Composable):
+        query = query.as_string(cursor)
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    return query
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Finding who issued the statement: the innermost non-plumbing function (e.g. checkTrainerAvailability) and the menu action it ran
+# under (e.g. userRegisterPtSession). The action is None outside the menus (scripts, the benchmark suite).
+#-------------------------------------------------------------------------------------------------------------------------------------
+def findCaller():
+    function = None
+    action = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        fileName = os.path.basename(code.co_filename)
+        if function is None and fileName not in PLUMBING_FILES and 'psycopg2' not in code.co_filename:
+            function = code.co_name
+        if fileName == MENU_FILE and code.co_name != '<module>':
+            action = code.co_name
+            break
+        frame = frame.f_back
+    return function or '<unknown>', action
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Defining the LatencyHistogram class which keeps a fixed set of buckets, so memory stays the same however many statements run.
+#-------------------------------------------------------------------------------------------------------------------------------------
+class LatencyHistogram:
+    def __init__(self):
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+
+    def add(self, milliseconds, rows):
+        position = 0
+        while position < len(HISTOGRAM_BOUNDS) and milliseconds > HISTOGRAM_BOUNDS[position]:
+            position += 1
+        self.buckets[position] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+        self.rows += max(rows, 0)
+
+    # Upper bound of the bucket holding the given fraction of the samples (the max for the overflow bucket)
+    def percentile(self, fraction):
+        target = fraction * self.count
+        seen = 0
+        for position, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target and count:
+                return HISTOGRAM_BOUNDS[position] if position < len(HISTOGRAM_BOUNDS) else self.max
+        return 0.0
+
+    def describe(self):
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS] + [f">{HISTOGRAM_BOUNDS[-1]}ms"]
+        return " ".join(f"{label}:{count}" for label, count in zip(labels, self.buckets) if count)
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Defining the QueryRecorder class which collects every statement run through an instrumented connection: a histogram per calling
+# function, per (function, statement) pair and per menu action, plus a slow-query log of everything above the threshold.
+#-------------------------------------------------------------------------------------------------------------------------------------
+class QueryRecorder:
+    def __init__(self, slowQueryThreshold=0.2, slowQueryLogPath=None):
+        self.slowQueryThreshold = slowQueryThreshold * 1000
+        self.slowQueryLogPath = slowQueryLogPath
+        self.started = time.monotonic()
+
+        self.functions = {}
+        self.statements = {}
+        self.actions = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement, milliseconds, rows):
+        function, action = findCaller()
+        normalized = normalizeStatement(statement)
+
+        with self._lock:
+            self.functions.setdefault(function, LatencyHistogram()).add(milliseconds, rows)
+            self.statements.setdefault((function, normalized), LatencyHistogram()).add(milliseconds, rows)
+            if action is not None:
+                self.actions.setdefault(action, LatencyHistogram()).add(milliseconds, rows)
+
+            if self.slowQueryLogPath and milliseconds >= self.slowQueryThreshold:
+                with open(self.slowQueryLogPath, 'a') as slowQueryLog:
+                    slowQueryLog.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} {milliseconds:.1f} ms rows={rows} {function} ({action or '-'}): {normalized}\n")
+
+    #---------------------------------------------------------------------------------------------------------------------------------
+    # Writing the summary: functions and menu actions by total database time, then the statements issued most often per function
+    # (a high count with a low mean is usually an N+1 loop), then the plan cache hit rate of each prepared statement and the
+    # booking transactions' conflict/retry counts.
+    #---------------------------------------------------------------------------------------------------------------------------------
+    def writeSummary(self, stream=None, topStatements=15):
+        stream = stream or sys.__stderr__
+        with self._lock:
+            functions = sorted(self.functions.items(), key=lambda item: item[1].total, reverse=True)
+            actions = sorted(self.actions.items(), key=lambda item: item[1].total, reverse=True)
+            statements = sorted(self.statements.items(), key=lambda item: item[1].count, reverse=True)[:topStatements]
+
+        if not functions:
+            return
+
+        stream.write(f"\nQuery summary ({time.monotonic() - self.started:.0f}s)\n")
+        for title, histograms in (("function", functions), ("menu action", actions)):
+            if not histograms:
+                continue
+            stream.write(f"{title:<32}{'stmts':>8}{'total ms':>12}{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}{'rows':>10}  histogram\n")
+            for name, histogram in histograms:
+                stream.write(f"{name:<32}{histogram.count:>8}{histogram.total:>12.1f}{histogram.total / histogram.count:>10.2f}{histogram.percentile(0.95):>10.1f}{histogram.max:>10.1f}{histogram.rows:>10}  {histogram.describe()}\n")
+            stream.write("\n")
+
+        stream.write("Most frequent statements\n")
+        for (function, statement), histogram in statements:
+            stream.write(f"{histogram.count:>8} x {histogram.total / histogram.count:.2f} ms  {function}: {statement[:160]}\n")
+
+        # A miss is an execution that had to PREPARE the statement on its connection first; every hit reused the parsed statement and cached plan
+        preparedStats = PreparedStatements.statementStats()
+        if preparedStats:
+            stream.write(f"\n{'prepared statement':<32}{'hits':>8}{'misses':>8}{'hit rate':>10}\n")
+            for name, hits, misses, hitRate in preparedStats:
+                stream.write(f"{name:<32}{hits:>8}{misses:>8}{hitRate:>10.1%}\n")
+
+        # Serialization failures and deadlocks in the booking transactions, and how many of them were retried or given up on
+        transactions = transactionStats.snapshot()
+        if transactions['commits'] or transactions['conflicts']:
+            stream.write(f"\nbooking transactions: {transactions['commits']} committed, {transactions['conflicts']} conflicts, {transactions['retries']} retried, {transactions['givenUp']} given up\n")
+
+        # Lookups of rooms, exercises, trainers and equipment answered from the reference data cache (hits) or the database (misses)
+        referenceData = referenceDataStats.snapshot()
+        if referenceData['hits'] or referenceData['misses']:
+            stream.write(f"\nreference data cache: {referenceData['hits']} hits, {referenceData['misses']} misses, {referenceData['evictions']} evicted, {referenceData['invalidations']} invalidations\n")
+        stream.flush()
+
+    def writeSummaryAtExit(self, summaryPath=None):
+        def writeSummary():
+            if summaryPath:
+                with open(summaryPath, 'w') as summaryFile:
+                    self.writeSummary(summaryFile)
+            else:
+                self.writeSummary()
+        atexit.register(writeSummary)
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Returning a psycopg2 connection class (for ConnectionPool's connectionFactory) whose cursors report every statement to the recorder.
+#-------------------------------------------------------------------------------------------------------------------------------------
+def instrumentedConnection(recorder):
+    class InstrumentedCursor(extensions.cursor):
+        def execute(self, query, vars=None):
+            started = time.perf_counter()
+            try:
+                return super().execute(query, vars)
+            finally:
+                recorder.record(statementText(query, self), (time.perf_counter() - started) * 1000, self.rowcount)
+
+        def executemany(self, query, vars_list):
+            started = time.perf_counter()
+            try:
+                return super().executemany(query, vars_list)
+            finally:
+                recorder.record(statementText(query, self), (time.perf_counter() - started) * 1000, self.rowcount)
+
+        def copy_expert(self, sql, file, size=8192):
+            started = time.perf_counter()
+            try:
+                return super().copy_expert(sql, file, size)
+            finally:
+                recorder.record(statementText(sql, self), (time.perf_counter() - started) * 1000, self.rowcount)
+
+    class InstrumentedConnection(extensions.connection):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.cursor_factory = InstrumentedCursor
+
+    return InstrumentedConnection
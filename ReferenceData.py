@@ -0,0 +1,211 @@
+import collections
+import select
+import threading
+import time
+
+import psycopg2
+
+
+# The NOTIFY channel migration 007's triggers signal on, with the changed table's name as the payload
+REFERENCE_DATA_CHANNEL = 'reference_data'
+
+# The cached tables, as named in the notifications (unquoted table names are lower case in PostgreSQL)
+ROOM = 'room'
+EXERCISE = 'exercise'
+TRAINER = 'personaltrainer'
+EQUIPMENT = 'equipment'
+
+LISTEN_POLL_INTERVAL = 5.0 # seconds the listener waits for a notification before checking whether it has been closed
+LISTEN_RETRY_DELAY = 5.0 # seconds before reconnecting after the listening connection was lost
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Counters for every ReferenceDataCache, shown in the query summary. A miss is a lookup that had to query the database (including ones
+# made while the cache wasn't listening and so couldn't keep what it read); an invalidation is a table dropped from the cache.
+#-------------------------------------------------------------------------------------------------------------------------------------
+class ReferenceDataStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def snapshot(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'invalidations': self.invalidations}
+
+
+referenceDataStats = ReferenceDataStats()
+
+
+#----------------------------------------------------------------------------------------------------------------------------------------
+# Defining the ReferenceDataCache class, a process-wide read-through cache for the tables that hardly ever change (rooms, exercises,
+# trainers and equipment) so the screens that show or check them don't query them on every use. Entries are (table, key) -> value,
+# loaded by the caller's function on a miss, and bounded two ways: each expires ttl seconds after it was loaded, and only the maxEntries
+# most recently used are kept.
+#
+# Every process stays coherent through LISTEN/NOTIFY: the statement-level triggers from migration 007 send the changed table's name on
+# REFERENCE_DATA_CHANNEL when a change commits, and a background thread listening on its own connection drops that table's entries.
+# The thread starts on first use, so creating the cache doesn't touch the database. While it isn't listening (before it has connected,
+# or after its connection was lost) values are read straight from the database and not kept, and everything is dropped again once it
+# listens, so a missed notification can't leave a stale entry behind. A load that overlaps an invalidation of its table isn't kept
+# either, since it may have read the old rows.
+#
+# Writers in this process should also call invalidate() after committing, so their own next read doesn't race the notification.
+#----------------------------------------------------------------------------------------------------------------------------------------
+class ReferenceDataCache:
+    def __init__(self, connectionPool, ttl=300.0, maxEntries=1024):
+        self.connectionPool = connectionPool
+        self.ttl = ttl
+        self.maxEntries = maxEntries
+
+        # (table, key) -> (loadedAt, value), least recently used first
+        self._entries = collections.OrderedDict()
+        # Bumped whenever a table (or, for _epoch, everything) is invalidated, so loads that overlapped it aren't kept
+        self._generations = {}
+        self._epoch = 0
+        self._listening = False
+        self._lock = threading.Lock()
+
+        self._listener = None
+        self._closed = threading.Event()
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Returning the value cached for (table, key), or calling load() for it and caching what it returns.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def get(self, table, key, load):
+        self._startListener()
+        with self._lock:
+            found, value = self._lookup(table, key)
+            version = self._version(table)
+        if found:
+            referenceDataStats.count('hits')
+            return value
+
+        referenceDataStats.count('misses')
+        value = load()
+        with self._lock:
+            self._store(table, {key: value}, version)
+        return value
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Returning {key: value} for the keys of one table, calling loadMany(missingKeys) once for the ones that aren't cached. Keys
+    # loadMany doesn't return a value for are left out (and not cached).
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def getMany(self, table, keys, loadMany):
+        self._startListener()
+        values, missing = {}, []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                found, value = self._lookup(table, key)
+                if found:
+                    values[key] = value
+                else:
+                    missing.append(key)
+            version = self._version(table)
+
+        referenceDataStats.count('hits', len(values))
+        if missing:
+            referenceDataStats.count('misses', len(missing))
+            loaded = loadMany(missing)
+            with self._lock:
+                self._store(table, loaded, version)
+            values.update(loaded)
+        return values
+
+    # Dropping everything cached for the table (or for every table)
+    def invalidate(self, table=None):
+        with self._lock:
+            self._invalidate(table)
+
+    # Stopping the listener (within LISTEN_POLL_INTERVAL). The cache keeps working, reading straight from the database.
+    def close(self):
+        self._closed.set()
+
+    def _lookup(self, table, key):
+        entry = self._entries.get((table, key))
+        if entry is None:
+            return False, None
+        if time.monotonic() - entry[0] > self.ttl:
+            del self._entries[(table, key)]
+            return False, None
+        self._entries.move_to_end((table, key))
+        return True, entry[1]
+
+    def _version(self, table):
+        return self._listening, self._epoch, self._generations.get(table, 0)
+
+    def _store(self, table, values, version):
+        if not version[0] or version != self._version(table):
+            return
+        loadedAt = time.monotonic()
+        for key, value in values.items():
+            self._entries[(table, key)] = (loadedAt, value)
+            self._entries.move_to_end((table, key))
+        while len(self._entries) > self.maxEntries:
+            self._entries.popitem(last=False)
+            referenceDataStats.count('evictions')
+
+    def _invalidate(self, table):
+        if table is None:
+            self._epoch += 1
+            dropped = list(self._entries)
+        else:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            dropped = [entryKey for entryKey in self._entries if entryKey[0] == table]
+        for entryKey in dropped:
+            del self._entries[entryKey]
+        referenceDataStats.count('invalidations')
+
+    def _setListening(self, listening):
+        with self._lock:
+            self._listening = listening
+            self._invalidate(None)
+
+    def _startListener(self):
+        if self._listener is not None or self._closed.is_set():
+            return
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(target=self._listen, name='ReferenceDataListener', daemon=True)
+        self._listener.start()
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # The listener thread. It holds its own autocommit connection (not a pooled one, since LISTEN belongs to the session) and waits on
+    # its socket for notifications, reconnecting after LISTEN_RETRY_DELAY if the connection is lost.
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def _listen(self):
+        while not self._closed.is_set():
+            connection = None
+            try:
+                connection = psycopg2.connect(self.connectionPool.connectionString)
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {REFERENCE_DATA_CHANNEL}")
+                self._setListening(True)
+
+                while not self._closed.is_set():
+                    if select.select([connection], [], [], LISTEN_POLL_INTERVAL) == ([], [], []):
+                        continue
+                    connection.poll()
+                    tables = {notification.payload for notification in connection.notifies}
+                    connection.notifies.clear()
+                    for table in tables:
+                        self.invalidate(table)
+            except (psycopg2.Error, OSError):
+                pass
+            finally:
+                self._setListening(False)
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except psycopg2.Error:
+                        pass
+
+            self._closed.wait(LISTEN_RETRY_DELAY)
@@ -0,0 +1,64 @@
+-- Migration 001: database-enforced overlap prevention for bookings.
+-- Adds a generated timestamp range to each bookable table and a GiST exclusion constraint so two overlapping rows for the same room/trainer/member can never both be committed, even with concurrent writers.
+-- The ranges are inclusive ('[]') to match the app's existing BETWEEN checks, so back-to-back bookings (10:00-11:00 and 11:00-12:00) are still treated as overlapping.
+-- These constraints only cover overlaps within one table. A member in two overlapping classes or in a class and a PT session at once, and a trainer with a class and a PT session at the same time, are NOT enforced here: the conflict re-checks the app runs inside its booking transactions are the only guard for those (see Concurrent Bookings in the README).
+-- Equality on the id columns uses int4range(id, id, '[]') WITH = so this works with the core GiST range operator class and doesn't need the btree_gist extension.
+-- Safe to run more than once. It will fail (and roll back) if the existing data already contains overlapping rows, which have to be cleaned up first.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS SchemaMigration (
+    version INT PRIMARY KEY,
+    migrationName VARCHAR(100) NOT NULL,
+    appliedOn TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE RoomBookings
+    ADD COLUMN IF NOT EXISTS bookingSlot tsrange GENERATED ALWAYS AS (tsrange(bookingDate + startTime, bookingDate + endTime, '[]')) STORED;
+
+ALTER TABLE TrainerAvailability
+    ADD COLUMN IF NOT EXISTS availabilitySlot tsrange GENERATED ALWAYS AS (tsrange(availabilityDate + startTime, availabilityDate + endTime, '[]')) STORED;
+
+ALTER TABLE Class
+    ADD COLUMN IF NOT EXISTS classSlot tsrange GENERATED ALWAYS AS (tsrange(classDate + startTime, classDate + endTime, '[]')) STORED;
+
+ALTER TABLE PersonalTrainingSession
+    ADD COLUMN IF NOT EXISTS sessionSlot tsrange GENERATED ALWAYS AS (tsrange(sessionDate + startTime, sessionDate + endTime, '[]')) STORED;
+
+DO $$
+BEGIN
+    -- A room can't be booked twice at the same time
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'roombookings_no_overlap') THEN
+        ALTER TABLE RoomBookings ADD CONSTRAINT roombookings_no_overlap
+            EXCLUDE USING gist (int4range(roomNumber, roomNumber, '[]') WITH =, bookingSlot WITH &&);
+    END IF;
+
+    -- A trainer can't have two overlapping availability entries
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'traineravailability_no_overlap') THEN
+        ALTER TABLE TrainerAvailability ADD CONSTRAINT traineravailability_no_overlap
+            EXCLUDE USING gist (int4range(trainerId, trainerId, '[]') WITH =, availabilitySlot WITH &&);
+    END IF;
+
+    -- A trainer can't teach two overlapping classes
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'class_trainer_no_overlap') THEN
+        ALTER TABLE Class ADD CONSTRAINT class_trainer_no_overlap
+            EXCLUDE USING gist (int4range(trainerId, trainerId, '[]') WITH =, classSlot WITH &&);
+    END IF;
+
+    -- Neither the trainer nor the member can be in two overlapping PT sessions
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'personaltrainingsession_trainer_no_overlap') THEN
+        ALTER TABLE PersonalTrainingSession ADD CONSTRAINT personaltrainingsession_trainer_no_overlap
+            EXCLUDE USING gist (int4range(trainerId, trainerId, '[]') WITH =, sessionSlot WITH &&);
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'personaltrainingsession_member_no_overlap') THEN
+        ALTER TABLE PersonalTrainingSession ADD CONSTRAINT personaltrainingsession_member_no_overlap
+            EXCLUDE USING gist (int4range(userId, userId, '[]') WITH =, sessionSlot WITH &&);
+    END IF;
+END $$;
+
+INSERT INTO SchemaMigration (version, migrationName)
+VALUES (1, 'BookingOverlapConstraints')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
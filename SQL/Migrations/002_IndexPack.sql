@@ -0,0 +1,49 @@
+-- Migration 002: indexes for every hot predicate used by HealthAndFitnessClub.py.
+-- The DDL only has primary keys and UNIQUE constraints, so all the lookups below were sequential scans.
+-- Indexes are built CONCURRENTLY so this can be applied to a live database without blocking bookings. Because of that, this file must NOT be run inside a transaction block (psql -f runs it in autocommit mode by default).
+-- Safe to run more than once. If a concurrent build is interrupted it leaves an INVALID index behind; drop that index and re-run this file.
+
+CREATE TABLE IF NOT EXISTS SchemaMigration (
+    version INT PRIMARY KEY,
+    migrationName VARCHAR(100) NOT NULL,
+    appliedOn TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Scheduling checks (checkTrainerAvailability, findAvailableTrainers, checkUserAvailability, displayAvailability, displayRoomBookings).
+-- The time columns are INCLUDEd so the availability containment check can be answered from the index alone.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS traineravailability_trainer_date_idx ON TrainerAvailability (trainerId, availabilityDate) INCLUDE (startTime, endTime);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS class_trainer_date_idx ON Class (trainerId, classDate);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS class_date_idx ON Class (classDate, startTime);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS personaltrainingsession_user_date_idx ON PersonalTrainingSession (userId, sessionDate);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS personaltrainingsession_trainer_date_idx ON PersonalTrainingSession (trainerId, sessionDate);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS roombookings_room_date_idx ON RoomBookings (roomNumber, bookingDate, startTime);
+
+-- MemberTakesClass's primary key (userId, classId) already covers lookups by member. This covers deleting a class and counting a class's members.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS membertakesclass_class_idx ON MemberTakesClass (classId);
+
+-- Dashboard and profile lookups
+CREATE INDEX CONCURRENTLY IF NOT EXISTS achievement_user_idx ON Achievement (userId);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS routine_user_idx ON Routine (userId);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS routineexerciseassignment_routine_idx ON RoutineExerciseAssignment (routineId, routineExerciseId);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS equipmentmaintenance_equipment_idx ON EquipmentMaintenance (equipmentId, maintenanceCompletionDate);
+
+-- Billing. Only the 'Awaiting Payment' and 'Paid' bills are ever listed, so partial indexes keep these small as the Cancelled/Returned history grows.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS payment_awaiting_idx ON Payment (billNumber) WHERE paymentStatus = 'Awaiting Payment';
+CREATE INDEX CONCURRENTLY IF NOT EXISTS payment_paid_idx ON Payment (billNumber) WHERE paymentStatus = 'Paid';
+CREATE INDEX CONCURRENTLY IF NOT EXISTS payment_member_idx ON Payment (memberId);
+
+-- loginUser and searchMemberProfile compare LOWER(...) so the plain UNIQUE(email) index can't be used.
+-- These aren't UNIQUE since an existing database may already hold emails that only differ by case.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS member_lower_email_idx ON Member (LOWER(email));
+CREATE INDEX CONCURRENTLY IF NOT EXISTS member_lower_name_idx ON Member (LOWER(fName), LOWER(lName));
+CREATE INDEX CONCURRENTLY IF NOT EXISTS personaltrainer_lower_email_idx ON PersonalTrainer (LOWER(email));
+CREATE INDEX CONCURRENTLY IF NOT EXISTS administrativestaff_lower_email_idx ON AdministrativeStaff (LOWER(email));
+
+-- Refreshing planner statistics so the new expression indexes get used right away
+ANALYZE Member;
+ANALYZE PersonalTrainer;
+ANALYZE AdministrativeStaff;
+
+INSERT INTO SchemaMigration (version, migrationName)
+VALUES (2, 'IndexPack')
+ON CONFLICT (version) DO NOTHING;
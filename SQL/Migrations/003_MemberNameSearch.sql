@@ -0,0 +1,22 @@
+-- Migration 003: fuzzy and prefix member search for searchMemberProfile.
+-- Enables pg_trgm and adds trigram GIN indexes on the lowercased names. These serve the LIKE 'prefix%' matches as well as the % (similarity) operator used for misspelled names, which the btree member_lower_name_idx from migration 002 can't.
+-- Like migration 002, the indexes are built CONCURRENTLY, so this file must NOT be run inside a transaction block. Creating the extension needs a role that is allowed to do so (e.g. the database owner on PostgreSQL 13+).
+-- Safe to run more than once.
+
+CREATE TABLE IF NOT EXISTS SchemaMigration (
+    version INT PRIMARY KEY,
+    migrationName VARCHAR(100) NOT NULL,
+    appliedOn TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS member_lower_fname_trgm_idx ON Member USING gin (LOWER(fName) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS member_lower_lname_trgm_idx ON Member USING gin (LOWER(lName) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS member_lower_fullname_trgm_idx ON Member USING gin (LOWER(fName || ' ' || lName) gin_trgm_ops);
+
+ANALYZE Member;
+
+INSERT INTO SchemaMigration (version, migrationName)
+VALUES (3, 'MemberNameSearch')
+ON CONFLICT (version) DO NOTHING;
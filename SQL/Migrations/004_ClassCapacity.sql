@@ -0,0 +1,47 @@
+-- Migration 004: class capacity and waitlist.
+-- Each class gets a capacity and a registeredCount seat counter. Registration takes a seat with a single conditional UPDATE (registeredCount < capacity), which row-locks just that class for the rest of the transaction, so a rush of members registering for the same class can never overbook it.
+-- Members who find the class full go on ClassWaitlist. When someone deregisters, the longest waiting member is moved into their seat in the same transaction.
+-- Existing classes get a capacity of 20, or their current number of registrations if that is higher. Safe to run more than once.
+
+BEGIN;
+
+ALTER TABLE Class
+    ADD COLUMN IF NOT EXISTS capacity INT NOT NULL DEFAULT 20,
+    ADD COLUMN IF NOT EXISTS registeredCount INT NOT NULL DEFAULT 0;
+
+-- Backfilling the counters from the registrations that already exist
+UPDATE Class
+SET registeredCount = registrations.registeredCount, capacity = GREATEST(Class.capacity, registrations.registeredCount)
+FROM (SELECT classId, COUNT(*)::int AS registeredCount FROM MemberTakesClass GROUP BY classId) registrations
+WHERE Class.classId = registrations.classId AND Class.registeredCount <> registrations.registeredCount;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'class_capacity_positive') THEN
+        ALTER TABLE Class ADD CONSTRAINT class_capacity_positive CHECK (capacity > 0);
+    END IF;
+
+    -- The seat counter can never go negative or past the capacity, whatever the app does
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'class_registered_within_capacity') THEN
+        ALTER TABLE Class ADD CONSTRAINT class_registered_within_capacity CHECK (registeredCount BETWEEN 0 AND capacity);
+    END IF;
+END $$;
+
+-- Members waiting for a seat, served in waitlistId (arrival) order
+CREATE TABLE IF NOT EXISTS ClassWaitlist (
+    waitlistId SERIAL PRIMARY KEY,
+    classId INT NOT NULL,
+    userId INT NOT NULL,
+    joinedOn TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (classId, userId),
+    FOREIGN KEY (classId) REFERENCES Class(classId),
+    FOREIGN KEY (userId) REFERENCES Member(userId)
+);
+
+CREATE INDEX IF NOT EXISTS classwaitlist_class_order_idx ON ClassWaitlist (classId, waitlistId);
+
+INSERT INTO SchemaMigration (version, migrationName)
+VALUES (4, 'ClassCapacity')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
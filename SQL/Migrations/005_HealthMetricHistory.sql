@@ -0,0 +1,141 @@
+-- Migration 005: health metric history.
+-- Member.weightLbs and bodyFatPercentage only hold the latest values. Every reading (typed in by a member or sent by a connected scale) is now also appended to HealthMetric, a time-series table partitioned by month. Old months can be detached or dropped without touching the rest, and each partition has a BRIN index on measuredAt, which stays a few pages in size because readings arrive in time order.
+-- Trends are never computed from the raw readings. HealthMetricDaily and HealthMetricWeekly hold per member counts, sums, minimums and maximums, and a statement-level trigger folds each INSERT (or COPY) into them with one upsert per member and day/week touched, so a trend read is a short primary key range scan however many readings there are.
+-- HealthMetric is append-only: UPDATE and DELETE on it are rejected, since they would leave the rollups stale.
+-- Partitions from January 2022 to twelve months from now are created here. The app creates later ones through createHealthMetricPartitions as it needs them. Safe to run more than once.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS HealthMetric (
+    userId INT NOT NULL,
+    measuredAt TIMESTAMP NOT NULL,
+    weightLbs NUMERIC(5, 2) CHECK (weightLbs BETWEEN 0 AND 1000),
+    bodyFatPercentage NUMERIC(3, 1) CHECK (bodyFatPercentage BETWEEN 3 AND 85),
+    source VARCHAR(10) NOT NULL DEFAULT 'manual' CHECK (source IN ('manual', 'scale')),
+    CHECK (weightLbs IS NOT NULL OR bodyFatPercentage IS NOT NULL),
+    FOREIGN KEY (userId) REFERENCES Member(userId)
+) PARTITION BY RANGE (measuredAt);
+
+-- Created on the parent so every partition (including ones added later) gets its own
+CREATE INDEX IF NOT EXISTS healthmetric_measuredat_brin ON HealthMetric USING brin (measuredAt) WITH (pages_per_range = 32);
+
+-- Rollups. The sums are kept instead of averages so that new readings can simply be added on; average = sum / count.
+CREATE TABLE IF NOT EXISTS HealthMetricDaily (
+    userId INT NOT NULL,
+    metricDate DATE NOT NULL,
+    weightCount INT NOT NULL DEFAULT 0,
+    weightSum NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    weightMin NUMERIC(5, 2),
+    weightMax NUMERIC(5, 2),
+    bodyFatCount INT NOT NULL DEFAULT 0,
+    bodyFatSum NUMERIC(12, 1) NOT NULL DEFAULT 0,
+    bodyFatMin NUMERIC(3, 1),
+    bodyFatMax NUMERIC(3, 1),
+    PRIMARY KEY (userId, metricDate),
+    FOREIGN KEY (userId) REFERENCES Member(userId)
+);
+
+-- weekStart is the Monday of the week, i.e. date_trunc('week', measuredAt)
+CREATE TABLE IF NOT EXISTS HealthMetricWeekly (
+    userId INT NOT NULL,
+    weekStart DATE NOT NULL,
+    weightCount INT NOT NULL DEFAULT 0,
+    weightSum NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    weightMin NUMERIC(5, 2),
+    weightMax NUMERIC(5, 2),
+    bodyFatCount INT NOT NULL DEFAULT 0,
+    bodyFatSum NUMERIC(12, 1) NOT NULL DEFAULT 0,
+    bodyFatMin NUMERIC(3, 1),
+    bodyFatMax NUMERIC(3, 1),
+    PRIMARY KEY (userId, weekStart),
+    FOREIGN KEY (userId) REFERENCES Member(userId)
+);
+
+-- Creating the monthly partitions (named healthmetric_yYYYYmMM) covering fromDate through toDate that don't exist yet. Returns how many were created.
+-- The advisory lock stops two sessions that both need a new month from racing to create it.
+CREATE OR REPLACE FUNCTION createHealthMetricPartitions(fromDate DATE, toDate DATE) RETURNS INT AS $$
+DECLARE
+    month DATE := date_trunc('month', fromDate)::date;
+    partitionName TEXT;
+    created INT := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('HealthMetric partitions'));
+
+    WHILE month <= toDate LOOP
+        partitionName := 'healthmetric_' || to_char(month, '"y"YYYY"m"MM');
+        IF to_regclass(partitionName) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF HealthMetric FOR VALUES FROM (%L) TO (%L)', partitionName, month, (month + INTERVAL '1 month')::date);
+            created := created + 1;
+        END IF;
+        month := (month + INTERVAL '1 month')::date;
+    END LOOP;
+
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT createHealthMetricPartitions(DATE '2022-01-01', (CURRENT_DATE + INTERVAL '12 months')::date);
+
+-- Folding a statement's new readings into the rollups, one row per member and day/week. Rows are upserted in key order so two
+-- concurrent loads touching the same members lock them in the same order instead of deadlocking.
+-- LEAST/GREATEST ignore NULLs, so a reading with only one of the two metrics leaves the other's minimum and maximum alone.
+CREATE OR REPLACE FUNCTION rollUpHealthMetrics() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO HealthMetricDaily AS d (userId, metricDate, weightCount, weightSum, weightMin, weightMax, bodyFatCount, bodyFatSum, bodyFatMin, bodyFatMax)
+    SELECT userId, measuredAt::date, COUNT(weightLbs), COALESCE(SUM(weightLbs), 0), MIN(weightLbs), MAX(weightLbs),
+        COUNT(bodyFatPercentage), COALESCE(SUM(bodyFatPercentage), 0), MIN(bodyFatPercentage), MAX(bodyFatPercentage)
+    FROM newReadings
+    GROUP BY userId, measuredAt::date
+    ORDER BY userId, measuredAt::date
+    ON CONFLICT (userId, metricDate) DO UPDATE SET
+        weightCount = d.weightCount + EXCLUDED.weightCount,
+        weightSum = d.weightSum + EXCLUDED.weightSum,
+        weightMin = LEAST(d.weightMin, EXCLUDED.weightMin),
+        weightMax = GREATEST(d.weightMax, EXCLUDED.weightMax),
+        bodyFatCount = d.bodyFatCount + EXCLUDED.bodyFatCount,
+        bodyFatSum = d.bodyFatSum + EXCLUDED.bodyFatSum,
+        bodyFatMin = LEAST(d.bodyFatMin, EXCLUDED.bodyFatMin),
+        bodyFatMax = GREATEST(d.bodyFatMax, EXCLUDED.bodyFatMax);
+
+    INSERT INTO HealthMetricWeekly AS w (userId, weekStart, weightCount, weightSum, weightMin, weightMax, bodyFatCount, bodyFatSum, bodyFatMin, bodyFatMax)
+    SELECT userId, date_trunc('week', measuredAt)::date, COUNT(weightLbs), COALESCE(SUM(weightLbs), 0), MIN(weightLbs), MAX(weightLbs),
+        COUNT(bodyFatPercentage), COALESCE(SUM(bodyFatPercentage), 0), MIN(bodyFatPercentage), MAX(bodyFatPercentage)
+    FROM newReadings
+    GROUP BY userId, date_trunc('week', measuredAt)::date
+    ORDER BY userId, date_trunc('week', measuredAt)::date
+    ON CONFLICT (userId, weekStart) DO UPDATE SET
+        weightCount = w.weightCount + EXCLUDED.weightCount,
+        weightSum = w.weightSum + EXCLUDED.weightSum,
+        weightMin = LEAST(w.weightMin, EXCLUDED.weightMin),
+        weightMax = GREATEST(w.weightMax, EXCLUDED.weightMax),
+        bodyFatCount = w.bodyFatCount + EXCLUDED.bodyFatCount,
+        bodyFatSum = w.bodyFatSum + EXCLUDED.bodyFatSum,
+        bodyFatMin = LEAST(w.bodyFatMin, EXCLUDED.bodyFatMin),
+        bodyFatMax = GREATEST(w.bodyFatMax, EXCLUDED.bodyFatMax);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS healthmetric_rollup ON HealthMetric;
+CREATE TRIGGER healthmetric_rollup
+    AFTER INSERT ON HealthMetric
+    REFERENCING NEW TABLE AS newReadings
+    FOR EACH STATEMENT EXECUTE FUNCTION rollUpHealthMetrics();
+
+CREATE OR REPLACE FUNCTION rejectHealthMetricChanges() RETURNS TRIGGER AS $$
+BEGIN
+    RAISE EXCEPTION 'HealthMetric is append-only';
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS healthmetric_append_only ON HealthMetric;
+CREATE TRIGGER healthmetric_append_only
+    BEFORE UPDATE OR DELETE ON HealthMetric
+    FOR EACH STATEMENT EXECUTE FUNCTION rejectHealthMetricChanges();
+
+INSERT INTO SchemaMigration (version, migrationName)
+VALUES (5, 'HealthMetricHistory')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
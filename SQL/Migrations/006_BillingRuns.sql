@@ -0,0 +1,32 @@
+-- Migration 006: monthly billing runs.
+-- A billing run bills membership dues to every member of a cohort for one month in a single INSERT ... SELECT. Each run is logged in BillingRun, and the bills it creates carry their billingPeriod (the first day of the month) and billingRunId.
+-- The unique index on (billingPeriod, memberId) makes runs idempotent: re-running a month (or running it for an overlapping cohort, or twice at once) never bills a member for it twice. Bills created one at a time through managePayment have no billingPeriod and aren't affected.
+-- Like migration 002, the index is built CONCURRENTLY so it doesn't block billing on a live database, so this file must NOT be run inside a transaction block. Safe to run more than once.
+
+CREATE TABLE IF NOT EXISTS SchemaMigration (
+    version INT PRIMARY KEY,
+    migrationName VARCHAR(100) NOT NULL,
+    appliedOn TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS BillingRun (
+    runId SERIAL PRIMARY KEY,
+    billingPeriod DATE NOT NULL CHECK (billingPeriod = date_trunc('month', billingPeriod)::date),
+    duesAmount NUMERIC(7, 2) NOT NULL CHECK (duesAmount > 0),
+    cohort VARCHAR(200) NOT NULL,
+    billsCreated INT NOT NULL DEFAULT 0,
+    amountBilled NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    ranOn TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Nullable columns without a default, so adding them doesn't rewrite Payment
+ALTER TABLE Payment
+    ADD COLUMN IF NOT EXISTS billingPeriod DATE,
+    ADD COLUMN IF NOT EXISTS billingRunId INT REFERENCES BillingRun(runId);
+
+-- Also serves the per-period totals and the "already billed?" check of every run
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS payment_period_member_idx ON Payment (billingPeriod, memberId) WHERE billingPeriod IS NOT NULL;
+
+INSERT INTO SchemaMigration (version, migrationName)
+VALUES (6, 'BillingRuns')
+ON CONFLICT (version) DO NOTHING;
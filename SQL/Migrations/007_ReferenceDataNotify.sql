@@ -0,0 +1,44 @@
+-- Migration 007: change notifications for reference data.
+-- The app caches Room, Exercise, PersonalTrainer and Equipment in memory (see ReferenceData.py). A statement-level trigger on each sends the table's name on the reference_data channel whenever a statement changes it, and every app process listening on that channel drops its cached copy of the table. Notifications are only delivered once the transaction commits (and not at all if it rolls back), and repeated ones from the same transaction are folded into one, so a bulk load sends a single notification per table.
+-- Safe to run more than once.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS SchemaMigration (
+    version INT PRIMARY KEY,
+    migrationName VARCHAR(100) NOT NULL,
+    appliedOn TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION notifyReferenceDataChange() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('reference_data', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS room_notify_change ON Room;
+CREATE TRIGGER room_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Room
+    FOR EACH STATEMENT EXECUTE FUNCTION notifyReferenceDataChange();
+
+DROP TRIGGER IF EXISTS exercise_notify_change ON Exercise;
+CREATE TRIGGER exercise_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Exercise
+    FOR EACH STATEMENT EXECUTE FUNCTION notifyReferenceDataChange();
+
+DROP TRIGGER IF EXISTS personaltrainer_notify_change ON PersonalTrainer;
+CREATE TRIGGER personaltrainer_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON PersonalTrainer
+    FOR EACH STATEMENT EXECUTE FUNCTION notifyReferenceDataChange();
+
+DROP TRIGGER IF EXISTS equipment_notify_change ON Equipment;
+CREATE TRIGGER equipment_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Equipment
+    FOR EACH STATEMENT EXECUTE FUNCTION notifyReferenceDataChange();
+
+INSERT INTO SchemaMigration (version, migrationName)
+VALUES (7, 'ReferenceDataNotify')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,199 @@
+import collections
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date as dateType, datetime, time as timeType
+
+from PreparedStatements import PreparedStatement
+
+
+# The kinds of schedules the index keeps. Trainer and member "busy" schedules combine classes and PT sessions.
+TRAINER_BUSY = 'trainer'
+TRAINER_AVAILABLE = 'availability'
+MEMBER_BUSY = 'member'
+ROOM_BOOKED = 'room'
+
+# The most days (counting each member's days separately) kept loaded at once, so a long running --serve process doesn't grow without bound
+MAX_LOADED_DAYS = 4096
+
+# The queries that load one day of each kind of schedule, as (ownerId, startTime, endTime, refKind, refId) rows
+loadTrainerBusy = PreparedStatement('schedule_trainer_busy', """
+    SELECT trainerId, startTime, endTime, 'class'::text, classId FROM Class WHERE classDate = $1::date
+    UNION ALL
+    SELECT trainerId, startTime, endTime, 'session'::text, sessionId FROM PersonalTrainingSession WHERE sessionDate = $1::date
+""")
+loadTrainerAvailable = PreparedStatement('schedule_trainer_available', """
+    SELECT trainerId, startTime, endTime, 'availability'::text, availibilityId FROM TrainerAvailability WHERE availabilityDate = $1::date
+""")
+loadRoomBooked = PreparedStatement('schedule_room_booked', """
+    SELECT roomNumber, startTime, endTime, 'booking'::text, roomBookingId FROM RoomBookings WHERE bookingDate = $1::date
+""")
+loadMemberBusy = PreparedStatement('schedule_member_busy', """
+    SELECT MemberTakesClass.userId, Class.startTime, Class.endTime, 'class'::text, Class.classId
+    FROM MemberTakesClass JOIN Class ON MemberTakesClass.classId = Class.classId
+    WHERE MemberTakesClass.userId = $2::int AND Class.classDate = $1::date
+    UNION ALL
+    SELECT userId, startTime, endTime, 'session'::text, sessionId FROM PersonalTrainingSession WHERE userId = $2::int AND sessionDate = $1::date
+""")
+
+
+#------------------------------------------------------------------------------------------------------------------------------
+# Converting the app's 'YYYY-MM-DD' / 'HH:MM' strings (or the date/time objects psycopg2 returns) into comparable objects.
+#------------------------------------------------------------------------------------------------------------------------------
+def toDate(value):
+    return value if isinstance(value, dateType) else dateType.fromisoformat(str(value))
+
+def toTime(value):
+    return value if isinstance(value, timeType) else datetime.strptime(str(value), "%H:%M").time()
+
+
+#---------------------------------------------------------------------------------------------------------------------------------
+# Defining the IntervalList class which holds one owner's intervals for one day, sorted by start time.
+# maxEnds[i] is the latest end time among the first i+1 intervals, which lets us answer "does anything overlap [start, end]" and
+# "is [start, end] inside one of these windows" with a single binary search, even if the intervals themselves overlap. Since maxEnds
+# never decreases, a second binary search finds the first interval reaching start, so listing the overlaps only looks at the intervals
+# between that one and end (just the overlapping ones when, as for a trainer's or member's bookings, the intervals don't overlap).
+# Intervals are inclusive on both ends to match the app's BETWEEN checks and the '[]' ranges in migration 001.
+#---------------------------------------------------------------------------------------------------------------------------------
+class IntervalList:
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.refs = []
+        self.maxEnds = []
+
+    def add(self, start, end, ref):
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.refs.insert(position, ref)
+        self._rebuildMaxEnds(position)
+
+    def remove(self, ref):
+        if ref not in self.refs:
+            return False
+
+        position = self.refs.index(ref)
+        del self.starts[position], self.ends[position], self.refs[position]
+        self._rebuildMaxEnds(position)
+        return True
+
+    def overlapping(self, start, end):
+        # Only intervals that start at or before our end can overlap, and none before the first one whose prefix max reaches our start
+        last = bisect_right(self.starts, end)
+        first = bisect_left(self.maxEnds, start, 0, last)
+        return [(self.starts[position], self.ends[position], self.refs[position]) for position in range(first, last) if self.ends[position] >= start]
+
+    def covers(self, start, end):
+        # Some window contains [start, end] exactly when one of the windows starting at or before start ends at or after end
+        position = bisect_right(self.starts, start)
+        return position > 0 and self.maxEnds[position - 1] >= end
+
+    def _rebuildMaxEnds(self, fromPosition):
+        del self.maxEnds[fromPosition:]
+        for position in range(fromPosition, len(self.ends)):
+            previous = self.maxEnds[position - 1] if position > 0 else None
+            self.maxEnds.append(self.ends[position] if previous is None or self.ends[position] > previous else previous)
+
+
+#----------------------------------------------------------------------------------------------------------------------------------------
+# Defining the ScheduleIndex class which answers schedule conflict checks in-process so the booking screens can probe many candidate slots
+# without a database round trip each. Days are loaded lazily (one query per kind per date, or per member per date) and kept current by
+# the app calling addInterval/removeInterval after each insert/delete. Loaded days expire after maxAge seconds so writes made by other
+# processes are picked up, and only the maxDays most recently used are kept. The database (exclusion constraints and the final checks at
+# booking time) stays authoritative.
+#----------------------------------------------------------------------------------------------------------------------------------------
+class ScheduleIndex:
+    def __init__(self, connectionPool, maxAge=30.0, maxDays=MAX_LOADED_DAYS):
+        self.connectionPool = connectionPool
+        self.maxAge = maxAge
+        self.maxDays = maxDays
+
+        # (kind, date) for trainer/availability/room days and (kind, date, userId) for member days -> (loadedAt, {ownerId: IntervalList}),
+        # least recently used first
+        self._days = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def trainerConflicts(self, trainerId, date, startTime, endTime):
+        return self._overlapping(TRAINER_BUSY, int(trainerId), date, startTime, endTime)
+
+    def memberConflicts(self, userId, date, startTime, endTime):
+        return self._overlapping(MEMBER_BUSY, int(userId), date, startTime, endTime)
+
+    def roomConflicts(self, roomNumber, date, startTime, endTime):
+        return self._overlapping(ROOM_BOOKED, int(roomNumber), date, startTime, endTime)
+
+    def trainerHasAvailability(self, trainerId, date, startTime, endTime):
+        owners = self._day(TRAINER_AVAILABLE, toDate(date))
+        with self._lock:
+            windows = owners.get(int(trainerId))
+            return windows is not None and windows.covers(toTime(startTime), toTime(endTime))
+
+    #------------------------------------------------------------------------------------------------------------
+    # Keeping loaded days current after the app commits a write. Days that aren't loaded yet will see it on load.
+    #------------------------------------------------------------------------------------------------------------
+    def addInterval(self, kind, ownerId, date, startTime, endTime, ref):
+        with self._lock:
+            loaded = self._days.get(self._key(kind, int(ownerId), toDate(date)))
+            if loaded is not None:
+                loaded[1].setdefault(int(ownerId), IntervalList()).add(toTime(startTime), toTime(endTime), ref)
+
+    def removeInterval(self, kind, ownerId, date, ref):
+        with self._lock:
+            loaded = self._days.get(self._key(kind, int(ownerId), toDate(date)))
+            if loaded is not None and int(ownerId) in loaded[1]:
+                loaded[1][int(ownerId)].remove(ref)
+
+    #-----------------------------------------------------------------------------------------------------------------
+    # Dropping loaded days so they are reloaded on next use (e.g. when a class is deleted along with its registrations)
+    #-----------------------------------------------------------------------------------------------------------------
+    def invalidate(self, kind=None, date=None):
+        date = toDate(date) if date is not None else None
+        with self._lock:
+            for key in list(self._days):
+                if (kind is None or key[0] == kind) and (date is None or key[1] == date):
+                    del self._days[key]
+
+    def _overlapping(self, kind, ownerId, date, startTime, endTime):
+        owners = self._day(kind, toDate(date), ownerId)
+        with self._lock:
+            intervals = owners.get(ownerId)
+            return intervals.overlapping(toTime(startTime), toTime(endTime)) if intervals is not None else []
+
+    def _key(self, kind, ownerId, date):
+        return (kind, date, ownerId) if kind == MEMBER_BUSY else (kind, date)
+
+    def _day(self, kind, date, ownerId=None):
+        key = self._key(kind, ownerId, date)
+        with self._lock:
+            loaded = self._days.get(key)
+            if loaded is not None and time.monotonic() - loaded[0] <= self.maxAge:
+                self._days.move_to_end(key)
+                return loaded[1]
+
+        # Loading outside the lock so one slow query doesn't hold up every other session's checks
+        owners = {}
+        for rowOwnerId, startTime, endTime, refKind, refId in self._load(kind, date, ownerId):
+            owners.setdefault(rowOwnerId, IntervalList()).add(startTime, endTime, (refKind, refId))
+
+        with self._lock:
+            self._days[key] = (time.monotonic(), owners)
+            self._days.move_to_end(key)
+            while len(self._days) > self.maxDays:
+                self._days.popitem(last=False)
+        return owners
+
+    def _load(self, kind, date, ownerId):
+        with self.connectionPool.connection() as connection, connection.cursor() as cursor:
+            if kind == TRAINER_BUSY:
+                loadTrainerBusy.execute(cursor, (date,))
+            elif kind == TRAINER_AVAILABLE:
+                loadTrainerAvailable.execute(cursor, (date,))
+            elif kind == ROOM_BOOKED:
+                loadRoomBooked.execute(cursor, (date,))
+            elif kind == MEMBER_BUSY:
+                loadMemberBusy.execute(cursor, (date, ownerId))
+            else:
+                raise ValueError(f"Unknown schedule kind: {kind}")
+
+            return cursor.fetchall()
@@ -0,0 +1,75 @@
+import io
+import socketserver
+import sys
+import threading
+
+
+#-----------------------------------------------------------------------------------------------------------------------------
+# Defining the ThreadLocalStream class which lets each session thread have its own stdin/stdout. The menu code only uses
+# input() and print(), so swapping sys.stdin/sys.stdout for these proxies lets one process run many sessions side by side.
+#-----------------------------------------------------------------------------------------------------------------------------
+class ThreadLocalStream:
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def bind(self, stream):
+        self._local.stream = stream
+
+    def unbind(self):
+        self._local.stream = None
+
+    def __getattr__(self, name):
+        stream = getattr(self._local, 'stream', None)
+        return getattr(stream if stream is not None else self._default, name)
+
+
+#---------------------------------------------------------------------------------------------------------------------
+# Defining the SessionHandler class which runs the session function for one kiosk/terminal connection until it hangs up
+#---------------------------------------------------------------------------------------------------------------------
+class SessionHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        reader = io.TextIOWrapper(self.rfile, encoding='utf-8', errors='replace')
+        writer = io.TextIOWrapper(self.wfile, encoding='utf-8', write_through=True)
+
+        sys.stdin.bind(reader)
+        sys.stdout.bind(writer)
+        try:
+            # Running sessions back to back on the same terminal until the client disconnects (input() raises EOFError)
+            while True:
+                self.server.sessionFunction()
+                print()
+        except EOFError:
+            pass
+        except (ConnectionError, OSError):
+            pass
+        except Exception as err:
+            print("The session ended because of an unexpected error:", err)
+        finally:
+            sys.stdin.unbind()
+            sys.stdout.unbind()
+
+
+class SessionServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, sessionFunction):
+        super().__init__(address, SessionHandler)
+        self.sessionFunction = sessionFunction
+
+
+#---------------------------------------------------------------------------------------------------------------------------------
+# Defining the serveSessions function which serves many concurrent member/trainer/staff sessions from this process until Ctrl+C.
+#---------------------------------------------------------------------------------------------------------------------------------
+def serveSessions(sessionFunction, host, port):
+    if not isinstance(sys.stdin, ThreadLocalStream):
+        sys.stdin = ThreadLocalStream(sys.stdin)
+    if not isinstance(sys.stdout, ThreadLocalStream):
+        sys.stdout = ThreadLocalStream(sys.stdout)
+
+    with SessionServer((host, port), sessionFunction) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Shutting down the session server.")
@@ -0,0 +1,90 @@
+from datetime import time as timeType
+
+
+#------------------------------------------------------------------------------------------------------------------------------
+# Converting between the TIME values psycopg2 returns and minutes since midnight, which is what the sweep below works in.
+#------------------------------------------------------------------------------------------------------------------------------
+def toMinutes(value):
+    return value.hour * 60 + value.minute
+
+def fromMinutes(minutes):
+    return timeType(minutes // 60, minutes % 60)
+
+
+#---------------------------------------------------------------------------------------------------------------------------------
+# Returning the free (start, end) slots of `duration` minutes inside the availability windows that don't touch any busy interval.
+# All intervals are (start, end) minutes and inclusive on both ends, like the '[]' ranges in migration 001, so a slot has to start
+# after a busy interval ends and end before the next one starts. Starts are rounded up to a multiple of `granularity` minutes, and
+# each free gap yields back-to-back slots from its start (at most `perGap` of them) in increasing start order.
+#
+# This is a sweep-line: windows and busy intervals are each sorted once by start, and one pointer walks the busy list while the
+# windows are visited in order, so a day with w windows and b busy intervals costs O((w + b) log(w + b)).
+#---------------------------------------------------------------------------------------------------------------------------------
+def freeSlots(windows, busy, duration, granularity=15, perGap=1):
+    windows = sorted(windows)
+    busy = sorted(busy)
+    slots = []
+
+    position = 0
+    for windowStart, windowEnd in windows:
+        # Busy intervals that ended before this window can't affect it or any later window
+        while position < len(busy) and busy[position][1] < windowStart:
+            position += 1
+
+        gapStart = windowStart
+        scan = position
+        while gapStart + duration <= windowEnd:
+            # The end of the free gap is just before the next busy interval that starts inside this window (or the window's end)
+            while scan < len(busy) and busy[scan][1] < gapStart:
+                scan += 1
+            if scan < len(busy) and busy[scan][0] <= windowEnd:
+                blockStart, blockEnd = busy[scan]
+                gapEnd = blockStart - 1
+            else:
+                blockStart, blockEnd = None, None
+                gapEnd = windowEnd
+
+            start = -(-gapStart // granularity) * granularity
+            found = 0
+            while found < perGap and start + duration <= gapEnd:
+                slots.append((start, start + duration))
+                start += duration
+                found += 1
+
+            if blockEnd is None:
+                break
+
+            # Skipping past this busy interval (and any that overlap it) to the next free minute
+            gapStart = max(gapStart, blockEnd + 1)
+            scan += 1
+
+    return slots
+
+
+#---------------------------------------------------------------------------------------------------------------------------------
+# Returning the free gaps between busy (start, end) minute intervals within [dayStart, dayEnd], as (start, end) boundaries: the end
+# of the previous busy block (or dayStart) and the start of the next one (or dayEnd). Busy intervals must be sorted by start;
+# overlapping ones are merged as the sweep goes. See fitsGap for which bookings a gap can take.
+#---------------------------------------------------------------------------------------------------------------------------------
+def freeGaps(busy, dayStart, dayEnd):
+    gaps = []
+    gapStart = dayStart
+    for start, end in busy:
+        if end < gapStart:
+            continue
+        if start > gapStart:
+            gaps.append((gapStart, min(start, dayEnd)))
+        gapStart = max(gapStart, end)
+        if gapStart >= dayEnd:
+            return gaps
+    gaps.append((gapStart, dayEnd))
+    return [(start, end) for start, end in gaps if start < end]
+
+# Bookings are inclusive on both ends, so a new one has to start after the busy block before the gap and end before the one after
+# it. It may only touch a boundary of the gap that no busy block ends or starts at, i.e. opening or closing time when nothing is
+# booked right up to it (a booking running until exactly opening time still rules out starting then).
+def fitsGap(gap, start, end, busy):
+    gapStart, gapEnd = gap
+    startTouchesBusy = any(busyEnd == gapStart for _, busyEnd in busy)
+    endTouchesBusy = any(busyStart == gapEnd for busyStart, _ in busy)
+    return (start > gapStart or (start == gapStart and not startTouchesBusy)) and (end < gapEnd or (end == gapEnd and not endTouchesBusy))
@@ -0,0 +1,72 @@
+import random
+import threading
+import time
+
+from psycopg2 import extensions
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Counters for every transaction run through runTransaction, shown in the query summary. A conflict is a serialization failure or
+# deadlock PostgreSQL rolled back; each one either led to a retry or (after the last attempt) was given up on and raised.
+#-------------------------------------------------------------------------------------------------------------------------------------
+class TransactionStats:
+    def __init__(self):
+        self.commits = 0
+        self.conflicts = 0
+        self.retries = 0
+        self.givenUp = 0
+        self._lock = threading.Lock()
+
+    def count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {'commits': self.commits, 'conflicts': self.conflicts, 'retries': self.retries, 'givenUp': self.givenUp}
+
+
+transactionStats = TransactionStats()
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Running work(cursor) in its own transaction at the given isolation level and committing it. Bookings use SERIALIZABLE so that a
+# conflict check and the insert that depends on it behave as if no other booking ran at the same time: if two operators book the same
+# trainer at once, PostgreSQL rolls one of them back with a serialization failure instead of letting both through. That transaction is
+# then retried from the start (re-running the check, which now sees the other booking) after a random "full jitter" backoff, up to
+# maxAttempts times. Any other error rolls back and is raised as is. Returns whatever work returns.
+#
+# work may run more than once, so it must only touch the database through the cursor it is given. It has to be called outside of an
+# open transaction; anything a previous read on this thread's connection left open is rolled back first.
+#-------------------------------------------------------------------------------------------------------------------------------------
+def runTransaction(connectionPool, work, isolationLevel=extensions.ISOLATION_LEVEL_SERIALIZABLE, maxAttempts=5, baseDelay=0.01, maxDelay=0.5):
+    attempt = 1
+    while True:
+        with connectionPool.connection() as connection:
+            if connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+
+            previousIsolationLevel = connection.isolation_level
+            connection.isolation_level = isolationLevel
+            try:
+                with connection.cursor() as cursor:
+                    result = work(cursor)
+                connection.commit()
+                transactionStats.count('commits')
+                return result
+            except extensions.TransactionRollbackError:
+                connection.rollback()
+                transactionStats.count('conflicts')
+                if attempt >= maxAttempts:
+                    transactionStats.count('givenUp')
+                    raise
+            except BaseException:
+                connection.rollback()
+                raise
+            finally:
+                if not connection.closed:
+                    connection.isolation_level = previousIsolationLevel
+
+        transactionStats.count('retries')
+        time.sleep(random.uniform(0, min(maxDelay, baseDelay * 2 ** attempt)))
+        attempt += 1
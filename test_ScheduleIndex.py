@@ -0,0 +1,123 @@
+import random
+import unittest
+from datetime import date, time
+
+from ScheduleIndex import IntervalList, ScheduleIndex, MEMBER_BUSY, TRAINER_BUSY
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Checks for the interval lists behind the schedule index. They don't need a database: intervals are plain numbers here, since the
+# lists only compare them.
+#-------------------------------------------------------------------------------------------------------------------------------------
+def intervalList(*intervals):
+    result = IntervalList()
+    for number, (start, end) in enumerate(intervals):
+        result.add(start, end, number)
+    return result
+
+def refs(overlaps):
+    return sorted(ref for _, _, ref in overlaps)
+
+
+class IntervalListTest(unittest.TestCase):
+    def testBoundariesAreInclusive(self):
+        intervals = intervalList((10, 20))
+        self.assertEqual(refs(intervals.overlapping(20, 30)), [0])
+        self.assertEqual(refs(intervals.overlapping(0, 10)), [0])
+        self.assertEqual(refs(intervals.overlapping(21, 30)), [])
+        self.assertEqual(refs(intervals.overlapping(0, 9)), [])
+
+    def testOverlappingIntervalsAreAllFound(self):
+        intervals = intervalList((0, 15), (10, 30), (12, 14), (20, 25))
+        self.assertEqual(refs(intervals.overlapping(13, 13)), [0, 1, 2])
+        self.assertEqual(refs(intervals.overlapping(16, 19)), [1])
+        self.assertEqual(refs(intervals.overlapping(26, 40)), [1])
+
+    def testNestedIntervals(self):
+        # A long interval early on keeps later short ones that end before the probe from hiding it, and vice versa
+        intervals = intervalList((0, 100), (10, 20), (30, 40), (50, 60))
+        self.assertEqual(refs(intervals.overlapping(45, 47)), [0])
+        self.assertEqual(refs(intervals.overlapping(35, 55)), [0, 2, 3])
+        self.assertEqual(refs(intervals.overlapping(101, 110)), [])
+
+    def testCoversWithNestedWindows(self):
+        windows = intervalList((0, 100), (10, 20), (110, 120))
+        self.assertTrue(windows.covers(15, 90))
+        self.assertTrue(windows.covers(0, 100))
+        self.assertTrue(windows.covers(110, 120))
+        self.assertFalse(windows.covers(95, 115))
+        self.assertFalse(windows.covers(105, 110))
+        self.assertFalse(IntervalList().covers(0, 1))
+
+    def testRemove(self):
+        intervals = intervalList((0, 100), (10, 20))
+        self.assertTrue(intervals.remove(0))
+        self.assertFalse(intervals.remove(0))
+        self.assertEqual(refs(intervals.overlapping(50, 60)), [])
+        self.assertFalse(intervals.covers(30, 40))
+        self.assertEqual(refs(intervals.overlapping(20, 60)), [1])
+
+    def testMatchesBruteForce(self):
+        generator = random.Random(5)
+        for _ in range(500):
+            intervals = IntervalList()
+            expected = {}
+            for ref in range(generator.randint(0, 15)):
+                start = generator.randint(0, 50)
+                end = start + generator.randint(0, 20)
+                intervals.add(start, end, ref)
+                expected[ref] = (start, end)
+            if expected and generator.random() < 0.3:
+                ref = generator.choice(list(expected))
+                intervals.remove(ref)
+                del expected[ref]
+
+            start = generator.randint(0, 70)
+            end = start + generator.randint(0, 10)
+            self.assertEqual(refs(intervals.overlapping(start, end)), sorted(ref for ref, (s, e) in expected.items() if s <= end and e >= start))
+            self.assertEqual(intervals.covers(start, end), any(s <= start and e >= end for s, e in expected.values()))
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# A ScheduleIndex whose days come from a dict instead of the database, counting the loads
+#-------------------------------------------------------------------------------------------------------------------------------------
+class LoadedScheduleIndex(ScheduleIndex):
+    def __init__(self, rows, maxDays):
+        super().__init__(None, maxAge=3600, maxDays=maxDays)
+        self.rows = rows
+        self.loads = 0
+
+    def _load(self, kind, date, ownerId):
+        self.loads += 1
+        # Only member days are loaded per member; the other kinds load every owner's intervals for the day
+        return self.rows.get((kind, date, ownerId if kind == MEMBER_BUSY else None), [])
+
+
+class ScheduleIndexTest(unittest.TestCase):
+    def testLoadedDaysAreBounded(self):
+        index = LoadedScheduleIndex({}, maxDays=3)
+        for userId in range(10):
+            index.memberConflicts(userId, '2024-05-01', '10:00', '11:00')
+        self.assertEqual(len(index._days), 3)
+
+        # The most recently used days are the ones kept
+        index.memberConflicts(9, '2024-05-01', '10:00', '11:00')
+        self.assertEqual(index.loads, 10)
+        index.memberConflicts(0, '2024-05-01', '10:00', '11:00')
+        self.assertEqual(index.loads, 11)
+
+    def testConflictsFromLoadedDay(self):
+        rows = {(TRAINER_BUSY, date(2024, 5, 1), None): [(7, time(10), time(11), 'class', 1)]}
+        index = LoadedScheduleIndex(rows, maxDays=10)
+        self.assertEqual(len(index.trainerConflicts(7, '2024-05-01', '11:00', '12:00')), 1)
+        self.assertEqual(index.trainerConflicts(7, '2024-05-01', '11:01', '12:00'), [])
+        self.assertEqual(index.trainerConflicts(8, '2024-05-01', '10:00', '11:00'), [])
+
+        # Writes the app makes are added to loaded days without reloading them
+        index.addInterval(TRAINER_BUSY, 8, '2024-05-01', '09:00', '10:00', ('session', 2))
+        self.assertEqual(len(index.trainerConflicts(8, '2024-05-01', '09:30', '09:45')), 1)
+        self.assertEqual(index.loads, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import random
+import unittest
+
+from SlotFinder import freeSlots, freeGaps, fitsGap
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Checks for the free slot sweep. Times are minutes since midnight, and every interval is inclusive on both ends.
+#-------------------------------------------------------------------------------------------------------------------------------------
+class FreeSlotsTest(unittest.TestCase):
+    def testEmptyWindowIsFree(self):
+        self.assertEqual(freeSlots([(600, 720)], [], 60), [(600, 660)])
+        self.assertEqual(freeSlots([(600, 720)], [], 60, perGap=5), [(600, 660), (660, 720)])
+
+    def testBusyBoundariesAreInclusive(self):
+        # A slot can't start at the minute a busy interval ends or end at the minute the next one starts
+        self.assertEqual(freeSlots([(600, 720)], [(600, 630)], 30, granularity=1), [(631, 661)])
+        self.assertEqual(freeSlots([(600, 720)], [(660, 720)], 60, granularity=1), [])
+        self.assertEqual(freeSlots([(600, 720)], [(661, 720)], 60, granularity=1), [(600, 660)])
+
+    def testStartsAreRoundedToGranularity(self):
+        self.assertEqual(freeSlots([(600, 720)], [(600, 630)], 30), [(645, 675)])
+        self.assertEqual(freeSlots([(601, 720)], [], 30), [(615, 645)])
+
+    def testOverlappingBusyIntervals(self):
+        busy = [(630, 660), (600, 640), (650, 700), (655, 665)]
+        self.assertEqual(freeSlots([(600, 780)], busy, 30), [(705, 735)])
+
+    def testBusyIntervalsOutsideWindows(self):
+        windows = [(840, 900), (600, 660)]
+        busy = [(500, 599), (661, 839), (901, 1000)]
+        self.assertEqual(freeSlots(windows, busy, 60), [(600, 660), (840, 900)])
+
+    def testBusyIntervalSpanningWindows(self):
+        # The first window only has 600-629 free, one minute short
+        windows = [(600, 660), (705, 765), (810, 870)]
+        self.assertEqual(freeSlots(windows, [(630, 730)], 30), [(735, 765), (810, 840)])
+
+    def testMatchesBruteForce(self):
+        generator = random.Random(17)
+        for _ in range(300):
+            windows = []
+            for _ in range(generator.randint(0, 3)):
+                start = generator.randint(0, 200)
+                windows.append((start, start + generator.randint(0, 120)))
+            busy = []
+            for _ in range(generator.randint(0, 6)):
+                start = generator.randint(0, 300)
+                busy.append((start, start + generator.randint(0, 60)))
+            duration = generator.choice([15, 30, 45])
+
+            # Windows don't overlap in practice (trainer availability has an exclusion constraint)
+            windows.sort()
+            windows = [window for number, window in enumerate(windows) if number == 0 or window[0] > windows[number - 1][1]]
+
+            # With one slot per gap and a one minute granularity, every slot is the earliest free start after a busy interval
+            expected = []
+            for windowStart, windowEnd in windows:
+                start = windowStart
+                while start + duration <= windowEnd:
+                    if all(end < start or begin > start + duration for begin, end in busy):
+                        expected.append((start, start + duration))
+                        blocking = [begin for begin, _ in busy if begin > start + duration and begin <= windowEnd]
+                        start = min(blocking) if blocking else windowEnd + 1
+                    else:
+                        start += 1
+            self.assertEqual(freeSlots(windows, busy, duration, granularity=1), expected, (windows, busy, duration))
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------
+# Checks for the room grid's free gaps, with the club open from 06:00 (360) to 22:00 (1320)
+#-------------------------------------------------------------------------------------------------------------------------------------
+OPENING, CLOSING = 360, 1320
+
+def fits(busy, start, end):
+    return any(fitsGap(gap, start, end, busy) for gap in freeGaps(busy, OPENING, CLOSING))
+
+
+class FreeGapsTest(unittest.TestCase):
+    def testEmptyDay(self):
+        self.assertEqual(freeGaps([], OPENING, CLOSING), [(OPENING, CLOSING)])
+        self.assertTrue(fits([], OPENING, CLOSING))
+
+    def testBookingEndingAtOpeningTime(self):
+        busy = [(300, OPENING)]
+        self.assertEqual(freeGaps(busy, OPENING, CLOSING), [(OPENING, CLOSING)])
+        self.assertFalse(fits(busy, OPENING, 420))
+        self.assertTrue(fits(busy, OPENING + 1, 420))
+
+    def testBookingStartingAtClosingTime(self):
+        busy = [(CLOSING, 1400)]
+        self.assertEqual(freeGaps(busy, OPENING, CLOSING), [(OPENING, CLOSING)])
+        self.assertFalse(fits(busy, 1260, CLOSING))
+        self.assertTrue(fits(busy, 1260, CLOSING - 1))
+
+    def testBookingsOutsideOpeningHours(self):
+        busy = [(100, 200), (1400, 1430)]
+        self.assertEqual(freeGaps(busy, OPENING, CLOSING), [(OPENING, CLOSING)])
+        self.assertTrue(fits(busy, OPENING, CLOSING))
+
+    def testMidDayBooking(self):
+        busy = [(600, 660)]
+        self.assertEqual(freeGaps(busy, OPENING, CLOSING), [(OPENING, 600), (660, CLOSING)])
+        self.assertTrue(fits(busy, OPENING, 599))
+        self.assertFalse(fits(busy, 540, 600))
+        self.assertFalse(fits(busy, 660, 720))
+        self.assertTrue(fits(busy, 661, CLOSING))
+        self.assertFalse(fits(busy, 630, 640))
+
+    def testOverlappingBookingsAreMerged(self):
+        busy = [(600, 660), (630, 700), (640, 650)]
+        self.assertEqual(freeGaps(busy, OPENING, CLOSING), [(OPENING, 600), (700, CLOSING)])
+        self.assertFalse(fits(busy, 661, 690))
+        self.assertTrue(fits(busy, 701, 760))
+
+    def testBackToBackBookingsLeaveNoGap(self):
+        busy = [(600, 660), (660, 720)]
+        self.assertEqual(freeGaps(busy, OPENING, CLOSING), [(OPENING, 600), (720, CLOSING)])
+
+    def testFullyBookedDay(self):
+        self.assertEqual(freeGaps([(300, 1400)], OPENING, CLOSING), [])
+        self.assertEqual(freeGaps([(OPENING, 800), (700, CLOSING)], OPENING, CLOSING), [])
+        self.assertFalse(fits([(OPENING, 800), (700, CLOSING)], 750, 760))
+
+    def testMatchesBruteForce(self):
+        generator = random.Random(18)
+        for _ in range(300):
+            busy = []
+            for _ in range(generator.randint(0, 6)):
+                start = generator.randint(OPENING - 60, CLOSING)
+                busy.append((start, start + generator.randint(0, 240)))
+            busy.sort()
+
+            # A booking fits exactly when it stays within opening hours and touches no busy interval
+            for _ in range(20):
+                start = generator.randint(OPENING, CLOSING)
+                end = min(CLOSING, start + generator.randint(0, 120))
+                expected = all(busyEnd < start or busyStart > end for busyStart, busyEnd in busy)
+                self.assertEqual(fits(busy, start, end), expected, (busy, start, end))
+
+
+if __name__ == '__main__':
+    unittest.main()